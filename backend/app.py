@@ -1,120 +1,87 @@
-from flask import Flask
+import math
+import time
+from flask import Flask, jsonify
 from flask_cors import CORS
 from config import Config
 from models import db
+from password_hashing import hasher
+from db_pool import engine_options, pool_status
+from metrics import request_metrics
+from table_metrics import refresh_table_metrics
+from task_cache import task_cache
+from rate_limit import rate_limiter
+from db_routing import read_routing, WRITTEN_AT_HEADER
+from shard_router import ShardMoving, shard_router
+from structured_logging import configure_logging, get_logger
 from routes import api
 from auth_routes import auth
+from notification_routes import notifications
+from migrate_db import MIGRATIONS_DIR, run_migrations, schema_is_current, current_revision, head_revision
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import text
 
 # Initialize migration
 migrate = Migrate()
 
+logger = get_logger(__name__)
+
+CORS_ORIGINS = [
+    "http://localhost:5173",
+    "https://todo.fresan.tech",
+    "https://todo-app-three-nu-14.vercel.app",
+    "https://todo-app-git-main-gabrielfresans-projects.vercel.app",
+    "https://todo-2shekykln-gabrielfresans-projects.vercel.app"
+]
+# ETag: o TaskList o devolve em If-None-Match na sincronização incremental
+CORS_EXPOSE_HEADERS = [WRITTEN_AT_HEADER, 'ETag']
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    configure_logging(app.config)
+    if app.config.get('PROXY_FIX_X_FOR'):
+        # IP real do cliente (rate limit por IP) vem do X-Forwarded-For do proxy
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     
     # Initialize extensions
+    read_routing.init_app(app)
+    shard_router.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR)
+    hasher.init_app(app)
+    request_metrics.init_app(app)
+    request_metrics.on_scrape(refresh_table_metrics)
+    task_cache.init_app(app)
+    rate_limiter.init_app(app)
     jwt = JWTManager(app)
     
     # Configure CORS
-    CORS(app, origins=[
-        "http://localhost:5173",
-        "https://todo.fresan.tech",
-        "https://todo-app-three-nu-14.vercel.app",
-        "https://todo-app-git-main-gabrielfresans-projects.vercel.app",
-        "https://todo-2shekykln-gabrielfresans-projects.vercel.app"
-    ])
+    CORS(app, expose_headers=CORS_EXPOSE_HEADERS, origins=CORS_ORIGINS)
     
     # Register blueprints
     app.register_blueprint(api, url_prefix='/api')
     app.register_blueprint(auth, url_prefix='/api/auth')
+    app.register_blueprint(notifications, url_prefix='/api/notifications')
     
-    # Create database tables and run migrations if they don't exist
+    # Migrações rodam uma vez por deploy (python migrate_db.py); no boot só
+    # conferimos a revisão gravada em alembic_version
     with app.app_context():
-        print("Verificando/criando tabelas do banco de dados...")
-        
-        # Create all tables (including new ones)
-        db.create_all()
-        
-        # Run production migrations automatically
-        try:
-            from sqlalchemy import text
-            
-            # Check and add user_id column to task table if needed
-            try:
-                db.session.execute(text("SELECT user_id FROM task LIMIT 1"))
-                print("✅ user_id column exists")
-            except:
-                print("➕ Adding user_id column to task table...")
-                db.session.execute(text("ALTER TABLE task ADD COLUMN user_id INTEGER"))
-                db.session.commit()
-                print("✅ user_id column added")
-            
-            # Check and add email_verified column to user table if needed  
-            try:
-                db.session.execute(text("SELECT email_verified FROM \"user\" LIMIT 1"))
-                print("✅ email_verified column exists")
-            except:
-                print("➕ Adding email_verified column to user table...")
-                db.session.execute(text("ALTER TABLE \"user\" ADD COLUMN email_verified BOOLEAN DEFAULT TRUE"))
-                db.session.commit()
-                print("✅ email_verified column added")
-            
-            # Remove any foreign key constraints and fix table naming issues
-            try:
-                # Check if there's an unwanted email_verification table (should be verification_code)
-                tables_result = db.session.execute(text("""
-                    SELECT table_name FROM information_schema.tables 
-                    WHERE table_schema = 'public' AND table_name IN ('email_verification', 'verification_code')
-                """)).fetchall()
-                
-                existing_tables = [row[0] for row in tables_result]
-                print(f"📋 Found tables: {existing_tables}")
-                
-                # If email_verification table exists, drop its constraints and the table
-                if 'email_verification' in existing_tables:
-                    print("🗑️ Dropping email_verification table...")
-                    db.session.execute(text("DROP TABLE IF EXISTS email_verification CASCADE"))
-                
-                # Drop any constraints on verification_code table
-                db.session.execute(text("ALTER TABLE verification_code DROP CONSTRAINT IF EXISTS email_verification_user_id_fkey"))
-                db.session.execute(text("ALTER TABLE verification_code DROP CONSTRAINT IF EXISTS verification_code_user_id_fkey"))
-                
-                db.session.commit()
-                print("✅ Cleaned up foreign key constraints and unwanted tables")
-                
-            except Exception as e:
-                print(f"ℹ️ Constraint cleanup: {e}")
-                try:
-                    db.session.rollback()
-                except:
-                    pass
-            
-            # Set existing users as verified
-            result = db.session.execute(text("UPDATE \"user\" SET email_verified = TRUE WHERE email_verified IS NULL"))
-            if result.rowcount > 0:
-                print(f"✅ Updated {result.rowcount} users to verified")
-            
-            # Assign orphaned tasks to first user
-            first_user = db.session.execute(text("SELECT id FROM \"user\" LIMIT 1")).fetchone()
-            if first_user:
-                result = db.session.execute(text("UPDATE task SET user_id = :user_id WHERE user_id IS NULL"), {"user_id": first_user[0]})
-                if result.rowcount > 0:
-                    print(f"✅ Assigned {result.rowcount} tasks to user {first_user[0]}")
-            
-            db.session.commit()
-            
-        except Exception as e:
-            print(f"⚠️ Migration warning: {e}")
-            try:
-                db.session.rollback()
-            except:
-                pass
-        
-        print("Tabelas prontas!")
+        if app.config['AUTO_MIGRATE']:
+            run_migrations()
+        elif not schema_is_current():
+            logger.warning("Schema desatualizado: rode 'python migrate_db.py' antes de servir requisições",
+                           extra={'revision': current_revision(), 'expected': head_revision()})
+    
+    @app.errorhandler(ShardMoving)
+    def shard_moving(error):
+        # Escrita durante a migração do usuário entre shards: o cliente tenta de novo
+        response = jsonify({'error': 'Tarefas em manutenção, tente novamente em instantes'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+        return response
     
     @app.route('/')
     def hello():
@@ -122,7 +89,35 @@ def create_app(config_class=Config):
     
     @app.route('/health')
     def health_check():
-        return {'status': 'healthy'}, 200
+        """
+        Readiness probe: faz um round-trip no banco e olha a ocupação do pool.
+        Responde 503 se o banco não responder ou o pool estiver saturado, para
+        o load balancer parar de mandar tráfego para este worker.
+        """
+        pool = pool_status(db.engine)
+        saturated = pool.get('saturation', 0) >= app.config['HEALTH_POOL_SATURATION_THRESHOLD']
+        
+        if saturated:
+            # Sem conexão livre o SELECT 1 só esperaria o DB_POOL_TIMEOUT
+            database = {'status': 'skipped'}
+        else:
+            started = time.perf_counter()
+            try:
+                db.session.execute(text('SELECT 1'))
+                database = {'status': 'ok', 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+            except Exception as e:
+                db.session.rollback()
+                database = {'status': 'error', 'error': str(e)}
+        
+        healthy = database['status'] == 'ok' and not saturated
+        
+        body = {
+            'status': 'healthy' if healthy else 'unhealthy',
+            'database': database,
+            'pool': pool,
+            'task_cache': task_cache.stats()
+        }
+        return body, 200 if healthy else 503
     
     return app
 
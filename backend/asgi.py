@@ -0,0 +1,31 @@
+"""
+Entrada ASGI: as rotas de espera longa em views async, o resto pela
+aplicação Flask.
+
+    pip install -r requirements_asgi.txt
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+- GET /api/tasks e GET /api/notifications/stream rodam em async_routes.py
+  sobre engines assíncronas (async_db.py: psycopg 3 em modo async no
+  PostgreSQL, aiosqlite no SQLite local). Cada stream SSE aberto é uma
+  corrotina, não uma thread, e a listagem não segura worker enquanto espera
+  o banco.
+- Todas as outras rotas (escritas, auth, summary...) continuam nas views
+  síncronas do Flask, num pool de ASGI_THREADS threads por processo
+  (a2wsgi). Portá-las ficou fora do escopo de propósito: são curtas (uma ou
+  duas consultas pelo índice), o bcrypt roda no pool de processos do
+  password_hashing e o email sai pelo worker do outbox (email_outbox.py).
+  Nenhuma espera por segundos; reescrevê-las duplicaria cada view, o rate
+  limiter e o JWT para ganhar pouco.
+- As views async gravam as mesmas métricas das do Flask (latência, status e
+  SQL por endpoint, com o nome do endpoint do Flask) por observe_async_view;
+  /metrics continua servido pelo Flask.
+
+O wsgi.py continua sendo o deploy padrão (Procfile).
+"""
+
+from app import create_app
+from async_routes import create_asgi_app
+
+flask_app = create_app()
+app = create_asgi_app(flask_app)
@@ -0,0 +1,74 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from db_pool import async_database_url, async_engine_options
+from db_routing import REPLICA_BIND
+from models import User
+from shard_router import shard_router
+
+class AsyncDatabase:
+    """
+    Engines assíncronas (SQLAlchemy asyncio) das views async do asgi.py.
+
+    Espelham os binds da aplicação Flask — banco principal, réplica de leitura
+    e shards de tarefas — com os drivers de ASYNC_DRIVERS. Enquanto uma
+    consulta espera o banco, o event loop atende as outras conexões: nenhuma
+    thread ou processo fica parado por requisição.
+
+    As regras de roteamento são as mesmas do RoutingSession: tarefas no shard
+    do usuário (diretório com o mesmo cache do shard_router), leituras na
+    réplica quando read_routing permite, o resto no banco principal.
+    """
+
+    def __init__(self):
+        self.engines = {}
+
+    def init_app(self, app):
+        """Create the engines from the app's config; run after read_routing/shard_router.init_app."""
+        config = app.config
+        uris = {None: config['SQLALCHEMY_DATABASE_URI']}
+        if config.get('SQLALCHEMY_REPLICA_URI'):
+            uris[REPLICA_BIND] = config['SQLALCHEMY_REPLICA_URI']
+        for name, uri in shard_router.shards.items():
+            if uri is not None:
+                uris[f'shard:{name}'] = uri
+        # create_async_engine não conecta: as conexões nascem no event loop de cada worker
+        self.engines = {
+            key: create_async_engine(async_database_url(uri), **async_engine_options(config, uri))
+            for key, uri in uris.items()
+        }
+
+    def engine(self, shard=None, target=None):
+        """Engine for the user's shard, else for the read target ('primary' or REPLICA_BIND)."""
+        if shard is not None and shard_router.shards.get(shard) is not None:
+            return self.engines[f'shard:{shard}']
+        if shard is None and target == REPLICA_BIND and REPLICA_BIND in self.engines:
+            return self.engines[REPLICA_BIND]
+        return self.engines[None]
+
+    def session(self, engine):
+        return AsyncSession(engine, expire_on_commit=False)
+
+    async def route_for_user(self, user_id):
+        """Async twin of shard_router.route_for_user, sharing its directory cache."""
+        if not shard_router.enabled:
+            return None, False
+        route = shard_router.cached_route(user_id)
+        if route is not None:
+            return route
+        async with self.engines[None].connect() as connection:
+            row = (await connection.execute(shard_router.directory_query(user_id))).first()
+        shard, moving = shard_router.route_from_row(user_id, row)
+        shard_router.remember_route(user_id, shard, moving)
+        return shard, moving
+
+    async def task_revision(self, session, user_id):
+        """models.task_revision on an AsyncSession bound to the user's task engine."""
+        users = User.__table__
+        result = await session.execute(select(users.c.task_revision).where(users.c.id == user_id))
+        return result.scalar() or 0
+
+    async def dispose(self):
+        for engine in self.engines.values():
+            await engine.dispose()
+
+async_db = AsyncDatabase()
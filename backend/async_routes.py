@@ -0,0 +1,211 @@
+"""
+Views async do asgi.py: GET /api/tasks e o stream SSE de notificações.
+
+São as duas rotas que passam a maior parte do tempo esperando (o banco, na
+listagem; o próximo evento, no stream). Aqui elas rodam no event loop sobre
+o async_db: um stream aberto é uma corrotina parada, não uma thread, e uma
+listagem esperando o banco não segura worker nenhum. As respostas são as
+mesmas das views síncronas de routes.py e notification_routes.py, que
+continuam servindo o wsgi.py.
+
+create_asgi_app monta as duas na frente do Flask; fica aqui, e não no
+asgi.py, para que testes e scripts montem o app sem criar o app padrão.
+"""
+
+import asyncio
+import os
+import queue
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from app import CORS_EXPOSE_HEADERS, CORS_ORIGINS
+from async_db import async_db
+from db_routing import WRITTEN_AT_HEADER, read_routing
+from metrics import DB_READ_ROUTES, observe_async_view
+from models import Task
+from notification_routes import KEEP_ALIVE, STREAM_HEADERS, STREAM_PREAMBLE, format_event, user_from_ticket
+from notifications import already_sent, scheduler, user_due_tasks_query
+from structured_logging import get_logger
+from task_cache import task_cache
+from task_queries import InvalidQuery, page_query, page_result, wants_page
+from task_serialization import STREAM_CHUNK_SIZE, aiter_json_array, dumps, rows_to_dicts, task_rows_query
+
+logger = get_logger(__name__)
+
+class LoopQueue:
+    """
+    Fila de eventos do agendador para uma conexão async. O agendador publica
+    da thread dele; o evento é entregue no event loop da conexão.
+    """
+
+    def __init__(self, loop, maxsize):
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize)
+
+    def put_nowait(self, item):
+        if self._queue.full():
+            raise queue.Full
+        try:
+            self._loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # Event loop já encerrado (desligamento do worker)
+            pass
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+def authenticate(request):
+    """
+    (user_id, None) from the Bearer access token, or (None, error response)
+    with the same status and body flask_jwt_extended would answer.
+    """
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme != 'Bearer' or not token:
+        return None, JSONResponse({'msg': 'Missing Authorization Header'}, 401)
+    flask_app = request.app.state.flask_app
+    with flask_app.app_context():
+        try:
+            claims = decode_token(token)
+        except ExpiredSignatureError:
+            return None, JSONResponse({'msg': 'Token has expired'}, 401)
+        except (InvalidTokenError, JWTExtendedException) as e:
+            return None, JSONResponse({'msg': str(e)}, 422)
+    if claims.get('type') != 'access':
+        return None, JSONResponse({'msg': 'Only non-refresh tokens are allowed'}, 422)
+    return int(claims[flask_app.config['JWT_IDENTITY_CLAIM']]), None
+
+async def list_tasks(request):
+    """Async GET /api/tasks: keyset page with query parameters, the full list without."""
+    user_id, error = authenticate(request)
+    if error is not None:
+        return error
+    try:
+        target, reason = read_routing.choose_route(request.headers.get(WRITTEN_AT_HEADER))
+        DB_READ_ROUTES.labels(target, reason).inc()
+        shard, _ = await async_db.route_for_user(user_id)
+        engine = async_db.engine(shard, target)
+
+        if wants_page(request.query_params):
+            try:
+                statement, sort, limit = page_query(user_id, request.query_params)
+            except InvalidQuery as e:
+                return JSONResponse({'error': str(e)}, 400)
+            async with async_db.session(engine) as session:
+                sync_cursor = await async_db.task_revision(session, user_id)
+                rows = (await session.execute(statement)).all()
+            tasks, next_cursor = page_result(rows, sort, limit)
+            return Response(
+                dumps({'tasks': rows_to_dicts(tasks), 'next_cursor': next_cursor, 'sync_cursor': str(sync_cursor)}),
+                media_type='application/json'
+            )
+
+        statement = task_rows_query().where(Task.user_id == user_id)
+        # Só o LRU local: o cliente do Redis é bloqueante e pararia o event loop
+        use_cache = task_cache.enabled and not task_cache.backend.shared
+        revision = None
+        if use_cache:
+            async with async_db.session(engine) as session:
+                revision = await async_db.task_revision(session, user_id)
+            payload = task_cache.get(user_id, revision)
+            if payload is not None:
+                return Response(payload, media_type='application/json')
+    except Exception as e:
+        logger.exception('Erro ao carregar tarefas')
+        return JSONResponse({'error': str(e)}, 500)
+
+    async def stream_rows():
+        async with async_db.session(engine) as session:
+            result = await session.stream(statement.execution_options(yield_per=STREAM_CHUNK_SIZE))
+            async for chunk in aiter_json_array(result.partitions()):
+                yield chunk
+
+    chunks = stream_rows()
+    if use_cache:
+        chunks = task_cache.astore_while_streaming(user_id, revision, chunks)
+    return StreamingResponse(chunks, media_type='application/json')
+
+async def notification_stream(request):
+    """Async GET /api/notifications/stream, fed by the same per-process scheduler."""
+    flask_app = request.app.state.flask_app
+    ticket = request.query_params.get('ticket')
+    if ticket:
+        with flask_app.app_context():
+            user_id = user_from_ticket(ticket)
+        if user_id is None:
+            return JSONResponse({'error': 'Ticket inválido ou expirado'}, 401)
+    else:
+        user_id, error = authenticate(request)
+        if error is not None:
+            return error
+    scheduler.start(flask_app)
+    heartbeat = flask_app.config.get('NOTIFICATION_HEARTBEAT_SECONDS', 15)
+
+    async def generate():
+        # Inscreve antes de ler o estado inicial, como a view síncrona
+        events = scheduler.subscribe(user_id, LoopQueue(asyncio.get_running_loop(), scheduler.queue_size))
+        try:
+            # Estado inicial lido uma única vez; a conexão não volta a consultar o banco
+            shard, _ = await async_db.route_for_user(user_id)
+            async with async_db.session(async_db.engine(shard)) as session:
+                initial = [task.to_dict() for task in (await session.scalars(user_due_tasks_query(user_id))).all()]
+            sent = {(task['id'], task['due_date']) for task in initial}
+            yield STREAM_PREAMBLE
+            for task in initial:
+                yield format_event('due', task)
+            while True:
+                try:
+                    task = await events.get(heartbeat)
+                except asyncio.TimeoutError:
+                    yield KEEP_ALIVE
+                    continue
+                if not already_sent(sent, task):
+                    yield format_event('due', task)
+        finally:
+            scheduler.unsubscribe(user_id, events)
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers=STREAM_HEADERS)
+
+def create_asgi_app(flask_app):
+    """Starlette app with the async views in front of flask_app."""
+    async_db.init_app(flask_app)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await async_db.dispose()
+
+    def view(function, endpoint):
+        if not flask_app.config.get('METRICS_ENABLED', True):
+            return function
+        return observe_async_view(function, endpoint)
+
+    app = Starlette(
+        routes=[
+            Route('/api/tasks', view(list_tasks, 'api.get_tasks'), methods=['GET']),
+            Route('/api/notifications/stream', view(notification_stream, 'notifications.stream'), methods=['GET']),
+            # Métodos e caminhos que não casam acima (POST /api/tasks, /api/auth/...) caem no Flask
+            Mount('/', app=WSGIMiddleware(flask_app, workers=int(os.environ.get('ASGI_THREADS', 32))))
+        ],
+        # Mesma política do flask-cors; nas rotas do Flask os cabeçalhos são só reescritos
+        middleware=[Middleware(
+            CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=['*'], allow_headers=['*'],
+            expose_headers=CORS_EXPOSE_HEADERS
+        )],
+        lifespan=lifespan
+    )
+    app.state.flask_app = flask_app
+    return app
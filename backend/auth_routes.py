@@ -1,15 +1,21 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from models import db, User, VerificationCode
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token, jwt_required, get_jwt, get_jwt_identity
+)
+from sqlalchemy import update, insert
+from models import db, User, VerificationCode, RefreshToken, BRAZIL_TZ
 from datetime import timedelta, datetime
-from email_service import EmailService
+from email_outbox import enqueue_verification_email, discard_pending
+from password_hashing import PasswordHasherBusy
+from rate_limit import rate_limiter
+from structured_logging import get_logger
 import random
 import string
 import re
-import threading
-import time
+import uuid
 
 auth = Blueprint('auth', __name__)
+logger = get_logger(__name__)
 
 def is_valid_email(email):
     """Validate email format"""
@@ -20,39 +26,45 @@ def generate_verification_code():
     """Generate a 6-digit verification code"""
     return ''.join(random.choices(string.digits, k=6))
 
-def cleanup_unverified_user(email, delay=60):
-    """Delete unverified user after specified delay (in seconds)"""
-    from flask import current_app
-    
-    def delete_user():
-        time.sleep(delay)
-        try:
-            # Create new app context for the thread
-            with current_app.app_context():
-                user = User.query.filter_by(email=email, email_verified=False).first()
-                if user:
-                    print(f"Removendo usuário não verificado: {email}")
-                    # Clean up verification codes FIRST
-                    codes = VerificationCode.query.filter_by(email=email).all()
-                    for code in codes:
-                        db.session.delete(code)
-                    # Then delete user
-                    db.session.delete(user)
-                    db.session.commit()
-                else:
-                    print(f"Usuário {email} já foi verificado ou removido")
-        except Exception as e:
-            print(f"Erro ao limpar usuário não verificado: {str(e)}")
-            try:
-                db.session.rollback()
-            except:
-                pass
-    
-    thread = threading.Thread(target=delete_user)
-    thread.daemon = True
-    thread.start()
+def busy_response(error):
+    """503 answer used when the password hashing pool is saturated"""
+    response = jsonify({'error': f'Servidor ocupado, tente novamente: {str(error)}'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+# Dados do usuário copiados para os tokens: /me e /refresh não precisam ir ao banco
+USER_CLAIMS = ('email', 'name', 'email_verified', 'created_at')
+
+def user_claims(user):
+    return {key: value for key, value in user.to_dict().items() if key in USER_CLAIMS}
+
+def issue_tokens(user_id, claims, family_id=None):
+    """
+    Create an access token plus a rotating refresh token and record the
+    refresh token's jti in the refresh_token table (caller commits).
+    """
+    family_id = family_id or str(uuid.uuid4())
+    access_token = create_access_token(identity=str(user_id), additional_claims=claims)
+    refresh_token = create_refresh_token(identity=str(user_id), additional_claims=dict(claims, fam=family_id))
+    decoded = decode_token(refresh_token)
+    db.session.execute(insert(RefreshToken).values(
+        jti=decoded['jti'],
+        family_id=family_id,
+        user_id=user_id,
+        expires_at=datetime.fromtimestamp(decoded['exp'], BRAZIL_TZ)
+    ))
+    return {'access_token': access_token, 'refresh_token': refresh_token}
+
+def revoke_family(family_id, now):
+    db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
 
 @auth.route('/register', methods=['POST'])
+@rate_limiter.limit('register')
 def register():
     """Step 1: Create user and send verification email"""
     try:
@@ -69,7 +81,7 @@ def register():
         if not is_valid_email(email):
             return jsonify({'error': 'Formato de email inválido'}), 400
         
-        print(f"Tentativa de registro para email: {email}")
+        logger.debug('Tentativa de registro', extra={'email': email})
         
         # Check if user already exists
         existing_user = User.query.filter_by(email=email).first()
@@ -94,29 +106,20 @@ def register():
         user.set_password(password)
         
         db.session.add(user)
-        db.session.commit()
-        
-        print(f"Usuário criado (não verificado): {email}")
         
         # Generate and store verification code
         verification_code = generate_verification_code()
         code_record = VerificationCode(email=email, code=verification_code)
         db.session.add(code_record)
-        db.session.commit()
         
-        # Send verification email
-        email_service = EmailService()
-        success, response = email_service.send_verification_email(email, verification_code)
+        # Queue verification email in the same transaction; the outbox worker delivers it
+        discard_pending(email)
+        enqueue_verification_email(email, verification_code)
+        db.session.commit()
         
-        if not success:
-            # If email fails, clean up (codes first, then user)
-            db.session.delete(code_record)
-            db.session.delete(user)
-            db.session.commit()
-            return jsonify({'error': f'Erro ao enviar email de verificação: {response}'}), 500
+        logger.info('Usuário criado (não verificado)', extra={'user_id': user.id})
         
-        # Start cleanup timer (1 minute)
-        cleanup_unverified_user(email, delay=60)
+        # Unverified accounts are removed by the sweeper (sweeper.py) after UNVERIFIED_USER_TTL_SECONDS
         
         return jsonify({
             'message': 'Usuário criado. Verifique seu email para confirmar o cadastro.',
@@ -124,12 +127,16 @@ def register():
             'verification_sent': True
         }), 201
         
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return busy_response(e)
     except Exception as e:
-        print(f"Erro no registro: {str(e)}")
+        logger.exception('Erro no registro')
         db.session.rollback()
         return jsonify({'error': f'Erro ao criar usuário: {str(e)}'}), 500
 
 @auth.route('/login', methods=['POST'])
+@rate_limiter.limit('login')
 def login():
     try:
         data = request.get_json()
@@ -137,59 +144,142 @@ def login():
         if not data or not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email e password são obrigatórios'}), 400
         
-        print(f"Tentativa de login para email: {data['email']}")  # Debug
+        logger.debug('Tentativa de login', extra={'email': data['email']})
         
         user = User.query.filter_by(email=data['email']).first()
         
         if not user:
-            print(f"Usuário não encontrado para email: {data['email']}")
+            logger.info('Login falhou: usuário não encontrado')
             return jsonify({'error': 'Email ou senha inválidos'}), 401
         
         if not user.email_verified:
             return jsonify({'error': 'Email não verificado. Verifique seu email antes de fazer login.'}), 401
         
-        print(f"Usuário encontrado: {user.email}")
-        
         if not user.check_password(data['password']):
-            print("Senha incorreta")
+            logger.info('Login falhou: senha incorreta', extra={'user_id': user.id})
             return jsonify({'error': 'Email ou senha inválidos'}), 401
         
-        print("Senha correta, gerando token")  # Debug
+        # Custo do bcrypt mudou desde o cadastro: regrava o hash com a senha já validada
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
         
-        # Criar token de acesso
-        access_token = create_access_token(
-            identity=str(user.id),
-            expires_delta=timedelta(hours=1)
-        )
+        # Access token de 1 hora + refresh token rotativo
+        tokens = issue_tokens(user.id, user_claims(user))
+        db.session.commit()
         
-        print("Token gerado com sucesso")  # Debug
+        logger.debug('Login realizado', extra={'user_id': user.id})
         
         return jsonify({
             'message': 'Login realizado com sucesso',
-            'access_token': access_token,
+            **tokens,
             'user': user.to_dict()
         }), 200
         
+    except PasswordHasherBusy as e:
+        return busy_response(e)
     except Exception as e:
-        print(f"Erro no login: {str(e)}")  # Debug
+        logger.exception('Erro no login')
+        db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @auth.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
     current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    claims = get_jwt()
     
+    # Tokens emitidos no login/refresh já trazem os dados do usuário
+    if all(key in claims for key in USER_CLAIMS):
+        return jsonify({'user': dict({key: claims[key] for key in USER_CLAIMS}, id=current_user_id)}), 200
+    
+    # Tokens antigos, sem claims: consulta o banco
+    user = db.session.get(User, current_user_id)
     if not user:
         return jsonify({'error': 'Usuário não encontrado'}), 404
     
     return jsonify({'user': user.to_dict()}), 200
 
+@auth.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Troca um refresh token válido por um novo par de tokens (rotação). O token
+    apresentado é revogado; reapresentá-lo depois revoga toda a família.
+
+    Dentro de REFRESH_REUSE_GRACE_SECONDS da rotação a resposta é 409: outra
+    aba renovou com o mesmo token e o cliente deve usar o par que ela gravou.
+    """
+    current_user_id = int(get_jwt_identity())
+    claims = get_jwt()
+    now = datetime.now(BRAZIL_TZ)
+    
+    try:
+        # UPDATE condicional: entre dois pedidos com o mesmo token só um vence
+        result = db.session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.jti == claims['jti'],
+                RefreshToken.user_id == current_user_id,
+                RefreshToken.revoked_at.is_(None)
+            )
+            .values(revoked_at=now)
+        )
+        if result.rowcount != 1:
+            grace = timedelta(seconds=current_app.config.get('REFRESH_REUSE_GRACE_SECONDS', 10))
+            recently_rotated = db.session.query(RefreshToken.jti).filter(
+                RefreshToken.jti == claims['jti'],
+                RefreshToken.revoked_at >= now - grace
+            ).first()
+            if recently_rotated:
+                db.session.rollback()
+                return jsonify({'error': 'Sessão renovada por outra aba, tente novamente', 'retry': True}), 409
+            if 'fam' in claims:
+                revoke_family(claims['fam'], now)
+                logger.warning('Refresh token reutilizado: família revogada', extra={'user_id': current_user_id})
+            db.session.commit()
+            return jsonify({'error': 'Sessão expirada. Faça login novamente.'}), 401
+        
+        # Claims do banco: nome ou email alterados desde o login entram no novo token
+        user = db.session.get(User, current_user_id)
+        if not user:
+            db.session.rollback()
+            return jsonify({'error': 'Sessão expirada. Faça login novamente.'}), 401
+        tokens = issue_tokens(current_user_id, user_claims(user), family_id=claims.get('fam'))
+        db.session.commit()
+        return jsonify(tokens), 200
+        
+    except Exception as e:
+        logger.exception('Erro ao renovar sessão')
+        db.session.rollback()
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@auth.route('/logout', methods=['POST'])
+@jwt_required(refresh=True)
+def logout():
+    """Revoke the refresh token family (this device's session)"""
+    claims = get_jwt()
+    try:
+        if 'fam' in claims:
+            revoke_family(claims['fam'], datetime.now(BRAZIL_TZ))
+        db.session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.jti == claims['jti'], RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(BRAZIL_TZ))
+        )
+        db.session.commit()
+        return jsonify({'message': 'Sessão encerrada'}), 200
+    except Exception as e:
+        logger.exception('Erro no logout')
+        db.session.rollback()
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 def generate_verification_code():
     """Generate a 6-digit verification code"""
     return ''.join(random.choices(string.digits, k=6))
 
 @auth.route('/verify-email', methods=['POST'])
+@rate_limiter.limit('verify_email')
 def verify_email():
     """Step 2: Verify email with code and complete registration"""
     try:
@@ -201,7 +291,7 @@ def verify_email():
         email = data['email'].lower().strip()
         code = data['code'].strip()
         
-        print(f"Verificando código para email: {email}")
+        logger.debug('Verificando código', extra={'email': email})
         
         # Find the user
         user = User.query.filter_by(email=email, email_verified=False).first()
@@ -225,28 +315,25 @@ def verify_email():
         user.email_verified = True
         code_record.verified = True
         
+        # Create access + refresh tokens in the same transaction
+        tokens = issue_tokens(user.id, user_claims(user))
         db.session.commit()
         
-        print(f"Email verificado com sucesso: {email}")
-        
-        # Create access token
-        access_token = create_access_token(
-            identity=str(user.id),
-            expires_delta=timedelta(hours=1)
-        )
+        logger.info('Email verificado', extra={'user_id': user.id})
         
         return jsonify({
             'message': 'Email verificado com sucesso! Cadastro completo.',
-            'access_token': access_token,
+            **tokens,
             'user': user.to_dict()
         }), 200
         
     except Exception as e:
-        print(f"Erro na verificação: {str(e)}")
+        logger.exception('Erro na verificação')
         db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @auth.route('/resend-verification', methods=['POST'])
+@rate_limiter.limit('resend_verification')
 def resend_verification():
     """Resend verification code"""
     try:
@@ -271,20 +358,17 @@ def resend_verification():
         verification_code = generate_verification_code()
         code_record = VerificationCode(email=email, code=verification_code)
         db.session.add(code_record)
-        db.session.commit()
         
-        # Send email
-        email_service = EmailService()
-        success, response = email_service.send_verification_email(email, verification_code)
+        # Queue email with the new code, dropping any unsent one with the old code
+        discard_pending(email)
+        enqueue_verification_email(email, verification_code)
+        db.session.commit()
         
-        if success:
-            return jsonify({
-                'message': 'Novo código de verificação enviado'
-            }), 200
-        else:
-            return jsonify({'error': f'Erro ao enviar email: {response}'}), 500
+        return jsonify({
+            'message': 'Novo código de verificação enviado'
+        }), 200
             
     except Exception as e:
-        print(f"Erro ao reenviar verificação: {str(e)}")
+        logger.exception('Erro ao reenviar verificação')
         db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
\ No newline at end of file
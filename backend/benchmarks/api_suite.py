@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark of every endpoint in routes.py and auth_routes.py.
+
+Seeds USERS x TASKS rows in bulk, then drives each endpoint REQUESTS times:
+- test_client: in-process through the Flask test client (SQLite file or
+  in-memory), measuring the app without any server or network in the way
+- gunicorn: a real gunicorn run against the same SQLite file, with
+  CONCURRENCY client threads
+
+Reports p50/p95/p99 latency, throughput and peak RSS per mode as JSON, so
+runs can be diffed across commits (the current commit is included).
+The SSE stream is long-lived and has its own benchmark (sse_load.py).
+
+Example:
+    python benchmarks/api_suite.py --users 20 --tasks 500 --requests 200
+    python benchmarks/api_suite.py --mode test_client --memory --output before.json
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from common import BACKEND_DIR, build_app, percentile
+
+PASSWORD = 'senha-secreta'
+VERIFICATION_CODE = '123456'
+
+def seed(app, users, tasks_per_user, unverified, rounds):
+    """Bulk insert verified users with tasks plus unverified users with a known code."""
+    import bcrypt
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import insert, select
+    from models import db, User, Task, VerificationCode, BRAZIL_TZ
+
+    now = datetime.now(BRAZIL_TZ)
+    # Um único hash para todos: o custo do bcrypt aparece só no login medido
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+    with app.app_context():
+        db.session.execute(insert(User), [{
+            'email': f'user{i}@bench.local', 'name': f'User {i}', 'password_hash': password_hash,
+            'email_verified': True, 'created_at': now, 'task_revision': 1
+        } for i in range(users)])
+        db.session.execute(insert(User), [{
+            'email': f'pending{i}@bench.local', 'name': f'Pending {i}', 'password_hash': password_hash,
+            'email_verified': False, 'created_at': now, 'task_revision': 0
+        } for i in range(unverified)])
+        db.session.execute(insert(VerificationCode), [{
+            'email': f'pending{i}@bench.local', 'code': VERIFICATION_CODE, 'created_at': now,
+            'expires_at': now + timedelta(days=1), 'verified': False
+        } for i in range(unverified)])
+
+        user_ids = db.session.execute(
+            select(User.id).where(User.email_verified == True).order_by(User.id)
+        ).scalars().all()
+        rows = [{
+            'title': f'Tarefa {n}', 'description': 'Descrição de exemplo',
+            'due_date': now + timedelta(hours=n % 72 - 24) if n % 3 else None,
+            'completed': n % 4 == 0, 'created_at': now - timedelta(minutes=n),
+            'is_recurring': n % 10 == 0, 'recurrence_type': 'daily' if n % 10 == 0 else None,
+            'user_id': user_id, 'revision': 1
+        } for user_id in user_ids for n in range(tasks_per_user)]
+        for start in range(0, len(rows), 5000):
+            db.session.execute(insert(Task), rows[start:start + 5000])
+        db.session.commit()
+
+        task_ids = {}
+        for user_id, task_id in db.session.execute(select(Task.user_id, Task.id).order_by(Task.id)):
+            task_ids.setdefault(user_id, []).append(task_id)
+
+        tokens = {user_id: create_access_token(identity=str(user_id)) for user_id in user_ids}
+    return [(user_id, tokens[user_id], task_ids.get(user_id, [])) for user_id in user_ids]
+
+def build_scenarios(users, requests):
+    """
+    One entry per endpoint: name -> function(i) returning (method, path, body, token).
+    Every call uses its own user/task so deletes and verifications never repeat.
+    """
+    def user(i):
+        return users[i % len(users)]
+
+    def task(i, offset):
+        # Cada cenário consome uma faixa distinta das tarefas do usuário
+        _, _, ids = user(i)
+        return ids[(offset + i // len(users)) % len(ids)] if ids else 0
+
+    def bearer(i):
+        return user(i)[1]
+
+    def batch(i):
+        operations = [{'op': 'create', 'data': {'title': f'Lote {i}-{n}'}} for n in range(8)]
+        operations.append({'op': 'update', 'id': task(i, 0), 'data': {'completed': True}})
+        return {'operations': operations}
+
+    per_user = max(1, requests // len(users))
+    return {
+        'auth.register': lambda i: ('POST', '/api/auth/register',
+                                    {'name': 'Novo', 'email': f'new{i}@bench.local', 'password': PASSWORD}, None),
+        'auth.login': lambda i: ('POST', '/api/auth/login',
+                                 {'email': f'user{i % len(users)}@bench.local', 'password': PASSWORD}, None),
+        'auth.get_current_user': lambda i: ('GET', '/api/auth/me', None, bearer(i)),
+        'auth.verify_email': lambda i: ('POST', '/api/auth/verify-email',
+                                        {'email': f'pending{i}@bench.local', 'code': VERIFICATION_CODE}, None),
+        'auth.resend_verification': lambda i: ('POST', '/api/auth/resend-verification',
+                                               {'email': f'pending{requests + i}@bench.local'}, None),
+        'api.get_tasks': lambda i: ('GET', '/api/tasks', None, bearer(i)),
+        'api.get_tasks_page': lambda i: ('GET', '/api/tasks?status=active&sort=due_date&limit=50', None, bearer(i)),
+        'api.get_task_changes': lambda i: ('GET', '/api/tasks/changes?since=0', None, bearer(i)),
+        'api.get_task': lambda i: ('GET', f'/api/tasks/{task(i, 0)}', None, bearer(i)),
+        'api.create_task': lambda i: ('POST', '/api/tasks',
+                                      {'title': f'Nova {i}', 'due_date': '2030-01-01T12:00:00Z'}, bearer(i)),
+        'api.update_task': lambda i: ('PUT', f'/api/tasks/{task(i, per_user)}',
+                                      {'completed': i % 2 == 0, 'title': f'Editada {i}'}, bearer(i)),
+        'api.batch_tasks': lambda i: ('POST', '/api/tasks/batch', batch(i), bearer(i)),
+        'api.delete_task': lambda i: ('DELETE', f'/api/tasks/{task(i, 2 * per_user)}', None, bearer(i)),
+        'api.delete_completed_tasks': lambda i: ('DELETE', '/api/tasks/completed', None, bearer(i)),
+    }
+
+def summarize(latencies, statuses, elapsed):
+    return {
+        'requests': len(latencies),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None
+    }
+
+def run_test_client(app, scenarios, requests):
+    client = app.test_client()
+    results = {}
+    for name, make_request in scenarios.items():
+        latencies, statuses = [], {}
+        started = time.perf_counter()
+        for i in range(requests):
+            method, path, body, token = make_request(i)
+            headers = {'Authorization': f'Bearer {token}'} if token else {}
+            request_started = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers=headers)
+            response.get_data()
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        results[name] = summarize(latencies, statuses, time.perf_counter() - started)
+    # ru_maxrss é o pico do processo inteiro (KB no Linux)
+    return {
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'endpoints': results
+    }
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def http_request(port, method, path, body, token):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    started = time.perf_counter()
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return (time.perf_counter() - started) * 1000, response.status
+
+def process_tree(pid):
+    """pid plus its direct children (gunicorn master and workers)."""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [pid] + [int(child) for child in children.read().split()]
+    except OSError:
+        return [pid]
+
+def peak_rss_mb(pids):
+    """Sum of VmHWM (peak resident set) over the given processes."""
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return round(total_kb / 1024, 1)
+
+def memory_mb(pid):
+    """(rss, pss, uss) of one process from smaps_rollup; PSS splits shared pages among their sharers."""
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return None
+    uss = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return tuple(round(fields.get(name, 0) / 1024, 1) for name in ('Rss', 'Pss')) + (round(uss / 1024, 1),)
+
+def worker_memory(pids):
+    """Mean RSS/PSS/USS of the workers (pids[1:]) and the master's PSS."""
+    workers = [m for m in (memory_mb(pid) for pid in pids[1:]) if m]
+    master = memory_mb(pids[0])
+    if not workers:
+        return None
+
+    def mean(index):
+        return round(sum(m[index] for m in workers) / len(workers), 1)
+
+    return {
+        'workers': len(workers),
+        'rss_per_worker_mb': mean(0),
+        'pss_per_worker_mb': mean(1),
+        'uss_per_worker_mb': mean(2),
+        'master_pss_mb': master[1] if master else None,
+        'total_pss_mb': round(sum(m[1] for m in workers) + (master[1] if master else 0), 1)
+    }
+
+def run_gunicorn(database_uri, scenarios, args, options=None, extra_env=None):
+    """
+    Drive the scenarios against a real gunicorn. options replaces the
+    --workers/--worker-class flags (gunicorn.conf.py in the backend
+    directory is loaded unless options pass another -c).
+    """
+    port = free_port()
+    metrics_dir = tempfile.mkdtemp(prefix='todo-bench-metrics-')
+    env = dict(
+        os.environ, DATABASE_URL=database_uri, AUTO_MIGRATE='false', EMAIL_TRANSPORT='stub',
+        BCRYPT_ROUNDS=str(args.bcrypt_rounds), LOG_LEVEL='WARNING', RATE_LIMIT_BACKEND='none',
+        PROMETHEUS_MULTIPROC_DIR=metrics_dir, GUNICORN_WORKER_CLASS=args.worker_class, **(extra_env or {})
+    )
+    if options is None:
+        options = ['--workers', str(args.workers), '--worker-class', args.worker_class]
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *options, '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'wsgi:app'],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if http_request(port, 'GET', '/health', None, None)[1] == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError('gunicorn did not become ready')
+            time.sleep(0.2)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for name, make_request in scenarios.items():
+                started = time.perf_counter()
+                outcomes = list(executor.map(lambda i: http_request(port, *make_request(i)), range(args.requests)))
+                elapsed = time.perf_counter() - started
+                statuses = {}
+                for _, status in outcomes:
+                    statuses[status] = statuses.get(status, 0) + 1
+                results[name] = summarize([latency for latency, _ in outcomes], statuses, elapsed)
+
+        pids = process_tree(server.pid)
+        return {
+            'workers': len(pids) - 1,
+            'worker_class': args.worker_class,
+            'concurrency': args.concurrency,
+            'peak_rss_mb': peak_rss_mb(pids),
+            'memory': worker_memory(pids),
+            'endpoints': results
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def default_worker_class():
+    return 'gevent' if importlib.util.find_spec('gevent') is not None else 'sync'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=500, help='tasks per user')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--mode', choices=('test_client', 'gunicorn', 'both'), default='both')
+    parser.add_argument('--memory', action='store_true', help='in-memory SQLite (test_client mode only)')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--worker-class', default=default_worker_class())
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads against gunicorn')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.memory and args.mode != 'test_client':
+        parser.error('--memory only works with --mode test_client')
+
+    report = {
+        'commit': current_commit(),
+        'python': sys.version.split()[0],
+        'users': args.users,
+        'tasks_per_user': args.tasks,
+        'requests_per_endpoint': args.requests,
+        'modes': {}
+    }
+    # Cada modo recebe um banco recém-semeado: os cenários de escrita consomem os dados
+    unverified = 2 * args.requests
+    for mode in (('test_client', 'gunicorn') if args.mode == 'both' else (args.mode,)):
+        database_uri = 'sqlite:///:memory:' if args.memory else None
+        app = build_app(database_uri, EMAIL_TRANSPORT='stub', BCRYPT_ROUNDS=args.bcrypt_rounds)
+        seeding_started = time.perf_counter()
+        users = seed(app, args.users, args.tasks, unverified, args.bcrypt_rounds)
+        seed_seconds = round(time.perf_counter() - seeding_started, 2)
+        scenarios = build_scenarios(users, args.requests)
+
+        if mode == 'test_client':
+            result = run_test_client(app, scenarios, args.requests)
+        else:
+            result = run_gunicorn(app.config['SQLALCHEMY_DATABASE_URI'], scenarios, args)
+        result['seed_seconds'] = seed_seconds
+        report['modes'][mode] = result
+
+        from password_hashing import hasher
+        hasher.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output + '\n')
+    print(output)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Task listing latency before and after archiving old completed tasks.
+
+Seeds USERS users, each with ACTIVE pending tasks and HISTORY tasks completed
+more than TASK_ARCHIVE_AFTER_DAYS ago (the lifetime history), then times the
+task endpoints, runs the archival job and times them again. Also reports the
+rows left in task, the job's duration and the cost of reading the archive
+back page by page.
+
+Runs in-process through the Flask test client with the task cache off, so
+every request hits the database.
+
+Example:
+    python benchmarks/archive_working_set.py --history 20000 --active 100
+    python benchmarks/archive_working_set.py --database-url postgresql://localhost/todo_bench
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from common import build_app, create_user, percentile
+
+ENDPOINTS = (
+    ('list_full', '/api/tasks'),
+    ('list_active_page', '/api/tasks?status=active&limit=50'),
+    ('list_page', '/api/tasks?limit=50&sort=due_date'),
+    ('summary', '/api/tasks/summary')
+)
+
+def seed(app, users, active, history):
+    from sqlalchemy import insert
+    from models import db, Task, BRAZIL_TZ
+
+    now = datetime.now(BRAZIL_TZ)
+    completed_at = now - timedelta(days=app.config['TASK_ARCHIVE_AFTER_DAYS'] + 1)
+    headers = []
+    for i in range(users):
+        user_id, user_headers = create_user(app, email=f'archive{i}@example.com')
+        headers.append(user_headers)
+        rows = [{
+            'title': f'Pendente {n}', 'due_date': now + timedelta(hours=n % 72), 'completed': False,
+            'created_at': now - timedelta(minutes=n), 'updated_at': now, 'user_id': user_id, 'revision': 1
+        } for n in range(active)]
+        rows += [{
+            'title': f'Concluída {n}', 'due_date': completed_at, 'completed': True,
+            'created_at': completed_at - timedelta(minutes=n), 'updated_at': completed_at,
+            'user_id': user_id, 'revision': 1
+        } for n in range(history)]
+        with app.app_context():
+            for start in range(0, len(rows), 5000):
+                db.session.execute(insert(Task), rows[start:start + 5000])
+            db.session.commit()
+    return headers
+
+def time_endpoints(client, headers, requests):
+    results = {}
+    for name, path in ENDPOINTS:
+        latencies = []
+        for i in range(requests):
+            started = time.perf_counter()
+            response = client.get(path, headers=headers[i % len(headers)])
+            response.get_data()
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+        results[name] = {'p50_ms': percentile(latencies, 0.5), 'p95_ms': percentile(latencies, 0.95)}
+    return results
+
+def task_rows(app):
+    from sqlalchemy import func, select
+    from models import db, Task, TaskArchive
+
+    with app.app_context():
+        return {
+            'task': db.session.execute(select(func.count()).select_from(Task)).scalar(),
+            'task_archive': db.session.execute(select(func.count()).select_from(TaskArchive)).scalar()
+        }
+
+def read_archive(client, headers, limit):
+    started = time.perf_counter()
+    pages = 0
+    tasks = 0
+    cursor = None
+    while True:
+        path = f'/api/tasks/archive?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(path, headers=headers).get_json()
+        pages += 1
+        tasks += len(body['tasks'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    elapsed = time.perf_counter() - started
+    return {'pages': pages, 'tasks': tasks, 'ms_per_page': round(elapsed * 1000 / pages, 2)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--active', type=int, default=100, help='pending tasks per user')
+    parser.add_argument('--history', type=int, default=5000, help='old completed tasks per user')
+    parser.add_argument('--requests', type=int, default=50, help='requests per endpoint')
+    parser.add_argument('--batch-size', type=int, default=500, help='SWEEPER_BATCH_SIZE')
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    app = build_app(args.database_url, TASK_CACHE_BACKEND='none', SWEEPER_BATCH_SIZE=args.batch_size)
+    headers = seed(app, args.users, args.active, args.history)
+    client = app.test_client()
+
+    report = {'users': args.users, 'active_per_user': args.active, 'history_per_user': args.history}
+    report['before'] = {'rows': task_rows(app), 'endpoints': time_endpoints(client, headers, args.requests)}
+
+    from task_archive import archive_completed_tasks
+    with app.app_context():
+        started = time.perf_counter()
+        archived = archive_completed_tasks()
+        elapsed = time.perf_counter() - started
+    report['archive_job'] = {
+        'archived': archived,
+        'seconds': round(elapsed, 3),
+        'tasks_per_second': round(archived / elapsed, 1) if elapsed else None
+    }
+
+    report['after'] = {'rows': task_rows(app), 'endpoints': time_endpoints(client, headers, args.requests)}
+    report['archive_read'] = read_archive(client, headers[0], 200)
+    print(json.dumps(report, indent=2))
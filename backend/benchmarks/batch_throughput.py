@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compare task mutation throughput: one request per operation versus a single
+POST /api/tasks/batch carrying the same operations.
+
+Runs in-process through the Flask test client against a scratch SQLite file
+(or DATABASE_URL when --database-url is given) and prints JSON.
+"""
+
+import argparse
+import json
+import time
+
+from common import build_app, create_user
+
+def one_by_one(client, headers, count):
+    started = time.perf_counter()
+    ids = []
+    for i in range(count):
+        response = client.post('/api/tasks', json={'title': f'tarefa {i}'}, headers=headers)
+        ids.append(response.get_json()['id'])
+    for task_id in ids:
+        client.put(f'/api/tasks/{task_id}', json={'completed': True}, headers=headers)
+    for task_id in ids:
+        client.delete(f'/api/tasks/{task_id}', headers=headers)
+    return time.perf_counter() - started
+
+def batched(client, headers, count, batch_size):
+    started = time.perf_counter()
+    ids = []
+
+    def send(operations):
+        response = client.post('/api/tasks/batch', json={'operations': operations}, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()['results']
+
+    for start in range(0, count, batch_size):
+        results = send([
+            {'op': 'create', 'data': {'title': f'tarefa {i}'}}
+            for i in range(start, min(count, start + batch_size))
+        ])
+        ids.extend(result['id'] for result in results)
+    for start in range(0, count, batch_size):
+        send([{'op': 'update', 'id': task_id, 'data': {'completed': True}} for task_id in ids[start:start + batch_size]])
+    for start in range(0, count, batch_size):
+        send([{'op': 'delete', 'id': task_id} for task_id in ids[start:start + batch_size]])
+    return time.perf_counter() - started
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000, help='tasks created, updated and deleted per mode')
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+
+    app = build_app(args.database_url)
+    client = app.test_client()
+    _, single_headers = create_user(app, email='single@example.com')
+    _, batch_headers = create_user(app, email='batch@example.com')
+
+    operations = args.tasks * 3
+    single_seconds = one_by_one(client, single_headers, args.tasks)
+    batch_seconds = batched(client, batch_headers, args.tasks, args.batch_size)
+
+    print(json.dumps({
+        'operations': operations,
+        'batch_size': args.batch_size,
+        'one_by_one': {'seconds': round(single_seconds, 3), 'ops_per_second': round(operations / single_seconds, 1)},
+        'batch': {'seconds': round(batch_seconds, 3), 'ops_per_second': round(operations / batch_seconds, 1)},
+        'speedup': round(single_seconds / batch_seconds, 2)
+    }, indent=2))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark of create_app(): each sample is a fresh Python process,
+like a new gunicorn worker on an autoscaled instance.
+
+Scenarios:
+- check_only: schema already migrated, AUTO_MIGRATE off (production boot)
+- auto_migrate_current: AUTO_MIGRATE on against an up-to-date schema
+- first_upgrade: running migrate_db against an empty database (release step)
+
+Reports the median and max wall time of each scenario in milliseconds.
+
+Example:
+    python benchmarks/boot_time.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Roda em um processo novo: mede import + create_app, como o boot de um worker
+BOOT_SCRIPT = """
+import time
+started = time.perf_counter()
+from app import create_app
+create_app()
+print(time.perf_counter() - started)
+"""
+
+UPGRADE_SCRIPT = """
+import time
+started = time.perf_counter()
+from migrate_db import create_migration_app, run_migrations
+app = create_migration_app()
+with app.app_context():
+    run_migrations()
+print(time.perf_counter() - started)
+"""
+
+def run(script, database_uri, auto_migrate):
+    env = dict(os.environ, DATABASE_URL=database_uri, AUTO_MIGRATE='true' if auto_migrate else 'false', LOG_LEVEL='WARNING')
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def scratch_database():
+    directory = tempfile.mkdtemp(prefix='todo-boot-')
+    return 'sqlite:///' + os.path.join(directory, 'boot.db')
+
+def summarize(samples):
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 1),
+        'max_ms': round(max(samples) * 1000, 1)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database-url', help='Existing database to boot against (default: scratch SQLite)')
+    args = parser.parse_args()
+
+    migrated = args.database_url or scratch_database()
+    run(UPGRADE_SCRIPT, migrated, auto_migrate=False)
+
+    first_upgrade = [run(UPGRADE_SCRIPT, scratch_database(), auto_migrate=False) for _ in range(args.runs)]
+    check_only = [run(BOOT_SCRIPT, migrated, auto_migrate=False) for _ in range(args.runs)]
+    auto_migrate = [run(BOOT_SCRIPT, migrated, auto_migrate=True) for _ in range(args.runs)]
+
+    print(json.dumps({
+        'runs': args.runs,
+        'check_only': summarize(check_only),
+        'auto_migrate_current': summarize(auto_migrate),
+        'first_upgrade': summarize(first_upgrade)
+    }, indent=2))
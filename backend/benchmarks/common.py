@@ -0,0 +1,55 @@
+"""
+Shared helpers for the benchmark scripts: build the app against a scratch
+database and create an authenticated user without going through email.
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ensure we can import our modules
+sys.path.append(BACKEND_DIR)
+
+from config import Config
+
+def build_app(database_uri=None, **overrides):
+    """Create the app with a throwaway SQLite file unless a URI is given."""
+    from app import create_app
+
+    if database_uri is None:
+        directory = tempfile.mkdtemp(prefix='todo-bench-')
+        database_uri = 'sqlite:///' + os.path.join(directory, 'bench.db')
+
+    # Logs da aplicação só acima de WARNING: os benchmarks imprimem JSON no stdout.
+    # Sem rate limit: os cenários repetem login/registro de propósito
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': database_uri, 'TESTING': True, 'AUTO_MIGRATE': True,
+        'LOG_LEVEL': 'WARNING', 'RATE_LIMIT_BACKEND': 'none'
+    }
+    settings.update(overrides)
+    BenchConfig = type('BenchConfig', (Config,), settings)
+    return create_app(BenchConfig)
+
+def create_user(app, email='bench@example.com', name='Bench'):
+    """Insert a verified user and return (user_id, auth headers)."""
+    from flask_jwt_extended import create_access_token
+    from models import db, User
+
+    with app.app_context():
+        user = User(email=email, name=name, email_verified=True)
+        # Hash fixo: os benchmarks de tarefas não devem pagar bcrypt
+        user.password_hash = 'benchmark'
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        return user.id, {'Authorization': f'Bearer {token}'}
+
+
+def percentile(values, p):
+    """Nearest-rank percentile (p in 0..1) of a list of numbers, None when empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 2)
\ No newline at end of file
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Memory per worker and throughput with and without gunicorn.conf.py.
+
+Runs the api_suite scenarios against three gunicorn setups, each on a
+freshly seeded SQLite file:
+- baseline: no config file, WORKERS workers (the old Procfile with 1)
+- config: gunicorn.conf.py with WEB_CONCURRENCY=WORKERS (same size, so
+  the difference is preload + post_fork)
+- config_auto: gunicorn.conf.py sizing workers from the CPU count
+
+Memory is read from /proc/<pid>/smaps_rollup after the load: PSS splits
+pages shared copy-on-write with the master among the processes sharing
+them, so it is the number that drops with preload; USS is what each
+worker holds alone.
+
+Example:
+    python benchmarks/gunicorn_config.py --workers 4 --requests 300
+    python benchmarks/gunicorn_config.py --worker-class gthread --output gunicorn.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from common import BACKEND_DIR, build_app
+from api_suite import build_scenarios, current_commit, default_worker_class, run_gunicorn, seed
+
+VARIANTS = ('baseline', 'config', 'config_auto')
+
+def variant_options(variant, args, empty_config):
+    if variant == 'baseline':
+        # gunicorn carrega ./gunicorn.conf.py sozinho; um -c vazio o ignora
+        return ['-c', empty_config, '--workers', str(args.workers), '--worker-class', args.worker_class], {}
+    config = ['-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py')]
+    if variant == 'config':
+        return config, {'WEB_CONCURRENCY': str(args.workers)}
+    return config, {}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=500, help='tasks per user')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=2, help='workers for baseline and config')
+    parser.add_argument('--worker-class', default=default_worker_class())
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--variants', default=','.join(VARIANTS))
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    variants = [variant.strip() for variant in args.variants.split(',') if variant.strip()]
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(sorted(unknown))}")
+
+    empty_config = os.path.join(tempfile.mkdtemp(prefix='todo-bench-'), 'empty.conf.py')
+    open(empty_config, 'w').close()
+
+    report = {
+        'commit': current_commit(),
+        'python': sys.version.split()[0],
+        'cpus': len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+        'worker_class': args.worker_class,
+        'requests_per_endpoint': args.requests,
+        'variants': {}
+    }
+    unverified = 2 * args.requests
+    for variant in variants:
+        app = build_app(EMAIL_TRANSPORT='stub', BCRYPT_ROUNDS=args.bcrypt_rounds)
+        users = seed(app, args.users, args.tasks, unverified, args.bcrypt_rounds)
+        scenarios = build_scenarios(users, args.requests)
+        options, extra_env = variant_options(variant, args, empty_config)
+
+        result = run_gunicorn(app.config['SQLALCHEMY_DATABASE_URI'], scenarios, args, options, extra_env)
+        # Vazão agregada só do tempo sob carga (sem o boot do servidor)
+        endpoints = result['endpoints'].values()
+        busy_seconds = sum(e['requests'] / e['throughput_rps'] for e in endpoints if e['throughput_rps'])
+        result['overall_rps'] = round(sum(e['requests'] for e in endpoints) / busy_seconds, 1)
+        report['variants'][variant] = result
+
+        from password_hashing import hasher
+        hasher.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output + '\n')
+    print(output)
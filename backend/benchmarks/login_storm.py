@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure GET /api/tasks latency while a storm of logins runs concurrently.
+
+For each mode (bcrypt inline on the request thread vs. the dedicated process
+pool) the app is served in-process by a threaded WSGI server; LOGIN threads
+hammer /api/auth/login while one probe thread times /api/tasks. Prints JSON
+with probe latency percentiles and login throughput per mode.
+
+Example:
+    python benchmarks/login_storm.py --logins 8 --duration 10 --rounds 12
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from common import build_app, create_user
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 2)
+
+def request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    payload = json.dumps(body) if body is not None else None
+    connection.request(method, path, body=payload, headers={'Content-Type': 'application/json', **(headers or {})})
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status
+
+def run_mode(pool_workers, args):
+    from models import db, User
+    from password_hashing import hasher
+
+    app = build_app(BCRYPT_ROUNDS=args.rounds, BCRYPT_POOL_WORKERS=pool_workers, BCRYPT_QUEUE_SIZE=args.queue_size)
+    _, headers = create_user(app, email='probe@example.com')
+    with app.app_context():
+        user = User(email='storm@example.com', name='Storm', email_verified=True)
+        user.set_password('senha-secreta')
+        db.session.add(user)
+        db.session.commit()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = time.perf_counter() + args.duration
+    login_statuses = {}
+    probe_latencies = []
+    lock = threading.Lock()
+
+    def storm():
+        while time.perf_counter() < stop:
+            status = request(port, 'POST', '/api/auth/login', {'email': 'storm@example.com', 'password': 'senha-secreta'})
+            with lock:
+                login_statuses[status] = login_statuses.get(status, 0) + 1
+
+    def probe():
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            request(port, 'GET', '/api/tasks', headers=headers)
+            probe_latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(args.probe_interval)
+
+    threads = [threading.Thread(target=storm) for _ in range(args.logins)] + [threading.Thread(target=probe)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    hasher.shutdown()
+
+    return {
+        'bcrypt_pool_workers': pool_workers,
+        'logins_per_second': round(sum(login_statuses.values()) / args.duration, 1),
+        'login_statuses': login_statuses,
+        'tasks_requests': len(probe_latencies),
+        'tasks_ms_p50': percentile(probe_latencies, 0.50),
+        'tasks_ms_p95': percentile(probe_latencies, 0.95),
+        'tasks_ms_p99': percentile(probe_latencies, 0.99),
+        'tasks_ms_max': percentile(probe_latencies, 1.0)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=8, help='concurrent login threads')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    parser.add_argument('--pool-workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=32)
+    parser.add_argument('--probe-interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        'inline': run_mode(0, args),
+        'pool': run_mode(args.pool_workers, args)
+    }, indent=2))
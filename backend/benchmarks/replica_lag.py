@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Read-replica routing against two SQLite files with injected replication lag.
+
+A background thread copies the primary file onto the replica (sqlite3
+backup API) every LAG seconds, so the replica is up to LAG seconds behind.
+Runs in-process through the Flask test client and reports:
+- read_your_writes: POST /api/tasks followed at once by GET /api/tasks/<id>,
+  by a client that echoes X-DB-Written-At (sticky) and one that does not;
+  stale reads are the GETs answered 404 by a replica that has not caught up
+- offload: SQL statements per database while a user who has not written
+  recently reads GET /api/tasks, /tasks/<id> and /tasks/summary
+
+Example:
+    python benchmarks/replica_lag.py --lag 0.5 --writes 100
+    python benchmarks/replica_lag.py --lag 2 --sticky 1 --writes 50
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event
+
+from common import build_app, create_user
+
+WRITTEN_AT_HEADER = 'X-DB-Written-At'
+
+class SnapshotReplicator(threading.Thread):
+    """Ship a full copy of the primary to the replica every `lag` seconds."""
+
+    def __init__(self, primary_path, replica_path, lag):
+        super().__init__(daemon=True)
+        self.primary_path = primary_path
+        self.replica_path = replica_path
+        self.lag = lag
+        self.stop = threading.Event()
+        self.snapshots = 0
+
+    def ship(self):
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(self.replica_path, timeout=30)
+        try:
+            source.backup(target)
+            self.snapshots += 1
+        finally:
+            source.close()
+            target.close()
+
+    def run(self):
+        while not self.stop.wait(self.lag):
+            self.ship()
+
+def read_your_writes(client, headers, writes, echo):
+    stale = 0
+    written_at = None
+    for i in range(writes):
+        request_headers = dict(headers)
+        if echo and written_at:
+            request_headers[WRITTEN_AT_HEADER] = written_at
+        response = client.post('/api/tasks', json={'title': f'escrita {i}'}, headers=request_headers)
+        written_at = response.headers.get(WRITTEN_AT_HEADER)
+        if echo:
+            request_headers[WRITTEN_AT_HEADER] = written_at
+        if client.get(f"/api/tasks/{response.get_json()['id']}", headers=request_headers).status_code != 200:
+            stale += 1
+    return {'writes': writes, 'stale_reads': stale}
+
+def count_statements(engines):
+    counts = {name: 0 for name in engines}
+    for name, engine in engines.items():
+        def before_cursor_execute(*args, name=name):
+            counts[name] += 1
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return counts
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lag', type=float, default=0.5, help='seconds between snapshots shipped to the replica')
+    parser.add_argument('--sticky', type=float, default=5, help='REPLICA_STICKY_SECONDS')
+    parser.add_argument('--writes', type=int, default=100)
+    parser.add_argument('--reads', type=int, default=300)
+    parser.add_argument('--tasks', type=int, default=200, help='tasks of the reading user')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='todo-bench-')
+    primary_path = os.path.join(directory, 'primary.db')
+    replica_path = os.path.join(directory, 'replica.db')
+    app = build_app(
+        'sqlite:///' + primary_path, SQLALCHEMY_REPLICA_URI='sqlite:///' + replica_path,
+        REPLICA_STICKY_SECONDS=args.sticky, TASK_CACHE_BACKEND='none'
+    )
+    _, writer_headers = create_user(app, email='writer@example.com')
+    _, reader_headers = create_user(app, email='reader@example.com')
+    client = app.test_client()
+    task_ids = [
+        client.post('/api/tasks', json={'title': f'tarefa {i}'}, headers=reader_headers).get_json()['id']
+        for i in range(args.tasks)
+    ]
+
+    replicator = SnapshotReplicator(primary_path, replica_path, args.lag)
+    replicator.ship()
+    replicator.start()
+
+    from models import db
+    with app.app_context():
+        counts = count_statements({'primary': db.engines[None], 'replica': db.engines['replica']})
+
+    report = {'lag_s': args.lag, 'sticky_s': args.sticky, 'read_your_writes': {}}
+    for mode, echo in (('sticky', True), ('no_token', False)):
+        report['read_your_writes'][mode] = read_your_writes(client, writer_headers, args.writes, echo)
+
+    counts.update(primary=0, replica=0)
+    started = time.perf_counter()
+    for i in range(args.reads):
+        path = ('/api/tasks', f'/api/tasks/{task_ids[0]}', '/api/tasks/summary')[i % 3]
+        assert client.get(path, headers=reader_headers).status_code == 200
+    report['offload'] = {
+        'requests': args.reads,
+        'seconds': round(time.perf_counter() - started, 3),
+        'statements': dict(counts)
+    }
+    replicator.stop.set()
+    replicator.join()
+    report['snapshots_shipped'] = replicator.snapshots
+    print(json.dumps(report, indent=2))
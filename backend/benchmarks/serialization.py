@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the task list read path: ORM objects + Task.to_dict() +
+jsonify-style encoding versus the Core column select + TaskRow tuples +
+streaming encoder (orjson when installed).
+
+Reports rows per second and peak traced memory for each size.
+
+Example:
+    python benchmarks/serialization.py --sizes 10000 100000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from common import build_app, create_user
+
+def seed(app, user_id, count):
+    from sqlalchemy import insert
+    from models import db, Task, BRAZIL_TZ
+
+    now = datetime.now(BRAZIL_TZ)
+    rows = [{
+        'title': f'Tarefa {i}',
+        'description': 'Descrição de exemplo ' * 5,
+        'due_date': now + timedelta(hours=i % 500) if i % 3 else None,
+        'completed': i % 4 == 0,
+        'created_at': now - timedelta(minutes=i),
+        'is_recurring': i % 10 == 0,
+        'recurrence_type': 'weekly' if i % 10 == 0 else None,
+        'user_id': user_id,
+        'revision': 1
+    } for i in range(count)]
+    with app.app_context():
+        for start in range(0, count, 5000):
+            db.session.execute(insert(Task), rows[start:start + 5000])
+        db.session.commit()
+
+def orm_path(app, user_id):
+    from models import Task
+
+    with app.app_context():
+        tasks = Task.query.filter_by(user_id=user_id).all()
+        body = app.json.dumps([task.to_dict() for task in tasks]).encode('utf-8')
+        return len(tasks), len(body)
+
+def fast_path(app, user_id):
+    from models import Task
+    from task_serialization import task_rows_query, stream_task_rows, iter_json_array
+
+    with app.app_context():
+        statement = task_rows_query().where(Task.user_id == user_id)
+        size = 0
+        for chunk in iter_json_array(stream_task_rows(statement)):
+            size += len(chunk)
+        return size
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    from task_serialization import orjson
+
+    report = {'encoder': 'orjson' if orjson is not None else 'json', 'results': []}
+    for size in args.sizes:
+        app = build_app()
+        user_id, _ = create_user(app)
+        seed(app, user_id, size)
+
+        (count, _), orm_seconds, orm_peak = measure(orm_path, app, user_id)
+        _, fast_seconds, fast_peak = measure(fast_path, app, user_id)
+
+        report['results'].append({
+            'tasks': count,
+            'to_dict': {
+                'rows_per_second': round(count / orm_seconds),
+                'peak_memory_mb': round(orm_peak / 1024 / 1024, 1)
+            },
+            'fast_path': {
+                'rows_per_second': round(count / fast_seconds),
+                'peak_memory_mb': round(fast_peak / 1024 / 1024, 1)
+            },
+            'speedup': round(orm_seconds / fast_seconds, 2)
+        })
+
+    print(json.dumps(report, indent=2))
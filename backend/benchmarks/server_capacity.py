@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Side-by-side concurrent-connection capacity of the server setups.
+
+Starts each server against the same seeded SQLite file:
+- sync: gunicorn sync workers (one request per worker)
+- gthread: gunicorn with THREADS threads per worker
+- gevent: gunicorn gevent workers, as in the Procfile
+- asgi: gunicorn with uvicorn workers serving asgi.py: async views (async
+  engine) for the task list and the SSE stream, the rest through a2wsgi
+  with ASGI_THREADS=THREADS
+
+At every level it holds N SSE streams open (the long-lived, I/O-bound
+requests) and, while they are open, measures GET /api/tasks latency.
+A level passes when every stream connected within --connect-timeout and
+every probe answered; capacity is the highest level that passed.
+Setups whose packages are not installed are reported as skipped.
+
+Example:
+    python benchmarks/server_capacity.py --levels 8,32,128,512 --workers 2
+    python benchmarks/server_capacity.py --servers gevent,asgi --output capacity.json
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from common import BACKEND_DIR, build_app, create_user, percentile
+from api_suite import current_commit, free_port, http_request, peak_rss_mb, process_tree
+
+SERVERS = ('sync', 'gthread', 'gevent', 'asgi')
+REQUIRED_MODULES = {
+    'sync': (), 'gthread': (), 'gevent': ('gevent',),
+    'asgi': ('uvicorn', 'a2wsgi', 'starlette', 'aiosqlite')
+}
+WORKER_CLASSES = {'asgi': 'uvicorn.workers.UvicornWorker'}
+
+def seed(app, tasks):
+    """One verified user with TASKS tasks; returns its bare access token."""
+    from models import db, Task
+
+    user_id, headers = create_user(app)
+    now = datetime.now()
+    with app.app_context():
+        db.session.execute(Task.__table__.insert(), [
+            {
+                'title': f'Tarefa {i}', 'description': 'capacidade', 'user_id': user_id,
+                'completed': False, 'is_recurring': False, 'created_at': now,
+                'due_date': now + timedelta(hours=i - tasks // 2)
+            }
+            for i in range(tasks)
+        ])
+        db.session.commit()
+    return headers['Authorization'].split(' ', 1)[1]
+
+def server_command(server, port, args):
+    command = [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers),
+               '--worker-class', WORKER_CLASSES.get(server, server),
+               '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+    if server == 'gthread':
+        command += ['--threads', str(args.threads)]
+    elif server == 'gevent':
+        command += ['--worker-connections', '1000']
+    return command + ['asgi:app' if server == 'asgi' else 'wsgi:app']
+
+def hold_stream(port, token, connect_timeout, stop, results, index):
+    """Open one SSE stream and read it until stop is set."""
+    result = results[index] = {'connected': False, 'connect_ms': None, 'error': None}
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=connect_timeout)
+    try:
+        connection.request('GET', '/api/notifications/stream', headers={
+            'Accept': 'text/event-stream', 'Authorization': f'Bearer {token}'
+        })
+        response = connection.getresponse()
+        if response.status != 200:
+            raise Exception(f'HTTP {response.status}')
+        result['connected'] = True
+        result['connect_ms'] = (time.perf_counter() - started) * 1000
+        # Heartbeat de 1s no servidor: readline nunca espera mais que isso
+        while not stop.is_set():
+            if not response.fp.readline():
+                raise Exception('stream closed by server')
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    finally:
+        connection.close()
+
+def probe(port, token, timeout):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    started = time.perf_counter()
+    try:
+        connection.request('GET', '/api/tasks?limit=50', headers={'Authorization': f'Bearer {token}'})
+        response = connection.getresponse()
+        response.read()
+        return (time.perf_counter() - started) * 1000, response.status
+    except OSError:
+        return None, 'timeout'
+    finally:
+        connection.close()
+
+def run_level(port, token, streams, args):
+    stop = threading.Event()
+    results = [None] * streams
+    threads = [
+        threading.Thread(target=hold_stream, args=(port, token, args.connect_timeout, stop, results, i), daemon=True)
+        for i in range(streams)
+    ]
+    for thread in threads:
+        thread.start()
+    # Sondas só depois que todos conectaram (ou o timeout de conexão passou)
+    deadline = time.monotonic() + args.connect_timeout
+    while time.monotonic() < deadline:
+        if all(r is not None and (r['connected'] or r['error']) for r in results):
+            break
+        time.sleep(0.1)
+
+    with ThreadPoolExecutor(max_workers=args.probe_concurrency) as executor:
+        outcomes = list(executor.map(lambda _: probe(port, token, args.connect_timeout), range(args.probes)))
+
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=args.connect_timeout + 5)
+
+    connected = sum(1 for r in results if r['connected'])
+    # Conectados que o servidor não derrubou enquanto as sondas rodavam
+    held = sum(1 for r in results if r['connected'] and not r['error'])
+    latencies = [latency for latency, status in outcomes if status == 200]
+    failed = sum(1 for _, status in outcomes if status != 200)
+    return {
+        'streams': streams,
+        'streams_connected': connected,
+        'streams_held': held,
+        'probe_p50_ms': percentile(latencies, 0.50),
+        'probe_p95_ms': percentile(latencies, 0.95),
+        'probe_failures': failed,
+        'passed': held == streams and failed == 0
+    }
+
+def run_server(server, database_uri, token, args):
+    missing = [module for module in REQUIRED_MODULES[server] if importlib.util.find_spec(module) is None]
+    if missing:
+        return {'skipped': f"not installed: {', '.join(missing)}"}
+
+    port = free_port()
+    env = dict(
+        os.environ, DATABASE_URL=database_uri, AUTO_MIGRATE='false', EMAIL_TRANSPORT='stub',
+        LOG_LEVEL='WARNING', RATE_LIMIT_BACKEND='none', NOTIFICATION_HEARTBEAT_SECONDS='1',
+        ASGI_THREADS=str(args.threads), GUNICORN_WORKER_CLASS=WORKER_CLASSES.get(server, server),
+        PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix='todo-bench-metrics-')
+    )
+    server_process = subprocess.Popen(server_command(server, port, args), cwd=BACKEND_DIR, env=env)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if http_request(port, 'GET', '/health', None, None)[1] == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline or server_process.poll() is not None:
+                raise RuntimeError(f'{server} did not become ready')
+            time.sleep(0.2)
+
+        levels = []
+        for streams in args.levels:
+            level = run_level(port, token, streams, args)
+            levels.append(level)
+            if not level['passed']:
+                # Níveis maiores só falhariam mais devagar
+                break
+        passed = [level['streams'] for level in levels if level['passed']]
+        return {
+            'capacity_streams': max(passed) if passed else 0,
+            'peak_rss_mb': peak_rss_mb(process_tree(server_process.pid)),
+            'levels': levels
+        }
+    finally:
+        server_process.send_signal(signal.SIGTERM)
+        server_process.wait(timeout=30)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', default=','.join(SERVERS), help=f"comma-separated subset of {','.join(SERVERS)}")
+    parser.add_argument('--levels', default='8,32,128,512', help='concurrent SSE streams per step')
+    parser.add_argument('--workers', type=int, default=2, help='server processes')
+    parser.add_argument('--threads', type=int, default=32, help='threads per process (gthread, asgi)')
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--probes', type=int, default=50, help='GET /api/tasks requests per level')
+    parser.add_argument('--probe-concurrency', type=int, default=4)
+    parser.add_argument('--connect-timeout', type=float, default=5)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    servers = [server.strip() for server in args.servers.split(',') if server.strip()]
+    unknown = set(servers) - set(SERVERS)
+    if unknown:
+        parser.error(f"unknown servers: {', '.join(sorted(unknown))}")
+    args.levels = sorted(int(level) for level in args.levels.split(','))
+
+    app = build_app(EMAIL_TRANSPORT='stub')
+    token = seed(app, args.tasks)
+
+    report = {
+        'commit': current_commit(),
+        'python': sys.version.split()[0],
+        'workers': args.workers,
+        'threads': args.threads,
+        'servers': {}
+    }
+    for server in servers:
+        report['servers'][server] = run_server(server, app.config['SQLALCHEMY_DATABASE_URI'], token, args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output + '\n')
+    print(output)
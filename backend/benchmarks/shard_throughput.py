@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Write throughput of POST /api/tasks with the tasks spread over 1, 2 and 4 shards.
+
+Each shard is its own SQLite file (TASK_SHARDS='default,s1=sqlite:///...'),
+so writers on different shards do not queue on the same database lock.
+WRITERS threads, one user each, post tasks through the Flask test client for
+SECONDS; users are created until every shard has its share of writers.
+
+Each POST is bound by the commit's fsync. With every file on the same disk
+the fsyncs may still queue in the filesystem journal; --dirs spreads the
+shard files over several directories (one per disk), the way separate
+database servers would.
+
+Example:
+    python benchmarks/shard_throughput.py --writers 8 --seconds 5
+    python benchmarks/shard_throughput.py --shards 1,4 --writers 16
+    python benchmarks/shard_throughput.py --dirs /mnt/a,/mnt/b,/mnt/c,/mnt/d
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from common import build_app, create_user, percentile
+
+def shard_setting(directories, count):
+    """TASK_SHARDS for count shards; shard i lives in directories[i % len(directories)]."""
+    names = ['default'] + [f's{i}' for i in range(1, count)]
+    return ','.join(
+        name if name == 'default'
+        else f"{name}=sqlite:///{os.path.join(directories[i % len(directories)], name + '.db')}"
+        for i, name in enumerate(names)
+    )
+
+def balanced_users(app, count, writers):
+    """Create users until each shard owns writers / count of them."""
+    from shard_router import shard_router
+
+    per_shard = -(-writers // count)
+    owned = {}
+    users = []
+    index = 0
+    while len(users) < writers:
+        user_id, headers = create_user(app, email=f'writer{index}@example.com')
+        index += 1
+        shard = shard_router.ring.node_for(user_id)
+        if owned.get(shard, 0) < per_shard:
+            owned[shard] = owned.get(shard, 0) + 1
+            users.append(headers)
+    return users, owned
+
+def run(count, args):
+    directories = [tempfile.mkdtemp(prefix='todo-bench-', dir=base) for base in args.dirs]
+    app = build_app(
+        'sqlite:///' + os.path.join(directories[0], 'primary.db'),
+        TASK_SHARDS=shard_setting(directories, count), TASK_CACHE_BACKEND='none'
+    )
+    users, owned = balanced_users(app, count, args.writers)
+    deadline = time.perf_counter() + args.seconds
+    latencies = []
+    errors = []
+
+    def writer(headers):
+        client = app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = client.post('/api/tasks', json={'title': f'tarefa {i}'}, headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 201:
+                errors.append(response.status_code)
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(headers,)) for headers in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'writers_per_shard': owned,
+        'writes': len(latencies),
+        'errors': len(errors),
+        'writes_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shards', default='1,2,4', help='shard counts to compare')
+    parser.add_argument('--writers', type=int, default=8, help='writer threads (one user each)')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--dirs', default='', help='comma-separated directories for the shard files')
+    args = parser.parse_args()
+    args.dirs = [value for value in args.dirs.split(',') if value] or [None]
+
+    report = {'writers': args.writers, 'seconds': args.seconds, 'dirs': args.dirs, 'shards': {}}
+    for count in [int(value) for value in args.shards.split(',')]:
+        report['shards'][count] = run(count, args)
+    baseline = report['shards'].get(1)
+    if baseline:
+        for result in report['shards'].values():
+            result['speedup'] = round(result['writes_per_second'] / baseline['writes_per_second'], 2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Load test for the notification SSE stream.
+
+Opens N concurrent connections to /api/notifications/stream on a running
+server, holds them for a fixed duration and reports how many stayed open,
+the connect latency and the events/heartbeats received.
+
+Example:
+    gunicorn --worker-class gevent --worker-connections 2000 wsgi:app
+    python benchmarks/sse_load.py --url http://localhost:8000 --token <jwt> --streams 1000
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+
+def hold_stream(url, token, duration, results, index):
+    parsed = urlparse(url)
+    connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+    result = {'connected': False, 'connect_ms': None, 'events': 0, 'heartbeats': 0, 'error': None}
+    started = time.perf_counter()
+    try:
+        connection = connection_class(parsed.netloc, timeout=duration + 30)
+        connection.request('GET', '/api/notifications/stream', headers={
+            'Accept': 'text/event-stream', 'Authorization': f'Bearer {token}'
+        })
+        response = connection.getresponse()
+        if response.status != 200:
+            raise Exception(f"HTTP {response.status}")
+        result['connected'] = True
+        result['connect_ms'] = (time.perf_counter() - started) * 1000
+
+        deadline = started + duration
+        while time.perf_counter() < deadline:
+            line = response.fp.readline()
+            if not line:
+                raise Exception('stream closed by server')
+            if line.startswith(b'event:'):
+                result['events'] += 1
+            elif line.startswith(b':'):
+                result['heartbeats'] += 1
+        connection.close()
+    except Exception as e:
+        result['error'] = str(e)
+    results[index] = result
+
+def run(url, token, streams, duration, ramp):
+    results = [None] * streams
+    threads = []
+    for i in range(streams):
+        thread = threading.Thread(target=hold_stream, args=(url, token, duration, results, i))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+        if ramp:
+            time.sleep(ramp / streams)
+    for thread in threads:
+        thread.join()
+
+    connected = [r for r in results if r and r['connected']]
+    held = [r for r in connected if not r['error']]
+    connect_times = sorted(r['connect_ms'] for r in connected)
+    errors = {}
+    for r in results:
+        if r and r['error']:
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+
+    def percentile(values, p):
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(len(values) * p))]
+
+    return {
+        'streams': streams,
+        'duration_s': duration,
+        'connected': len(connected),
+        'held_full_duration': len(held),
+        'connect_ms_p50': percentile(connect_times, 0.50),
+        'connect_ms_p95': percentile(connect_times, 0.95),
+        'connect_ms_mean': statistics.mean(connect_times) if connect_times else None,
+        'events': sum(r['events'] for r in connected),
+        'heartbeats': sum(r['heartbeats'] for r in connected),
+        'errors': errors
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--token', required=True, help='JWT access token used by every stream')
+    parser.add_argument('--streams', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=60, help='seconds to hold each stream')
+    parser.add_argument('--ramp', type=float, default=5, help='seconds to spread connection opening over')
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.url, args.token, args.streams, args.duration, args.ramp), indent=2))
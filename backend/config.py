@@ -20,10 +20,133 @@ class Config:
         SQLALCHEMY_DATABASE_URI = 'sqlite:///database.db'
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Pool de conexões por worker (SQLALCHEMY_ENGINE_OPTIONS é montado em create_app).
+    # Com PgBouncer em transaction pooling, DB_PGBOUNCER=true desliga prepared statements
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'false').lower() == 'true'
+    
+    # Réplica de leitura opcional: os GETs de listagem/consulta leem dela. Depois de
+    # uma escrita o cliente devolve X-DB-Written-At e lê do primário por
+    # REPLICA_STICKY_SECONDS, que precisa cobrir o atraso de replicação
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    if SQLALCHEMY_REPLICA_URI and SQLALCHEMY_REPLICA_URI.startswith(('postgres://', 'postgresql://')):
+        SQLALCHEMY_REPLICA_URI = 'postgresql+psycopg://' + SQLALCHEMY_REPLICA_URI.split('://', 1)[1]
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    
+    # Shards das tarefas por usuário: 'default,s1=postgresql://...,s2=...' ('default'
+    # é o banco principal). Vazio: tudo no banco principal. O diretório de exceções
+    # ao anel fica em cache por SHARD_DIRECTORY_CACHE_SECONDS em cada worker
+    TASK_SHARDS = os.environ.get('TASK_SHARDS', '')
+    SHARD_DIRECTORY_CACHE_SECONDS = float(os.environ.get('SHARD_DIRECTORY_CACHE_SECONDS', 5))
+    
+    # /health responde 503 quando o pool passa desta ocupação (0 a 1)
+    HEALTH_POOL_SATURATION_THRESHOLD = float(os.environ.get('HEALTH_POOL_SATURATION_THRESHOLD', 0.9))
+    
+    # Cache do payload de GET /api/tasks por usuário e revisão: 'local' (LRU por
+    # worker), 'redis' (compartilhado, requer o pacote redis) ou 'none'
+    TASK_CACHE_BACKEND = os.environ.get('TASK_CACHE_BACKEND', 'local')
+    TASK_CACHE_MAX_BYTES = int(os.environ.get('TASK_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    TASK_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('TASK_CACHE_MAX_ENTRY_BYTES', 4 * 1024 * 1024))
+    TASK_CACHE_REDIS_URL = os.environ.get('TASK_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    TASK_CACHE_TTL_SECONDS = int(os.environ.get('TASK_CACHE_TTL_SECONDS', 300))
+    # Contadores de GET /api/tasks/summary (LRU local, desligado junto com TASK_CACHE_BACKEND=none)
+    TASK_SUMMARY_CACHE_MAX_BYTES = int(os.environ.get('TASK_SUMMARY_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+    
+    # Observabilidade: /metrics (Prometheus) e logs estruturados.
+    # LOG_LEVEL=OFF desliga os logs; LOG_SAMPLE_RATE amostra registros abaixo de WARNING.
+    # Com vários workers do gunicorn, defina PROMETHEUS_MULTIPROC_DIR (ver Procfile)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    # Intervalo mínimo entre leituras do tamanho das tabelas (gauges todo_table_*) no /metrics
+    TABLE_METRICS_INTERVAL_SECONDS = int(os.environ.get('TABLE_METRICS_INTERVAL_SECONDS', 60))
+    
+    # Migrações: em produção rodam uma vez por deploy (python migrate_db.py);
+    # no SQLite local são aplicadas no boot para o ambiente de dev continuar simples
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'false' if os.environ.get('DATABASE_URL') else 'true').lower() == 'true'
     CORS_HEADERS = 'Content-Type'
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hora
+    # Refresh tokens rotativos: renovam o access token sem repetir o bcrypt do login
+    JWT_REFRESH_TOKEN_EXPIRES = int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', 30 * 24 * 3600))
+    # Reuso de um refresh token dentro desta janela é tratado como corrida entre abas, não como roubo
+    REFRESH_REUSE_GRACE_SECONDS = int(os.environ.get('REFRESH_REUSE_GRACE_SECONDS', 10))
     
     # Resend configuration
     RESEND_API_KEY = os.environ.get('RESEND_API_KEY') or 're_BzMVGWSs_5qETD2mVPmWuMmstaYLQ5TPj'
-    FROM_EMAIL = os.environ.get('FROM_EMAIL') or 'noreply@todo.fresan.tech'
\ No newline at end of file
+    FROM_EMAIL = os.environ.get('FROM_EMAIL') or 'noreply@todo.fresan.tech'
+    
+    # Email outbox: transporte ('resend' ou 'stub'), lotes, retentativas e dead-letter
+    EMAIL_TRANSPORT = os.environ.get('EMAIL_TRANSPORT', 'resend')
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+    EMAIL_OUTBOX_POLL_SECONDS = int(os.environ.get('EMAIL_OUTBOX_POLL_SECONDS', 5))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 15))
+    EMAIL_RETRY_MAX_SECONDS = int(os.environ.get('EMAIL_RETRY_MAX_SECONDS', 300))
+    EMAIL_OUTBOX_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_DAYS', 7))
+    
+    # Notificações em tempo real (SSE)
+    NOTIFICATION_INTERVAL_SECONDS = int(os.environ.get('NOTIFICATION_INTERVAL_SECONDS', 30))
+    NOTIFICATION_HEARTBEAT_SECONDS = int(os.environ.get('NOTIFICATION_HEARTBEAT_SECONDS', 15))
+    # Atraso da entrega nos processos web em relação ao claim do sweeper (transações
+    # ainda abertas e diferença de relógio entre máquinas)
+    NOTIFICATION_DELIVERY_LAG_SECONDS = int(os.environ.get('NOTIFICATION_DELIVERY_LAG_SECONDS', 5))
+    # Validade do ticket que abre o stream (POST /api/notifications/ticket)
+    NOTIFICATION_TICKET_SECONDS = int(os.environ.get('NOTIFICATION_TICKET_SECONDS', 60))
+    
+    # Limite de operações por requisição em POST /api/tasks/batch
+    TASK_BATCH_MAX_OPERATIONS = int(os.environ.get('TASK_BATCH_MAX_OPERATIONS', 500))
+    
+    # Maior janela (from/to) aceita por GET /api/tasks/calendar
+    CALENDAR_MAX_RANGE_DAYS = int(os.environ.get('CALENDAR_MAX_RANGE_DAYS', 366))
+    
+    # Rate limit das rotas de auth ('requisições/segundos' por token bucket; vazio desliga).
+    # Backend 'sqlite' compartilha os baldes entre os workers da máquina por um arquivo local
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sqlite')
+    RATE_LIMIT_STORE_PATH = os.environ.get('RATE_LIMIT_STORE_PATH')
+    RATE_LIMIT_LOGIN_IP = os.environ.get('RATE_LIMIT_LOGIN_IP', '20/60')
+    RATE_LIMIT_LOGIN_EMAIL = os.environ.get('RATE_LIMIT_LOGIN_EMAIL', '5/60')
+    RATE_LIMIT_REGISTER_IP = os.environ.get('RATE_LIMIT_REGISTER_IP', '5/300')
+    RATE_LIMIT_REGISTER_EMAIL = os.environ.get('RATE_LIMIT_REGISTER_EMAIL', '3/600')
+    RATE_LIMIT_RESEND_VERIFICATION_IP = os.environ.get('RATE_LIMIT_RESEND_VERIFICATION_IP', '5/300')
+    RATE_LIMIT_RESEND_VERIFICATION_EMAIL = os.environ.get('RATE_LIMIT_RESEND_VERIFICATION_EMAIL', '3/600')
+    RATE_LIMIT_VERIFY_EMAIL_IP = os.environ.get('RATE_LIMIT_VERIFY_EMAIL_IP', '20/60')
+    RATE_LIMIT_VERIFY_EMAIL_EMAIL = os.environ.get('RATE_LIMIT_VERIFY_EMAIL_EMAIL', '10/600')
+    # Teto de hashes bcrypt por segundo na máquina (login + registro): acima dele responde 503
+    RATE_LIMIT_BCRYPT = os.environ.get('RATE_LIMIT_BCRYPT', '10/1')
+    # Proxies confiáveis na frente da app (Render: 1); 0 usa o IP da conexão
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1 if os.environ.get('DATABASE_URL') else 0))
+    
+    # bcrypt: custo do hash e pool de processos dedicado com fila limitada
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    BCRYPT_POOL_WORKERS = int(os.environ.get('BCRYPT_POOL_WORKERS', 2))
+    BCRYPT_QUEUE_SIZE = int(os.environ.get('BCRYPT_QUEUE_SIZE', 32))
+    BCRYPT_TIMEOUT_SECONDS = int(os.environ.get('BCRYPT_TIMEOUT_SECONDS', 10))
+    
+    # Sweeper: remoção periódica de contas não verificadas. O padrão cobre a validade
+    # do código (10 minutos); contas com código ainda válido nunca são removidas
+    UNVERIFIED_USER_TTL_SECONDS = int(os.environ.get('UNVERIFIED_USER_TTL_SECONDS', 600))
+    SWEEPER_UNVERIFIED_INTERVAL_SECONDS = int(os.environ.get('SWEEPER_UNVERIFIED_INTERVAL_SECONDS', 30))
+    SWEEPER_BATCH_SIZE = int(os.environ.get('SWEEPER_BATCH_SIZE', 500))
+    SWEEPER_REFRESH_TOKEN_INTERVAL_SECONDS = int(os.environ.get('SWEEPER_REFRESH_TOKEN_INTERVAL_SECONDS', 3600))
+    SWEEPER_VERIFICATION_CODE_INTERVAL_SECONDS = int(os.environ.get('SWEEPER_VERIFICATION_CODE_INTERVAL_SECONDS', 300))
+    
+    # Arquivamento: tarefas concluídas há mais de TASK_ARCHIVE_AFTER_DAYS saem de task
+    # para task_archive em lotes de SWEEPER_BATCH_SIZE (0 desliga o job)
+    TASK_ARCHIVE_AFTER_DAYS = int(os.environ.get('TASK_ARCHIVE_AFTER_DAYS', 30))
+    SWEEPER_ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('SWEEPER_ARCHIVE_INTERVAL_SECONDS', 3600))
+    
+    # Tombstones da sincronização incremental (GET /api/tasks/changes): removidos após
+    # TASK_TOMBSTONE_RETENTION_DAYS; cursores mais antigos que isso recebem reset
+    TASK_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TASK_TOMBSTONE_RETENTION_DAYS', 30))
+    SWEEPER_TOMBSTONE_INTERVAL_SECONDS = int(os.environ.get('SWEEPER_TOMBSTONE_INTERVAL_SECONDS', 3600))
+    
+    # Séries recorrentes: o sweeper grava as ocorrências que venceram e a próxima de cada
+    # série. O intervalo precisa ser menor que o passo mais curto (um dia)
+    SWEEPER_SERIES_INTERVAL_SECONDS = int(os.environ.get('SWEEPER_SERIES_INTERVAL_SECONDS', 300))
@@ -0,0 +1,134 @@
+import threading
+import time
+from sqlalchemy import exc, make_url
+from sqlalchemy.pool import QueuePool
+
+class PoolMetrics:
+    """
+    Contadores do pool de conexões deste processo: quantos checkouts, quanto
+    tempo as requisições esperaram por uma conexão e quantas desistiram
+    (timeout). Cada worker do gunicorn tem os seus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_ms_avg': round(self.wait_seconds_total / waits * 1000, 3) if waits else 0.0,
+                'wait_ms_max': round(self.wait_seconds_max * 1000, 3)
+            }
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+# Drivers das views async do asgi.py: o psycopg 3 tem modo assíncrono nativo
+# (mesmo pacote e mesmas opções do engine síncrono); o SQLite local usa aiosqlite
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+psycopg'}
+
+def pool_settings(config):
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)
+    }
+
+def is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def engine_options(config, database_uri=None):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings, for the primary
+    database or for database_uri (the read replica).
+
+    Em modo PgBouncer (pool_mode = transaction) cada transação pode cair em
+    uma conexão diferente do servidor, então prepared statements do psycopg
+    precisam ficar desligados.
+    """
+    database_uri = database_uri or config['SQLALCHEMY_DATABASE_URI']
+    url = make_url(database_uri)
+    if is_memory_sqlite(url):
+        # SQLite em memória usa StaticPool (configurado pelo Flask-SQLAlchemy)
+        return {}
+
+    options = {'poolclass': InstrumentedQueuePool, **pool_settings(config)}
+    # Só o psycopg 3 tem prepare_threshold; postgresql+psycopg2 não aceita o argumento
+    if config.get('DB_PGBOUNCER') and url.drivername == 'postgresql+psycopg':
+        options['connect_args'] = {'prepare_threshold': None}
+    return options
+
+def async_database_url(database_uri):
+    """The same database behind an async driver (ASYNC_DRIVERS)."""
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'Sem driver assíncrono para {url.drivername}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def async_engine_options(config, database_uri):
+    """
+    create_async_engine options from the same DB_* settings. The async engine
+    keeps its own pool (AsyncAdaptedQueuePool), so DB_POOL_SIZE and
+    DB_MAX_OVERFLOW count once for it and once for the sync engine.
+    """
+    url = async_database_url(database_uri)
+    if is_memory_sqlite(url):
+        return {}
+    options = pool_settings(config)
+    if config.get('DB_PGBOUNCER') and url.drivername == 'postgresql+psycopg':
+        options['connect_args'] = {'prepare_threshold': None}
+    return options
+
+def pool_status(engine):
+    """Occupancy of the engine's pool plus the checkout wait metrics."""
+    pool = engine.pool
+    status = pool_metrics.snapshot()
+    if not isinstance(pool, QueuePool):
+        return status
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    status.update({
+        'size': pool.size(),
+        'max_overflow': pool._max_overflow,
+        'checked_out': checked_out,
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'saturation': round(checked_out / capacity, 3) if capacity else 0.0
+    })
+    return status
@@ -0,0 +1,103 @@
+import time
+from functools import wraps
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from db_pool import engine_options
+from metrics import DB_READ_ROUTES
+from shard_router import ShardMoving, shard_router
+
+REPLICA_BIND = 'replica'
+WRITTEN_AT_HEADER = 'X-DB-Written-At'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def reading_from_replica():
+    """Whether the current request's reads go to the replica."""
+    return has_request_context() and g.get('db_route') == REPLICA_BIND
+
+class RoutingSession(Session):
+    """
+    Sessão do Flask-SQLAlchemy que escolhe o banco de cada statement:
+
+    - tabelas de tarefas vão para o shard do usuário quando TASK_SHARDS está
+      configurado (escrita durante uma migração do usuário levanta ShardMoving);
+    - leituras vão para a réplica quando a requisição foi marcada com
+      replica_reads. Flush (escrita) sempre vai para o primário, assim como
+      tudo fora de uma requisição (sweeper, outbox, migrações).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and shard_router.enabled and shard_router.is_sharded(mapper, clause):
+            shard, moving, user_id = shard_router.current_route(self._db)
+            if moving and (self._flushing or getattr(clause, 'is_dml', False)):
+                raise ShardMoving(user_id, shard_router.cache_seconds)
+            return shard_router.engine(self._db, shard)
+        if bind is None and not self._flushing and reading_from_replica():
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class ReadRouting:
+    """
+    Réplica de leitura com read-your-writes.
+
+    Toda escrita bem-sucedida responde com X-DB-Written-At (epoch em ms); o
+    cliente devolve o maior valor que viu e, enquanto ele tiver menos de
+    REPLICA_STICKY_SECONDS, as leituras daquele cliente continuam no primário.
+    O token é do cliente, não do worker: funciona com vários workers e
+    máquinas sem estado compartilhado.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sticky_seconds = 0
+
+    def init_app(self, app):
+        """Register the replica bind; must run before db.init_app."""
+        replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+        self.enabled = bool(replica_uri)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        if self.enabled:
+            binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+            binds[REPLICA_BIND] = {'url': replica_uri, **engine_options(app.config, replica_uri)}
+        app.after_request(self.stamp_write)
+
+    def stamp_write(self, response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            response.headers[WRITTEN_AT_HEADER] = str(int(time.time() * 1000))
+        return response
+
+    def recent_write(self, value, now=None):
+        """Whether the X-DB-Written-At value a client sent is still inside the sticky window."""
+        if not value:
+            return False
+        try:
+            written_at = int(value) / 1000
+        except ValueError:
+            return False
+        now = now if now is not None else time.time()
+        # Um valor no futuro não prende o cliente no primário para sempre
+        return now - self.sticky_seconds < written_at <= now + self.sticky_seconds
+
+    def choose_route(self, written_at=None):
+        """
+        (target, reason) for a read-only request whose client sent written_at
+        (X-DB-Written-At); by default it is read from the current Flask request.
+        """
+        if not self.enabled:
+            return 'primary', 'no_replica'
+        if written_at is None and has_request_context():
+            written_at = request.headers.get(WRITTEN_AT_HEADER)
+        if self.recent_write(written_at):
+            return 'primary', 'recent_write'
+        return REPLICA_BIND, 'replica'
+
+    def replica_reads(self, view):
+        """Decorator for read-only views: their queries may go to the replica."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            target, reason = self.choose_route()
+            g.db_route = target
+            DB_READ_ROUTES.labels(target, reason).inc()
+            return view(*args, **kwargs)
+        return wrapper
+
+read_routing = ReadRouting()
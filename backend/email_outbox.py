@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Email outbox: requests enqueue messages in their own transaction and this
+worker delivers them in batches, with exponential backoff and dead-lettering.
+
+Run as a separate process:
+    python email_outbox.py
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete
+from models import db, EmailOutbox, BRAZIL_TZ
+from structured_logging import get_logger
+from email_service import build_verification_email, get_transport
+
+logger = get_logger(__name__)
+
+# Monta os parâmetros do email a partir do tipo e do payload gravado
+RENDERERS = {
+    'verification': lambda to_email, payload, from_email: build_verification_email(
+        to_email, payload['code'], from_email
+    )
+}
+
+def enqueue_verification_email(email, verification_code):
+    """Add the verification email to the outbox; the caller commits"""
+    db.session.add(EmailOutbox(
+        kind='verification',
+        to_email=email,
+        payload=json.dumps({'code': verification_code})
+    ))
+
+def discard_pending(email):
+    """Drop messages not yet sent to this address (e.g. superseded codes)"""
+    db.session.execute(
+        delete(EmailOutbox)
+        .where(EmailOutbox.to_email == email, EmailOutbox.status == 'pending')
+        .execution_options(synchronize_session=False)
+    )
+
+def retry_delay(attempts, config):
+    """Exponential backoff: base, 2x base, 4x base... capped at the maximum"""
+    base = config.get('EMAIL_RETRY_BASE_SECONDS', 15)
+    maximum = config.get('EMAIL_RETRY_MAX_SECONDS', 300)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), maximum))
+
+def deliver_batch(transport, now=None):
+    """
+    Deliver one batch of due messages. Rows stay locked (SKIP LOCKED on
+    PostgreSQL) until the batch commits, so several workers can run safely.
+
+    Returns a dict with the sent/retry/dead counts.
+    """
+    config = current_app.config
+    now = now or datetime.now(BRAZIL_TZ)
+    batch_size = config.get('EMAIL_OUTBOX_BATCH_SIZE', 50)
+    max_attempts = config.get('EMAIL_MAX_ATTEMPTS', 5)
+    from_email = config.get('FROM_EMAIL', 'noreply@yourdomain.com')
+
+    messages = db.session.execute(
+        select(EmailOutbox)
+        .where(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    counts = {'sent': 0, 'retry': 0, 'dead': 0}
+    for message in messages:
+        message.attempts += 1
+        try:
+            params = RENDERERS[message.kind](message.to_email, json.loads(message.payload), from_email)
+            transport.send(params)
+            message.status = 'sent'
+            message.sent_at = now
+            message.last_error = None
+            counts['sent'] += 1
+        except Exception as e:
+            message.last_error = str(e)[:1000]
+            if message.attempts >= max_attempts:
+                logger.error('Email movido para dead-letter', extra={'outbox_id': message.id, 'error': str(e)})
+                message.status = 'dead'
+                counts['dead'] += 1
+            else:
+                message.next_attempt_at = now + retry_delay(message.attempts, config)
+                counts['retry'] += 1
+
+    db.session.commit()
+    return counts
+
+def purge_sent(now=None):
+    """Remove delivered messages older than EMAIL_OUTBOX_RETENTION_DAYS"""
+    config = current_app.config
+    now = now or datetime.now(BRAZIL_TZ)
+    cutoff = now - timedelta(days=config.get('EMAIL_OUTBOX_RETENTION_DAYS', 7))
+    result = db.session.execute(
+        delete(EmailOutbox)
+        .where(EmailOutbox.status == 'sent', EmailOutbox.sent_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def run_worker(app, transport=None):
+    """Drain the outbox forever, sleeping between empty polls"""
+    with app.app_context():
+        transport = transport or get_transport(app.config)
+        interval = app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 5)
+        batch_size = app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 50)
+        logger.info('Email outbox worker iniciado', extra={'transport': type(transport).__name__})
+
+        while True:
+            try:
+                counts = deliver_batch(transport)
+                if any(counts.values()):
+                    logger.info('Outbox', extra=counts)
+                # Lote cheio: provavelmente há mais mensagens, continua sem dormir
+                if sum(counts.values()) >= batch_size:
+                    continue
+                purge_sent()
+            except Exception:
+                logger.exception('Erro no worker de emails')
+                db.session.rollback()
+            finally:
+                db.session.remove()
+            time.sleep(interval)
+
+if __name__ == '__main__':
+    from app import create_app
+
+    run_worker(create_app())
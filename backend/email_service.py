@@ -1,6 +1,92 @@
 import resend
 from flask import current_app
 import os
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+def build_verification_email(to_email, verification_code, from_email):
+    """Build the Resend params for the verification code email"""
+    # Email content
+    subject = "Código de Verificação - Todo App"
+    html_content = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+        <div style="background-color: #f8f9fa; padding: 30px; border-radius: 10px; text-align: center;">
+            <h1 style="color: #333; margin-bottom: 20px;">Todo App</h1>
+            <h2 style="color: #007bff; margin-bottom: 30px;">Código de Verificação</h2>
+            
+            <p style="font-size: 16px; color: #666; margin-bottom: 30px;">
+                Use o código abaixo para verificar sua conta:
+            </p>
+            
+            <div style="background-color: #007bff; color: white; font-size: 32px; font-weight: bold; padding: 20px; border-radius: 8px; letter-spacing: 4px; margin: 30px 0;">
+                {verification_code}
+            </div>
+            
+            <p style="font-size: 14px; color: #999; margin-top: 30px;">
+                Este código expira em 10 minutos.<br>
+                Se você não solicitou este código, ignore este email.
+            </p>
+        </div>
+    </body>
+    </html>
+    """
+    
+    text_content = f"""
+    Todo App - Código de Verificação
+    
+    Use o código abaixo para verificar sua conta:
+    
+    {verification_code}
+    
+    Este código expira em 10 minutos.
+    Se você não solicitou este código, ignore este email.
+    """
+    
+    # Resend params
+    params = {
+        "from": from_email,
+        "to": [to_email],
+        "subject": subject,
+        "html": html_content,
+        "text": text_content
+    }
+    return params
+
+class ResendTransport:
+    """Delivers messages through the Resend API"""
+    
+    def __init__(self, api_key):
+        self.api_key = api_key
+    
+    def send(self, params):
+        if not self.api_key:
+            raise Exception("Resend API key not configured")
+        resend.api_key = self.api_key
+        return resend.Emails.send(params)
+
+class StubTransport:
+    """Transporte local para testes e desenvolvimento: guarda as mensagens em memória"""
+    
+    def __init__(self, api_key=None):
+        self.sent = []
+    
+    def send(self, params):
+        self.sent.append(params)
+        return {'id': f'stub-{len(self.sent)}'}
+
+TRANSPORTS = {
+    'resend': ResendTransport,
+    'stub': StubTransport
+}
+
+def get_transport(config):
+    """Instantiate the transport named by EMAIL_TRANSPORT"""
+    name = config.get('EMAIL_TRANSPORT', 'resend')
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown email transport: {name}")
+    return TRANSPORTS[name](config.get('RESEND_API_KEY'))
 
 class EmailService:
     def __init__(self):
@@ -15,58 +101,13 @@ class EmailService:
                 raise Exception("Resend API key not configured")
             
             from_email = current_app.config.get('FROM_EMAIL', 'noreply@yourdomain.com')
-            
-            # Email content
-            subject = "Código de Verificação - Todo App"
-            html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="background-color: #f8f9fa; padding: 30px; border-radius: 10px; text-align: center;">
-                    <h1 style="color: #333; margin-bottom: 20px;">Todo App</h1>
-                    <h2 style="color: #007bff; margin-bottom: 30px;">Código de Verificação</h2>
-                    
-                    <p style="font-size: 16px; color: #666; margin-bottom: 30px;">
-                        Use o código abaixo para verificar sua conta:
-                    </p>
-                    
-                    <div style="background-color: #007bff; color: white; font-size: 32px; font-weight: bold; padding: 20px; border-radius: 8px; letter-spacing: 4px; margin: 30px 0;">
-                        {verification_code}
-                    </div>
-                    
-                    <p style="font-size: 14px; color: #999; margin-top: 30px;">
-                        Este código expira em 10 minutos.<br>
-                        Se você não solicitou este código, ignore este email.
-                    </p>
-                </div>
-            </body>
-            </html>
-            """
-            
-            text_content = f"""
-            Todo App - Código de Verificação
-            
-            Use o código abaixo para verificar sua conta:
-            
-            {verification_code}
-            
-            Este código expira em 10 minutos.
-            Se você não solicitou este código, ignore este email.
-            """
-            
-            # Send email using Resend
-            params = {
-                "from": from_email,
-                "to": [to_email],
-                "subject": subject,
-                "html": html_content,
-                "text": text_content
-            }
+            params = build_verification_email(to_email, verification_code, from_email)
             
             response = resend.Emails.send(params)
             return True, response
             
         except Exception as e:
-            print(f"Error sending email: {str(e)}")
+            logger.exception('Error sending email')
             return False, str(e)
     
     def send_password_reset_email(self, to_email, reset_token):
@@ -127,5 +168,5 @@ class EmailService:
             return True, response
             
         except Exception as e:
-            print(f"Error sending password reset email: {str(e)}")
+            logger.exception('Error sending password reset email')
             return False, str(e)
\ No newline at end of file
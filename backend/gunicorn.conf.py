@@ -0,0 +1,92 @@
+"""
+Configuração do gunicorn em produção (gunicorn -c gunicorn.conf.py wsgi:app).
+
+- A aplicação é carregada uma vez no master (preload_app) e os workers
+  nascem por fork, dividindo as páginas de memória em copy-on-write.
+- Cada worker descarta, depois do fork, as conexões do engine herdadas do
+  master e reinicia a thread de logs, que não sobrevive ao fork.
+- Workers são reciclados depois de MAX_REQUESTS requisições (com jitter,
+  para não reiniciarem todos juntos), limitando o crescimento de memória.
+
+Tamanho:
+- WEB_CONCURRENCY (workers): padrão 2 * CPUs + 1, limitado para que
+  workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) caiba em DB_MAX_CONNECTIONS.
+- GUNICORN_THREADS (gthread): padrão DB_POOL_SIZE + DB_MAX_OVERFLOW; mais
+  threads que conexões só esperariam na fila do pool.
+- GUNICORN_WORKER_CONNECTIONS (gevent): conexões simultâneas por worker;
+  streams SSE abertos não seguram conexão do banco.
+
+Classe de worker: GUNICORN_WORKER_CLASS, padrão gevent. Cada stream SSE
+aberto é um greenlet parado na fila do agendador, então milhares de abas
+não tiram vaga das requisições da API (com gthread, cada stream ocupa uma
+das GUNICORN_THREADS threads do worker). O pool de processos do bcrypt
+roda sob o monkey patch (tests/test_password_hashing.py). Para asgi:app
+use uvicorn.workers.UvicornWorker (veja asgi.py).
+"""
+
+import os
+
+# Worker cooperativo por padrão; o patch precisa vir antes de a aplicação
+# (ssl, threading, psycopg) ser importada no master pelo preload
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+if worker_class == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from config import Config
+
+
+def cpu_count():
+    # Afinidade do processo: em containers os.cpu_count() mostra as CPUs do host
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_workers():
+    workers = 2 * cpu_count() + 1
+    max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 0))
+    if max_connections:
+        per_worker = Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW
+        workers = min(workers, max(max_connections // per_worker, 1))
+    return workers
+
+
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers()))
+threads = int(os.environ.get('GUNICORN_THREADS', Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+preload_app = True
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+# Streams SSE abertos seguram o worker no desligamento até este prazo;
+# o cliente reconecta sozinho (retry do EventSource)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+
+def post_fork(server, worker):
+    import sys
+    # asgi:app (uvicorn.workers.UvicornWorker) traz a aplicação Flask em flask_app
+    if 'asgi' in sys.modules:
+        from asgi import flask_app as app
+    else:
+        from wsgi import app
+    from models import db
+    from structured_logging import configure_logging
+
+    configure_logging(app.config)
+    with app.app_context():
+        # close=False: as conexões pertencem ao master; fechá-las daqui
+        # derrubaria o socket que o master (ou outro worker) ainda vê
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Gauges livesum/mostrecent do worker morto saem da soma do /metrics
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
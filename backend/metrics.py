@@ -0,0 +1,196 @@
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Todas as métricas têm labels: em modo multiprocess nada é gravado em disco
+# até a primeira observação, então processos auxiliares (pool do bcrypt) não
+# deixam arquivos vazios para trás.
+REQUEST_LATENCY = Histogram(
+    'todo_http_request_duration_seconds', 'Request latency by endpoint',
+    ['blueprint', 'endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUEST_COUNT = Counter(
+    'todo_http_requests_total', 'Requests by endpoint and status code',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    'todo_http_request_sql_statements', 'SQL statements executed per request',
+    ['blueprint', 'endpoint'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+)
+REQUEST_SQL_SECONDS = Histogram(
+    'todo_http_request_sql_duration_seconds', 'Time spent executing SQL per request',
+    ['blueprint', 'endpoint'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+BCRYPT_SECONDS = Histogram(
+    'todo_bcrypt_duration_seconds', 'bcrypt wall time including the wait for a pool slot',
+    ['operation', 'outcome'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+# Hit rate: rate(todo_task_cache_requests_total{result="hit"}) / rate(todo_task_cache_requests_total)
+TASK_CACHE_REQUESTS = Counter(
+    'todo_task_cache_requests_total', 'Task list cache lookups by result (hit/miss)',
+    ['result']
+)
+TASK_SUMMARY_CACHE_REQUESTS = Counter(
+    'todo_task_summary_cache_requests_total', 'Task summary cache lookups by result (hit/miss)',
+    ['result']
+)
+DB_READ_ROUTES = Counter(
+    'todo_db_read_routes_total', 'Replica-eligible requests by the database their reads went to',
+    ['target', 'reason']
+)
+RATE_LIMITED = Counter(
+    'todo_rate_limited_total', 'Auth requests rejected by the rate limiter',
+    ['endpoint', 'scope']
+)
+TASK_CACHE_EVICTIONS = Counter(
+    'todo_task_cache_evictions_total', 'Task list cache entries evicted to stay under the byte budget',
+    ['backend']
+)
+TASK_CACHE_BYTES = Gauge(
+    'todo_task_cache_bytes', 'Bytes held by the in-process task list cache',
+    ['backend'], multiprocess_mode='livesum'
+)
+# Atualizados no scrape (no máximo a cada TABLE_METRICS_INTERVAL_SECONDS);
+# no PostgreSQL as linhas são a estimativa do planner (pg_class.reltuples)
+TABLE_ROWS = Gauge(
+    'todo_table_rows', 'Rows per table (estimate on PostgreSQL)',
+    ['table'], multiprocess_mode='mostrecent'
+)
+TABLE_BYTES = Gauge(
+    'todo_table_bytes', 'Total size per table including indexes (PostgreSQL only)',
+    ['table'], multiprocess_mode='mostrecent'
+)
+
+def registry():
+    """
+    Registry to expose. With PROMETHEUS_MULTIPROC_DIR set, every gunicorn
+    worker writes its samples there and the scrape merges all of them, so
+    /metrics is correct no matter which worker answers.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        merged = CollectorRegistry()
+        multiprocess.MultiProcessCollector(merged)
+        return merged
+    return REGISTRY
+
+@contextmanager
+def observe_bcrypt(operation):
+    """Time one bcrypt call; outcome is 'ok' or the exception class name."""
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except Exception as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        BCRYPT_SECONDS.labels(operation, outcome).observe(time.perf_counter() - started)
+
+# [statements, seconds] da view async em andamento (asgi.py): lá não há flask.g
+_async_request_sql = contextvars.ContextVar('metrics_async_request_sql', default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['metrics_query_started'].pop()
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_sql_statements += 1
+        g.metrics_sql_seconds += time.perf_counter() - started
+        return
+    async_sql = _async_request_sql.get()
+    if async_sql is not None:
+        async_sql[0] += 1
+        async_sql[1] += time.perf_counter() - started
+
+class RequestMetrics:
+    """
+    Middleware de métricas: latência, status e SQL por endpoint, servidos em
+    /metrics no formato de texto do Prometheus.
+
+    A medição fecha quando a view devolve a resposta; em respostas em
+    streaming (GET /api/tasks sem parâmetros, SSE) o corpo gerado depois não
+    entra na latência nem na contagem de SQL. As views async do asgi.py
+    gravam as mesmas séries por observe_async_view.
+    """
+
+    def __init__(self):
+        self._scrape_hooks = []
+
+    def on_scrape(self, hook):
+        """Register a callable run before each /metrics render (e.g. gauges read from the DB)."""
+        self._scrape_hooks.append(hook)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def _start(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_statements = 0
+        g.metrics_sql_seconds = 0.0
+
+    def _record(self, response):
+        if 'metrics_started' not in g or request.endpoint == 'metrics':
+            return response
+        # Rotas inexistentes caem todas em 'unmatched' para não explodir a cardinalidade
+        blueprint = request.blueprint or ''
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - g.metrics_started)
+        REQUEST_COUNT.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        REQUEST_SQL_STATEMENTS.labels(blueprint, endpoint).observe(g.metrics_sql_statements)
+        REQUEST_SQL_SECONDS.labels(blueprint, endpoint).observe(g.metrics_sql_seconds)
+        return response
+
+    def metrics_view(self):
+        for hook in self._scrape_hooks:
+            hook()
+        return Response(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
+
+def observe_async_view(view, endpoint):
+    """
+    Wrap an async Starlette view (asgi.py) so it records the same series as
+    RequestMetrics, labelled with the endpoint of the Flask view it stands in
+    for (e.g. 'api.get_tasks'), so dashboards do not depend on the deploy.
+    """
+    blueprint = endpoint.rpartition('.')[0]
+
+    @functools.wraps(view)
+    async def wrapper(request):
+        sql = [0, 0.0]
+        token = _async_request_sql.set(sql)
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await view(request)
+            status = response.status_code
+            return response
+        finally:
+            _async_request_sql.reset(token)
+            REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+            REQUEST_COUNT.labels(blueprint, endpoint, request.method, str(status)).inc()
+            REQUEST_SQL_STATEMENTS.labels(blueprint, endpoint).observe(sql[0])
+            REQUEST_SQL_SECONDS.labels(blueprint, endpoint).observe(sql[1])
+
+    return wrapper
+
+request_metrics = RequestMetrics()
@@ -1,40 +1,81 @@
 #!/usr/bin/env python3
 """
 Script para executar migrações do banco de dados
+
+Roda uma vez por deploy (release phase), não a cada boot de worker:
+
+    cd backend && python migrate_db.py
+
+As revisões ficam em migrations/versions e a revisão aplicada fica gravada
+na tabela alembic_version.
 """
 import os
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from flask import Flask
-from flask_migrate import Migrate, init, migrate, upgrade
+from flask_migrate import Migrate, upgrade
 from models import db
+from shard_router import shard_router
 from config import Config
+from structured_logging import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+_head_revision = None
+
+def head_revision():
+    """Latest revision in migrations/versions (read once per process)"""
+    global _head_revision
+    if _head_revision is None:
+        _head_revision = ScriptDirectory(MIGRATIONS_DIR).get_current_head()
+    return _head_revision
+
+def current_revision(engine=None):
+    """Revision recorded in alembic_version, or None for an unmigrated database"""
+    with (engine or db.engine).connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+def schema_is_current():
+    """
+    Fast boot-time check: a single SELECT on alembic_version compared with the
+    head revision. Must run inside an app context.
+    """
+    return current_revision() == head_revision()
+
+def run_migrations():
+    """
+    Apply pending revisions to the primary database and to every task shard
+    (same schema everywhere). Must run inside an app context.
+    """
+    targets = [(None, db.engine)] + [
+        (f'shard:{name}', shard_router.engine(db, name))
+        for name, uri in shard_router.shards.items() if uri is not None
+    ]
+    for bind_key, engine in targets:
+        before = current_revision(engine)
+        if before == head_revision():
+            logger.info('Schema já está atualizado', extra={'revision': before, 'bind': bind_key})
+            continue
+        logger.info('Aplicando migrações',
+                    extra={'from_revision': before, 'to_revision': head_revision(), 'bind': bind_key})
+        upgrade(directory=MIGRATIONS_DIR, x_arg=[f'bind={bind_key}'] if bind_key else None)
+        logger.info('Migrações concluídas', extra={'revision': head_revision(), 'bind': bind_key})
 
 def create_migration_app():
+    """Minimal app for the release step: no blueprints and no boot-time schema check"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    configure_logging(app.config)
     
+    shard_router.init_app(app)
     db.init_app(app)
-    migrate = Migrate(app, db)
-    
-    return app, migrate
-
-def run_migrations():
-    app, _ = create_migration_app()
+    Migrate(app, db, directory=MIGRATIONS_DIR)
     
-    with app.app_context():
-        # Criar diretório de migrações se não existir
-        if not os.path.exists('migrations'):
-            print("Inicializando migrações...")
-            init()
-        
-        # Criar migração
-        print("Criando migração...")
-        migrate(message='Add user_id to tasks and create users table')
-        
-        # Aplicar migração
-        print("Aplicando migrações...")
-        upgrade()
-        
-        print("Migrações concluídas!")
+    return app
 
 if __name__ == '__main__':
-    run_migrations()
\ No newline at end of file
+    app = create_migration_app()
+    with app.app_context():
+        run_migrations()
@@ -0,0 +1,91 @@
+"""Initial schema: user, task and verification_code
+
+Databases created by the old boot-time db.create_all() already have these
+tables, so every step checks what exists first and only the legacy fixes
+that used to run on each boot are applied to them.
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_initial'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if 'user' not in tables:
+        op.create_table('user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('password_hash', sa.String(length=128), nullable=False),
+            sa.Column('email_verified', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email')
+        )
+    elif 'email_verified' not in {c['name'] for c in inspector.get_columns('user')}:
+        op.add_column('user', sa.Column('email_verified', sa.Boolean(), server_default=sa.true(), nullable=True))
+
+    if 'task' not in tables:
+        op.create_table('task',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('completed', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('is_recurring', sa.Boolean(), nullable=True),
+            sa.Column('recurrence_type', sa.String(length=20), nullable=True),
+            sa.Column('parent_task_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    elif 'user_id' not in {c['name'] for c in inspector.get_columns('task')}:
+        op.add_column('task', sa.Column('user_id', sa.Integer(), nullable=True))
+
+    if 'verification_code' not in tables:
+        op.create_table('verification_code',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('code', sa.String(length=6), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('verified', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    # Legacy email_verification table and the foreign keys it left behind (PostgreSQL only)
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP TABLE IF EXISTS email_verification CASCADE')
+        for constraint in ('email_verification_user_id_fkey', 'verification_code_user_id_fkey'):
+            op.execute(f'ALTER TABLE verification_code DROP CONSTRAINT IF EXISTS {constraint}')
+
+    # Existing users predate email verification
+    users = sa.table('user', sa.column('id', sa.Integer()), sa.column('email_verified', sa.Boolean()))
+    op.execute(users.update().where(users.c.email_verified.is_(None)).values(email_verified=True))
+
+    # Assign orphaned tasks to the first user
+    first_user = bind.execute(sa.select(users.c.id).order_by(users.c.id).limit(1)).scalar()
+    if first_user is not None:
+        tasks = sa.table('task', sa.column('user_id', sa.Integer()))
+        op.execute(tasks.update().where(tasks.c.user_id.is_(None)).values(user_id=first_user))
+
+
+def downgrade():
+    op.drop_table('verification_code')
+    op.drop_table('task')
+    op.drop_table('user')
@@ -0,0 +1,116 @@
+"""Delta sync, due-task watermark, email outbox and listing indexes
+
+Adds task.updated_at/revision/notified_at, user.task_revision, the
+task_tombstone and email_outbox tables and the indexes behind pagination,
+delta sync, the due-task engine and the sweeper. Some of these may already
+exist on databases upgraded by the old boot-time ALTERs, so each step is
+guarded.
+
+Revision ID: 0002_sync_notifications_outbox
+Revises: 0001_initial
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from datetime import datetime, timedelta, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_sync_notifications_outbox'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+BRAZIL_TZ = timezone(timedelta(hours=-3))
+
+
+def _columns(inspector, table):
+    return {c['name'] for c in inspector.get_columns(table)}
+
+
+def _indexes(inspector, table):
+    return {i['name'] for i in inspector.get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    task_columns = _columns(inspector, 'task')
+    if 'updated_at' not in task_columns:
+        op.add_column('task', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    if 'revision' not in task_columns:
+        op.add_column('task', sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+    if 'notified_at' not in task_columns:
+        op.add_column('task', sa.Column('notified_at', sa.DateTime(timezone=True), nullable=True))
+        # Tarefas já vencidas não devem ser notificadas de novo após o upgrade
+        tasks = sa.table('task', sa.column('due_date', sa.DateTime(timezone=True)),
+                         sa.column('notified_at', sa.DateTime(timezone=True)))
+        op.execute(
+            tasks.update()
+            .where(tasks.c.due_date <= datetime.now(BRAZIL_TZ))
+            .values(notified_at=tasks.c.due_date)
+        )
+
+    if 'task_revision' not in _columns(inspector, 'user'):
+        op.add_column('user', sa.Column('task_revision', sa.Integer(), server_default='0', nullable=False))
+
+    if 'task_tombstone' not in tables:
+        op.create_table('task_tombstone',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('task_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('revision', sa.Integer(), nullable=False),
+            sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'email_outbox' not in tables:
+        op.create_table('email_outbox',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('kind', sa.String(length=30), nullable=False),
+            sa.Column('to_email', sa.String(length=120), nullable=False),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=10), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    indexes = [
+        ('task', 'ix_task_user_completed_due', ['user_id', 'completed', 'due_date'], {}),
+        ('task', 'ix_task_user_created', ['user_id', 'created_at'], {}),
+        ('task', 'ix_task_user_revision', ['user_id', 'revision'], {}),
+        ('task', 'ix_task_pending_due', ['due_date'], {
+            'postgresql_where': sa.text('completed = false AND notified_at IS NULL'),
+            'sqlite_where': sa.text('completed = 0 AND notified_at IS NULL')
+        }),
+        ('task_tombstone', 'ix_task_tombstone_user_revision', ['user_id', 'revision'], {}),
+        ('email_outbox', 'ix_email_outbox_status_next_attempt', ['status', 'next_attempt_at'], {}),
+        ('user', 'ix_user_verified_created', ['email_verified', 'created_at'], {}),
+    ]
+    inspector = sa.inspect(bind)
+    for table, name, columns, options in indexes:
+        if name not in _indexes(inspector, table):
+            op.create_index(name, table, columns, **options)
+
+
+def downgrade():
+    op.drop_index('ix_user_verified_created', table_name='user')
+    op.drop_index('ix_task_pending_due', table_name='task')
+    op.drop_index('ix_task_user_revision', table_name='task')
+    op.drop_index('ix_task_user_created', table_name='task')
+    op.drop_index('ix_task_user_completed_due', table_name='task')
+    op.drop_table('email_outbox')
+    op.drop_table('task_tombstone')
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('task_revision')
+    with op.batch_alter_table('task') as batch_op:
+        batch_op.drop_column('notified_at')
+        batch_op.drop_column('revision')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,35 @@
+"""Refresh token table for rotating refresh tokens
+
+Revision ID: 0003_refresh_tokens
+Revises: 0002_sync_notifications_outbox
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_refresh_tokens'
+down_revision = '0002_sync_notifications_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('refresh_token',
+        sa.Column('jti', sa.String(length=36), nullable=False),
+        sa.Column('family_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index('ix_refresh_token_family', 'refresh_token', ['family_id'])
+    op.create_index('ix_refresh_token_expires', 'refresh_token', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_refresh_token_expires', table_name='refresh_token')
+    op.drop_index('ix_refresh_token_family', table_name='refresh_token')
+    op.drop_table('refresh_token')
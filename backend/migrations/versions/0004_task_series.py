@@ -0,0 +1,50 @@
+"""Recurrence series expanded lazily by the calendar endpoint
+
+Adds the task_series table and task.series_id/occurrence_date, which link
+a materialized occurrence back to its series.
+
+Revision ID: 0004_task_series
+Revises: 0003_refresh_tokens
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_task_series'
+down_revision = '0003_refresh_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_series',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('recurrence_type', sa.String(length=20), nullable=False),
+        sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_series_user_starts', 'task_series', ['user_id', 'starts_at'])
+
+    # Sem FK, como parent_task_id: no SQLite ela exigiria recriar a tabela task
+    op.add_column('task', sa.Column('series_id', sa.Integer(), nullable=True))
+    op.add_column('task', sa.Column('occurrence_date', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_task_series_occurrence', 'task', ['series_id', 'occurrence_date'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_task_series_occurrence', table_name='task')
+    with op.batch_alter_table('task') as batch_op:
+        batch_op.drop_column('occurrence_date')
+        batch_op.drop_column('series_id')
+
+    op.drop_index('ix_task_series_user_starts', table_name='task_series')
+    op.drop_table('task_series')
@@ -0,0 +1,29 @@
+"""Covering index for the task summary counters
+
+Extends ix_task_user_completed_due with is_recurring so the grouped count
+behind GET /api/tasks/summary is answered from the index alone. The old
+index is a prefix of the new one, so pagination keeps using it.
+
+Revision ID: 0005_task_summary_index
+Revises: 0004_task_series
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_task_summary_index'
+down_revision = '0004_task_series'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_task_user_completed_due_recurring', 'task', ['user_id', 'completed', 'due_date', 'is_recurring'])
+    op.drop_index('ix_task_user_completed_due', table_name='task')
+
+
+def downgrade():
+    op.create_index('ix_task_user_completed_due', 'task', ['user_id', 'completed', 'due_date'])
+    op.drop_index('ix_task_user_completed_due_recurring', table_name='task')
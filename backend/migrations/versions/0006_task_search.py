@@ -0,0 +1,79 @@
+"""Full-text search index over task title and description
+
+PostgreSQL: a generated tsvector column (title weighted above description)
+with a GIN index. SQLite: an FTS5 external-content table kept in sync by
+triggers. Both are maintained by the database on every insert, update and
+delete, including the bulk statements of the batch endpoint.
+
+These objects are not in the SQLAlchemy metadata (they are dialect
+specific); task_search.include_name keeps autogenerate from dropping them.
+
+Revision ID: 0006_task_search
+Revises: 0005_task_summary_index
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_task_search'
+down_revision = '0005_task_summary_index'
+branch_labels = None
+depends_on = None
+
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN
+        INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    # Só quando título/descrição mudam: concluir ou reagendar não reescreve o índice
+    """
+    CREATE TRIGGER task_fts_update AFTER UPDATE OF title, description ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("""
+            ALTER TABLE task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('portuguese', coalesce(description, '')), 'B')
+            ) STORED
+        """)
+        op.execute('CREATE INDEX ix_task_search_vector ON task USING gin (search_vector)')
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE task_fts USING fts5(
+                title, description, content='task', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        # Indexa as tarefas existentes a partir da tabela task
+        op.execute("INSERT INTO task_fts(task_fts) VALUES ('rebuild')")
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(trigger)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_task_search_vector')
+        op.execute('ALTER TABLE task DROP COLUMN IF EXISTS search_vector')
+    elif dialect == 'sqlite':
+        for name in ('task_fts_insert', 'task_fts_delete', 'task_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+        op.execute('DROP TABLE IF EXISTS task_fts')
@@ -0,0 +1,28 @@
+"""Indexes for verification code lookups and expiry purging
+
+(email, verified) serves every lookup in the auth routes and the sweeper;
+expires_at lets the sweeper delete expired codes without a full scan.
+
+Revision ID: 0007_verification_code_indexes
+Revises: 0006_task_search
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_verification_code_indexes'
+down_revision = '0006_task_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_verification_code_email_verified', 'verification_code', ['email', 'verified'])
+    op.create_index('ix_verification_code_expires', 'verification_code', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_verification_code_expires', table_name='verification_code')
+    op.drop_index('ix_verification_code_email_verified', table_name='verification_code')
@@ -0,0 +1,30 @@
+"""Directory of users whose tasks live outside their hash-ring shard
+
+Revision ID: 0008_task_shard_directory
+Revises: 0007_verification_code_indexes
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_task_shard_directory'
+down_revision = '0007_verification_code_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_shard_directory',
+        sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('shard', sa.String(length=50), nullable=False),
+        sa.Column('moving', sa.Boolean(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('task_shard_directory')
@@ -0,0 +1,50 @@
+"""Append-only archive of old completed tasks
+
+task_archive receives the completed tasks the sweeper moves out of task;
+(user_id, completed_at, id) serves GET /api/tasks/archive page by page.
+A partial index over the completed tasks' updated_at lets the job find
+archive candidates without scanning the pending ones.
+
+Revision ID: 0009_task_archive
+Revises: 0008_task_shard_directory
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_task_archive'
+down_revision = '0008_task_shard_directory'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_recurring', sa.Boolean(), nullable=True),
+        sa.Column('recurrence_type', sa.String(length=20), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_archive_user_completed', 'task_archive', ['user_id', 'completed_at', 'id'])
+    op.create_index(
+        'ix_task_completed_updated', 'task', ['updated_at'],
+        postgresql_where=sa.text('completed = true'),
+        sqlite_where=sa.text('completed = 1')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_task_completed_updated', table_name='task')
+    op.drop_index('ix_task_archive_user_completed', table_name='task_archive')
+    op.drop_table('task_archive')
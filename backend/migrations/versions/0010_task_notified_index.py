@@ -0,0 +1,33 @@
+"""Index the due-task notification watermark
+
+The sweeper claims due tasks for every user and stamps notified_at; each
+web process then reads the tasks claimed since its last run for the users
+connected to it. The partial index over notified_at keeps that read to the
+window of new notifications.
+
+Revision ID: 0010_task_notified_index
+Revises: 0009_task_archive
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_task_notified_index'
+down_revision = '0009_task_archive'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_task_notified', 'task', ['notified_at'],
+        postgresql_where=sa.text('notified_at IS NOT NULL'),
+        sqlite_where=sa.text('notified_at IS NOT NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_task_notified', table_name='task')
@@ -0,0 +1,31 @@
+"""Tombstone retention for delta sync
+
+The sweeper deletes task tombstones past TASK_TOMBSTONE_RETENTION_DAYS,
+found through the new index on deleted_at. user.task_sync_floor records the
+newest revision whose tombstones are gone, so older cursors get a reset.
+
+Revision ID: 0011_task_tombstone_retention
+Revises: 0010_task_notified_index
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_task_tombstone_retention'
+down_revision = '0010_task_notified_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('task_sync_floor', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_task_tombstone_deleted', 'task_tombstone', ['deleted_at'])
+
+
+def downgrade():
+    op.drop_index('ix_task_tombstone_deleted', table_name='task_tombstone')
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('task_sync_floor')
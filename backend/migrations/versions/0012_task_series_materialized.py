@@ -0,0 +1,31 @@
+"""Materialize series occurrences as they fall due
+
+task_series.materialized_until marks how far the sweeper has written a
+series' occurrences into task, so they show up in the task list, the
+summary counters and the due-task notifications.
+
+Revision ID: 0012_task_series_materialized
+Revises: 0011_task_tombstone_retention
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012_task_series_materialized'
+down_revision = '0011_task_tombstone_retention'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('task_series', sa.Column('materialized_until', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_task_series_materialized', 'task_series', ['materialized_until'])
+
+
+def downgrade():
+    op.drop_index('ix_task_series_materialized', table_name='task_series')
+    with op.batch_alter_table('task_series') as batch_op:
+        batch_op.drop_column('materialized_until')
@@ -1,37 +1,60 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import bindparam, case, event, func, select
+from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
-import bcrypt
+from password_hashing import hasher, PasswordHasherBusy
+from metrics import observe_bcrypt
+from structured_logging import get_logger
+from db_routing import RoutingSession
+
+logger = get_logger(__name__)
 
 # Definir o fuso horário UTC-3 (Brasil)
 BRAZIL_TZ = timezone(timedelta(hours=-3))
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
+    # Varredura de contas não verificadas expiradas (sweeper.py)
+    __table_args__ = (
+        db.Index('ix_user_verified_created', 'email_verified', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     email_verified = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(BRAZIL_TZ))
+    # Contador monotônico de alterações nas tarefas do usuário (cursor da sincronização incremental)
+    task_revision = db.Column(db.Integer, default=0, nullable=False)
+    # Cursores anteriores a esta revisão recebem reset: os tombstones deles já foram removidos
+    task_sync_floor = db.Column(db.Integer, default=0, nullable=False)
     
     # Relacionamento com tarefas
     tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        with observe_bcrypt('hash'):
+            self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
         try:
-            print(f"Verificando senha para usuário: {self.email}")
-            print(f"Hash armazenado: {self.password_hash[:20]}...")
-            result = bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
-            print(f"Resultado da verificação: {result}")
+            with observe_bcrypt('check'):
+                result = hasher.check(password, self.password_hash)
+            logger.debug('Verificação de senha', extra={'user_id': self.id, 'result': result})
             return result
-        except Exception as e:
-            print(f"Erro na verificação de senha: {str(e)}")
+        except PasswordHasherBusy:
+            # Sobrecarga não é senha errada: deixa a rota responder 503
+            raise
+        except Exception:
+            logger.exception('Erro na verificação de senha', extra={'user_id': self.id})
             return False
     
+    def password_needs_rehash(self):
+        """True when the stored hash uses a different cost than BCRYPT_ROUNDS."""
+        return hasher.needs_rehash(self.password_hash)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -42,6 +65,12 @@ class User(db.Model):
         }
 
 class VerificationCode(db.Model):
+    # Toda busca filtra por email (e quase sempre por verified); expires_at serve a limpeza do sweeper
+    __table_args__ = (
+        db.Index('ix_verification_code_email_verified', 'email', 'verified'),
+        db.Index('ix_verification_code_expires', 'expires_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), nullable=False)
     code = db.Column(db.String(6), nullable=False)
@@ -74,7 +103,38 @@ class VerificationCode(db.Model):
             'verified': self.verified
         }
 
+class EmailOutbox(db.Model):
+    """
+    Email aguardando envio. Gravado na mesma transação que o usuário/código e
+    entregue em lotes pelo worker de email_outbox.py.
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)  # 'verification'
+    to_email = db.Column(db.String(120), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON com os dados do template
+    status = db.Column(db.String(10), default='pending', nullable=False)  # 'pending', 'sent', 'dead'
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(BRAZIL_TZ), nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(BRAZIL_TZ))
+    sent_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
 class Task(db.Model):
+    # Índices compostos para listagem paginada por usuário (status/vencimento e criação).
+    # is_recurring no fim deixa o GET /api/tasks/summary só no índice (index-only scan)
+    __table_args__ = (
+        db.Index('ix_task_user_completed_due_recurring', 'user_id', 'completed', 'due_date', 'is_recurring'),
+        db.Index('ix_task_user_created', 'user_id', 'created_at'),
+        db.Index('ix_task_user_revision', 'user_id', 'revision'),
+        # Uma linha por ocorrência materializada de uma série
+        db.Index('ix_task_series_occurrence', 'series_id', 'occurrence_date', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -87,6 +147,14 @@ class Task(db.Model):
     is_recurring = db.Column(db.Boolean, default=False)
     recurrence_type = db.Column(db.String(20), nullable=True)  # 'daily', 'weekly', 'monthly'
     parent_task_id = db.Column(db.Integer, nullable=True)  # Para rastrear relações entre tarefas recorrentes
+    # Ocorrência gravada de uma TaskSeries (occurrence_date = data original)
+    series_id = db.Column(db.Integer, nullable=True)
+    occurrence_date = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Campos para sincronização incremental
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    revision = db.Column(db.Integer, default=0, nullable=False)
+    # Marca d'água do motor de tarefas vencidas (quando a tarefa foi notificada)
+    notified_at = db.Column(db.DateTime(timezone=True), nullable=True)
     
     def to_dict(self):
         return {
@@ -98,5 +166,262 @@ class Task(db.Model):
             'created_at': self.created_at.isoformat(),
             'is_recurring': self.is_recurring,
             'recurrence_type': self.recurrence_type,
-            'parent_task_id': self.parent_task_id
-        }
\ No newline at end of file
+            'parent_task_id': self.parent_task_id,
+            'series_id': self.series_id,
+            'occurrence_date': self.occurrence_date.isoformat() if self.occurrence_date else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'revision': self.revision
+        }
+
+# Índice parcial com apenas as tarefas pendentes ainda não notificadas: o motor de
+# vencimento percorre só o trecho recém-vencido, nunca o histórico de atrasadas
+db.Index(
+    'ix_task_pending_due',
+    Task.due_date,
+    postgresql_where=db.and_(Task.completed == False, Task.notified_at.is_(None)),
+    sqlite_where=db.and_(Task.completed == False, Task.notified_at.is_(None))
+)
+
+# Entrega das notificações (DueTaskScheduler): tarefas reivindicadas numa janela de notified_at
+db.Index(
+    'ix_task_notified',
+    Task.notified_at,
+    postgresql_where=Task.notified_at.isnot(None),
+    sqlite_where=Task.notified_at.isnot(None)
+)
+
+# Candidatas ao arquivamento (task_archive.py): só as concluídas, pela última alteração
+db.Index(
+    'ix_task_completed_updated',
+    Task.updated_at,
+    postgresql_where=Task.completed == True,
+    sqlite_where=Task.completed == True
+)
+
+class TaskSeries(db.Model):
+    """
+    Tarefa recorrente sem linhas pré-criadas: as ocorrências são calculadas a
+    partir de starts_at só dentro da janela consultada (GET /api/tasks/calendar).
+    Uma Task só é gravada quando uma ocorrência é alterada ou concluída, ou
+    pelo sweeper quando ela vence (a próxima fica sempre gravada, para aparecer
+    na lista, nos contadores e nas notificações).
+    """
+    __tablename__ = 'task_series'
+    __table_args__ = (
+        db.Index('ix_task_series_user_starts', 'user_id', 'starts_at'),
+        db.Index('ix_task_series_materialized', 'materialized_until'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    recurrence_type = db.Column(db.String(20), nullable=False)  # 'daily', 'weekly', 'monthly'
+    starts_at = db.Column(db.DateTime(timezone=True), nullable=False)  # vencimento da primeira ocorrência
+    until = db.Column(db.DateTime(timezone=True), nullable=True)  # última data possível (inclusive)
+    # Ocorrências com vencimento até aqui já têm linha em task (None: nenhuma ainda)
+    materialized_until = db.Column(db.DateTime(timezone=True), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(BRAZIL_TZ))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'recurrence_type': self.recurrence_type,
+            'starts_at': self.starts_at.isoformat(),
+            'until': self.until.isoformat() if self.until else None,
+            'created_at': self.created_at.isoformat()
+        }
+
+class TaskTombstone(db.Model):
+    """
+    Marca de exclusão de uma tarefa, usada pela sincronização incremental.
+    O sweeper remove as mais antigas que TASK_TOMBSTONE_RETENTION_DAYS.
+    """
+    __table_args__ = (
+        db.Index('ix_task_tombstone_user_revision', 'user_id', 'revision'),
+        db.Index('ix_task_tombstone_deleted', 'deleted_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(BRAZIL_TZ))
+
+class TaskArchive(db.Model):
+    """
+    Tarefa concluída há mais de TASK_ARCHIVE_AFTER_DAYS, retirada de task pelo
+    sweeper. Só recebe inserções; GET /api/tasks/archive lê por página.
+    """
+    __tablename__ = 'task_archive'
+    __table_args__ = (
+        db.Index('ix_task_archive_user_completed', 'user_id', 'completed_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)  # id que a tarefa tinha em task
+    user_id = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    due_date = db.Column(db.DateTime(timezone=True), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Última alteração da tarefa concluída (updated_at, ou created_at nas antigas)
+    completed_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    is_recurring = db.Column(db.Boolean, default=False)
+    recurrence_type = db.Column(db.String(20), nullable=True)
+    archived_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(BRAZIL_TZ))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_id': self.task_id,
+            'title': self.title,
+            'description': self.description,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat(),
+            'is_recurring': self.is_recurring,
+            'recurrence_type': self.recurrence_type,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+class RefreshToken(db.Model):
+    """
+    Refresh token emitido (só o jti, nunca o token). Cada uso revoga o token e
+    emite outro da mesma família; reapresentar um token já usado revoga a
+    família inteira (token vazado).
+    """
+    __tablename__ = 'refresh_token'
+    __table_args__ = (
+        db.Index('ix_refresh_token_family', 'family_id'),
+        db.Index('ix_refresh_token_expires', 'expires_at'),
+    )
+    
+    jti = db.Column(db.String(36), primary_key=True)
+    family_id = db.Column(db.String(36), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    revoked_at = db.Column(db.DateTime(timezone=True))
+
+class TaskShardDirectory(db.Model):
+    """
+    Exceção ao anel de consistent hashing: o shard onde estão as tarefas do
+    usuário. moving=True bloqueia escritas enquanto o shard_tool copia os dados.
+    """
+    __tablename__ = 'task_shard_directory'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    shard = db.Column(db.String(50), nullable=False)
+    moving = db.Column(db.Boolean, default=False, nullable=False)
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(BRAZIL_TZ))
+
+def bump_task_revision(session, user_id):
+    """
+    Increment the user's task revision counter and return the new value.
+    The UPDATE locks the user row until commit, so revisions of one user
+    become visible in order.
+
+    The new value is also kept in session.info['task_revisions'] until the
+    transaction ends, so after_commit listeners (task_cache) can publish it.
+    """
+    users = User.__table__
+    statement = (
+        users.update()
+        .where(users.c.id == user_id)
+        .values(task_revision=func.coalesce(users.c.task_revision, 0) + 1)
+    )
+    # O contador fica no mesmo banco das tarefas: com shards, numa cópia da
+    # linha do usuário dentro do shard, e o incremento é atômico com a escrita
+    connection = session.connection(bind_arguments={'mapper': Task, 'clause': statement})
+    if connection.execute(statement).rowcount == 0:
+        copy_user_to_shard(session, connection, user_id)
+        connection.execute(statement)
+    revision = connection.execute(
+        select(users.c.task_revision).where(users.c.id == user_id)
+    ).scalar()
+    session.info.setdefault('task_revisions', {})[user_id] = revision
+    return revision
+
+def copy_user_to_shard(session, connection, user_id):
+    """
+    Cria no shard a linha do usuário (chave estrangeira das tarefas e contador
+    de revisão), a partir do banco principal. Sem o hash da senha: o login
+    só lê o banco principal.
+    """
+    users = User.__table__
+    row = session.execute(select(users).where(users.c.id == user_id)).mappings().first()
+    if row is None:
+        return
+    connection.execute(users.insert().values(dict(row, password_hash='')))
+
+def task_revision(session, user_id):
+    """Current task revision of the user, read where the user's tasks live."""
+    users = User.__table__
+    return session.execute(
+        select(users.c.task_revision).where(users.c.id == user_id),
+        bind_arguments={'mapper': Task}
+    ).scalar() or 0
+
+def task_sync_state(session, user_id):
+    """(task_revision, task_sync_floor) of the user, read where the user's tasks live."""
+    users = User.__table__
+    row = session.execute(
+        select(users.c.task_revision, users.c.task_sync_floor).where(users.c.id == user_id),
+        bind_arguments={'mapper': Task}
+    ).first()
+    if row is None:
+        return 0, 0
+    return row.task_revision or 0, row.task_sync_floor or 0
+
+def raise_task_sync_floors(session, floors):
+    """
+    Raise task_sync_floor to the given revision ({user_id: revision}) where
+    it is lower, on the database of the users' tasks. Cursors below the floor
+    get a full reset from GET /api/tasks/changes.
+    """
+    if not floors:
+        return
+    users = User.__table__
+    floor = bindparam('floor')
+    statement = (
+        users.update()
+        .where(users.c.id == bindparam('target_id'))
+        .values(task_sync_floor=case((users.c.task_sync_floor < floor, floor), else_=users.c.task_sync_floor))
+    )
+    connection = session.connection(bind_arguments={'mapper': Task, 'clause': statement})
+    connection.execute(statement, [{'target_id': user_id, 'floor': revision} for user_id, revision in floors.items()])
+
+@event.listens_for(Session, 'before_flush')
+def stamp_task_revisions(session, flush_context, instances):
+    """
+    Carimba revisão/updated_at nas tarefas criadas ou alteradas e grava
+    tombstones das excluídas, com um único incremento por usuário por flush.
+    """
+    changed = [obj for obj in session.new if isinstance(obj, Task)]
+    changed += [obj for obj in session.dirty if isinstance(obj, Task) and session.is_modified(obj)]
+    deleted_user_ids = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    deleted = [
+        obj for obj in session.deleted
+        if isinstance(obj, Task) and obj.user_id not in deleted_user_ids
+    ]
+    if not changed and not deleted:
+        return
+    
+    now = datetime.now(BRAZIL_TZ)
+    revisions = {}
+    for user_id in {task.user_id for task in changed + deleted if task.user_id is not None}:
+        revisions[user_id] = bump_task_revision(session, user_id)
+    
+    for task in changed:
+        if task.user_id in revisions:
+            task.revision = revisions[task.user_id]
+            task.updated_at = now
+    for task in deleted:
+        session.add(TaskTombstone(
+            task_id=task.id,
+            user_id=task.user_id,
+            revision=revisions[task.user_id],
+            deleted_at=now
+        ))
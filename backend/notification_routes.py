@@ -0,0 +1,96 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from notifications import scheduler, already_sent, get_user_due_tasks
+from models import db
+import json
+import queue
+
+notifications = Blueprint('notifications', __name__)
+
+TICKET_SALT = 'notifications-stream'
+
+# Reconexão do EventSource em 5s; o comentário SSE mantém a conexão viva atrás de proxies
+STREAM_PREAMBLE = "retry: 5000\n\n"
+KEEP_ALIVE = ": keep-alive\n\n"
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def format_event(event, data):
+    """Serialize one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def ticket_serializer():
+    # Salt próprio: o ticket não vale como token de acesso em nenhuma outra rota
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt=TICKET_SALT)
+
+def user_from_ticket(ticket):
+    """User id of a stream ticket, or None when it is forged or expired."""
+    try:
+        return int(ticket_serializer().loads(
+            ticket, max_age=current_app.config.get('NOTIFICATION_TICKET_SECONDS', 60)
+        ))
+    except (BadSignature, ValueError):
+        return None
+
+def stream_user_id():
+    """
+    User of the stream: from ?ticket= (browsers) or the Authorization header.
+    Returns None when neither is valid.
+    """
+    ticket = request.args.get('ticket')
+    if ticket:
+        return user_from_ticket(ticket)
+    verify_jwt_in_request(locations=['headers'])
+    return int(get_jwt_identity())
+
+# EventSource não envia cabeçalhos. Em vez do access token na URL (que ficaria
+# nos logs do gunicorn e dos proxies), o cliente troca o token por um ticket
+# curto que só abre o stream
+@notifications.route('/ticket', methods=['POST'])
+@jwt_required()
+def stream_ticket():
+    """Short-lived ticket for GET /stream?ticket=..."""
+    current_user_id = int(get_jwt_identity())
+    return jsonify({
+        'ticket': ticket_serializer().dumps(str(current_user_id)),
+        'expires_in': current_app.config.get('NOTIFICATION_TICKET_SECONDS', 60)
+    })
+
+@notifications.route('/stream', methods=['GET'])
+def stream():
+    """
+    Stream SSE com as tarefas vencidas do usuário. Envia as já vencidas ao
+    conectar e depois cada tarefa que vencer, publicada pelo agendador único.
+    """
+    current_user_id = stream_user_id()
+    if current_user_id is None:
+        return jsonify({'error': 'Ticket inválido ou expirado'}), 401
+    app = current_app._get_current_object()
+    scheduler.start(app)
+    heartbeat = app.config.get('NOTIFICATION_HEARTBEAT_SECONDS', 15)
+
+    def generate():
+        # Inscreve antes de ler o estado inicial: o que for reivindicado entre
+        # os dois chega pela fila, e already_sent descarta o que se repetir
+        events = scheduler.subscribe(current_user_id)
+        try:
+            with app.app_context():
+                # Estado inicial lido uma única vez; a conexão não volta a consultar o banco
+                initial = [task.to_dict() for task in get_user_due_tasks(current_user_id)]
+                db.session.remove()
+            sent = {(task['id'], task['due_date']) for task in initial}
+            yield STREAM_PREAMBLE
+            for task in initial:
+                yield format_event('due', task)
+            while True:
+                try:
+                    task = events.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield KEEP_ALIVE
+                    continue
+                if not already_sent(sent, task):
+                    yield format_event('due', task)
+        finally:
+            scheduler.unsubscribe(current_user_id, events)
+
+    return Response(generate(), mimetype='text/event-stream', headers=STREAM_HEADERS)
@@ -1,14 +1,246 @@
 from datetime import datetime, timezone, timedelta
-from models import Task, BRAZIL_TZ
+from sqlalchemy import select, update
+from models import db, Task, BRAZIL_TZ
+from shard_router import shard_router
+from structured_logging import get_logger
+import queue
+import threading
+import time
 
-def get_due_tasks():
+logger = get_logger(__name__)
+
+DUE_BATCH_SIZE = 500
+
+# Limite de ids por cláusula IN
+USER_CHUNK_SIZE = 500
+
+def claim_due_tasks(now=None, batch_size=DUE_BATCH_SIZE):
+    """
+    Claim one batch of pending tasks that became due and were not notified yet.
+
+    The query only touches the ix_task_pending_due partial index, and claimed
+    rows get notified_at stamped in the same transaction, so each run costs
+    the newly due tasks instead of the whole overdue backlog. Concurrent
+    runners skip each other's locked rows on PostgreSQL.
+
+    notified_at is the claim time (not now): it is the watermark the web
+    processes deliver from (get_notified_tasks). Returns the number claimed.
+    """
+    now = now or datetime.now(BRAZIL_TZ)
+    ids = db.session.execute(
+        select(Task.id)
+        .where(
+            Task.completed == False,
+            Task.notified_at.is_(None),
+            Task.due_date <= now
+        )
+        .order_by(Task.due_date, Task.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    if not ids:
+        db.session.rollback()
+        return 0
+
+    db.session.execute(
+        update(Task)
+        .where(Task.id.in_(ids))
+        .values(notified_at=datetime.now(BRAZIL_TZ))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return len(ids)
+
+def notify_due_tasks(now=None, batch_size=DUE_BATCH_SIZE):
+    """
+    Job do sweeper: reivindica, em todos os shards, as tarefas que venceram
+    desde a última execução, de todos os usuários (conectados ou não), até
+    esvaziar a janela. Roda num único processo; a entrega aos streams fica com
+    o DueTaskScheduler de cada processo web. Retorna o total reivindicado.
+    """
+    now = now or datetime.now(BRAZIL_TZ)
+    claimed = 0
+    for shard in shard_router.shard_names():
+        while True:
+            with shard_router.using(shard):
+                count = claim_due_tasks(now=now, batch_size=batch_size)
+            claimed += count
+            if count < batch_size:
+                break
+    return claimed
+
+def get_notified_tasks(since, until, user_ids):
+    """
+    Tasks of user_ids claimed in the (since, until] window, as
+    {user_id: [task, ...]}. Reads the ix_task_notified index, so the cost is
+    the tasks notified in the window, not how many are overdue.
+    """
+    grouped = {}
+    for shard, shard_user_ids in shard_router.group_by_shard(db, user_ids):
+        for i in range(0, len(shard_user_ids), USER_CHUNK_SIZE):
+            with shard_router.using(shard):
+                rows = db.session.execute(
+                    select(
+                        Task.id, Task.user_id, Task.title, Task.due_date, Task.is_recurring, Task.recurrence_type
+                    ).where(
+                        Task.notified_at > since,
+                        Task.notified_at <= until,
+                        Task.completed == False,
+                        Task.user_id.in_(shard_user_ids[i:i + USER_CHUNK_SIZE])
+                    ).order_by(Task.notified_at, Task.id)
+                ).all()
+            for row in rows:
+                grouped.setdefault(row.user_id, []).append(row)
+    return grouped
+
+def task_event(row):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'due_date': row.due_date.isoformat() if row.due_date else None,
+        'is_recurring': row.is_recurring,
+        'recurrence_type': row.recurrence_type
+    }
+
+def user_due_tasks_query(user_id, now=None):
+    now = now or datetime.now(BRAZIL_TZ)
+    return select(Task).where(
+        Task.user_id == user_id,
+        Task.completed == False,
+        Task.due_date <= now
+    )
+
+def get_user_due_tasks(user_id):
+    """
+    Get the pending tasks of one user that are already due.
     """
-    Get all tasks that are due but not completed.
+    return db.session.scalars(user_due_tasks_query(user_id)).all()
+
+def already_sent(sent, task):
+    """
+    True when task (an event payload) went out in the stream's initial state.
+    Each key matches once: the claim of a task that was already due when the
+    stream opened is not sent twice, but the same task due again later is.
+    """
+    key = (task['id'], task['due_date'])
+    if key in sent:
+        sent.discard(key)
+        return True
+    return False
+
+class DueTaskScheduler:
+    """
+    Agendador único por processo que alimenta os streams SSE de notificações.
+
+    Quem reivindica as tarefas vencidas é o job notify_due_tasks do sweeper,
+    uma vez para todos os usuários. A cada intervalo este agendador lê as
+    tarefas reivindicadas desde a última leitura (marca d'água em
+    notified_at) dos usuários com conexões abertas neste processo e publica
+    na fila de cada conexão. Assim toda aba recebe o evento, em qualquer
+    worker, e o custo no banco não depende do número de abas abertas.
+
+    A leitura fica lag segundos atrás do relógio, para não perder claims
+    ainda não confirmados (ou carimbados por um relógio um pouco adiantado).
     """
-    now = datetime.now(BRAZIL_TZ)
-    due_tasks = Task.query.filter(
-        Task.due_date <= now,
-        Task.completed == False
-    ).all()
-    
-    return due_tasks
\ No newline at end of file
+
+    def __init__(self, interval=30, queue_size=100, lag=5):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.lag = lag
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._app = None
+        self._since = datetime.now(BRAZIL_TZ) - timedelta(seconds=lag)
+
+    def start(self, app):
+        """Start the background loop once per process."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._app = app
+            self.interval = app.config.get('NOTIFICATION_INTERVAL_SECONDS', self.interval)
+            self.lag = app.config.get('NOTIFICATION_DELIVERY_LAG_SECONDS', self.lag)
+            self._thread = threading.Thread(target=self._run, name='due-task-scheduler')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def subscribe(self, user_id, events=None):
+        """
+        Register a connection and return the queue its events arrive on. events
+        may be any object with put_nowait raising queue.Full (the async views
+        pass one that hands the event over to their event loop).
+        """
+        if events is None:
+            events = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(events)
+        return events
+
+    def unsubscribe(self, user_id, events):
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues is None:
+                return
+            queues.discard(events)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, user_id, payload):
+        with self._lock:
+            queues = list(self._subscribers.get(user_id, ()))
+        for events in queues:
+            try:
+                events.put_nowait(payload)
+            except queue.Full:
+                # Cliente lento: descarta o evento em vez de bloquear o agendador
+                pass
+        return len(queues)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with self._app.app_context():
+                    self.run_once()
+            except Exception:
+                logger.exception('Erro no agendador de notificações')
+
+    def run_once(self, now=None):
+        """
+        Publica para os usuários conectados as tarefas reivindicadas desde a
+        última execução. Deve rodar dentro de um app context.
+        """
+        until = (now or datetime.now(BRAZIL_TZ)) - timedelta(seconds=self.lag)
+        with self._lock:
+            since, user_ids = self._since, list(self._subscribers)
+        if until <= since:
+            return 0
+        if not user_ids:
+            self._since = until
+            return 0
+
+        published = 0
+        try:
+            for user_id, rows in get_notified_tasks(since, until, user_ids).items():
+                for row in rows:
+                    published += self.publish(user_id, task_event(row))
+        finally:
+            db.session.remove()
+        # Só avança depois da leitura: uma falha repete a mesma janela
+        self._since = until
+        return published
+
+scheduler = DueTaskScheduler()
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        print(f"Total de tarefas notificadas: {notify_due_tasks()}")
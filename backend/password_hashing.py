@@ -0,0 +1,93 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+import bcrypt
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+def _check(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+def hash_rounds(password_hash):
+    """Return the cost factor stored in a bcrypt hash ($2b$<cost>$...)."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+class PasswordHasher:
+    """
+    Executa bcrypt em um pool de processos dedicado com fila limitada.
+
+    bcrypt segura a CPU por centenas de milissegundos; fora do worker do
+    gunicorn ele não trava as requisições de tarefas que estão na fila.
+    Com BCRYPT_POOL_WORKERS = 0 o hash roda inline (útil em scripts e testes).
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 2
+        self.queue_size = 32
+        self.timeout = 10
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_ROUNDS', self.rounds)
+        self.workers = app.config.get('BCRYPT_POOL_WORKERS', self.workers)
+        self.queue_size = app.config.get('BCRYPT_QUEUE_SIZE', self.queue_size)
+        self.timeout = app.config.get('BCRYPT_TIMEOUT_SECONDS', self.timeout)
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+
+    def _get_pool(self):
+        # Criado sob demanda para que cada worker do gunicorn tenha o seu após o fork
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Fila de hash de senhas cheia')
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # A vaga só volta quando o job termina: após um timeout ele continua na
+        # fila ou rodando no pool, e liberar antes deixaria a fila crescer sem limite
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHasherBusy('Tempo esgotado aguardando o hash de senha')
+
+    def hash(self, password):
+        return self._run(_hash, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def check(self, password, password_hash):
+        return self._run(_check, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with a different cost factor."""
+        return hash_rounds(password_hash) != self.rounds
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+hasher = PasswordHasher()
@@ -0,0 +1,219 @@
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import wraps
+from flask import jsonify, request
+from metrics import RATE_LIMITED
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Escopos de cada endpoint limitado. 'bcrypt' é um balde global compartilhado
+# pelas rotas que fazem hash de senha: estourá-lo é carga demais (503), não abuso (429)
+ENDPOINT_SCOPES = {
+    'login': ('ip', 'email', 'bcrypt'),
+    'register': ('ip', 'email', 'bcrypt'),
+    'resend_verification': ('ip', 'email'),
+    'verify_email': ('ip', 'email'),
+}
+
+# Linhas paradas há mais tempo que isto já estariam com o balde cheio: podem sair
+PRUNE_IDLE_SECONDS = 3600
+PRUNE_EVERY = 1000
+
+def parse_rate(value):
+    """'20/60' -> (capacity, tokens per second): 20 requests, refilled over 60 seconds."""
+    count, seconds = str(value).split('/')
+    count, seconds = int(count), float(seconds)
+    return count, count / seconds
+
+def take_tokens(states, buckets, now):
+    """
+    Token bucket, all or nothing: one token is taken from every bucket only
+    if all of them have one.
+
+    states maps key -> (tokens, updated) for the buckets already stored;
+    buckets is a list of (key, capacity, rate). Returns (new_states, None)
+    when allowed, or (None, (key, retry_after)) for the bucket that is
+    furthest from a token.
+    """
+    new_states = {}
+    rejected = None
+    for key, capacity, rate in buckets:
+        tokens, updated = states.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - updated, 0) * rate)
+        if tokens < 1:
+            retry_after = (1 - tokens) / rate
+            if rejected is None or retry_after > rejected[1]:
+                rejected = (key, retry_after)
+        new_states[key] = (tokens - 1, now)
+    if rejected is not None:
+        return None, rejected
+    return new_states, None
+
+class MemoryBucketStore:
+    """Baldes em memória, por processo (um único worker, scripts e testes)."""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def take(self, buckets, now):
+        with self._lock:
+            new_states, rejected = take_tokens(self._states, buckets, now)
+            if new_states:
+                self._states.update(new_states)
+            return rejected
+
+class SQLiteBucketStore:
+    """
+    Baldes em um arquivo SQLite local, compartilhado por todos os workers do
+    gunicorn na mesma máquina. Cada checagem é uma transação BEGIN IMMEDIATE
+    curta; durabilidade não importa (synchronous=OFF), só a exclusão mútua.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self):
+        # Uma conexão por thread, aberta depois do fork do gunicorn
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, buckets, now):
+        connection = self._connection()
+        keys = [key for key, _, _ in buckets]
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                f"SELECT key, tokens, updated FROM bucket WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall()
+            new_states, rejected = take_tokens({key: (tokens, updated) for key, tokens, updated in rows}, buckets, now)
+            if new_states:
+                connection.executemany(
+                    'INSERT INTO bucket (key, tokens, updated) VALUES (?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                    [(key, tokens, updated) for key, (tokens, updated) in new_states.items()]
+                )
+            self._calls += 1
+            if self._calls % PRUNE_EVERY == 0:
+                connection.execute('DELETE FROM bucket WHERE updated < ?', (now - PRUNE_IDLE_SECONDS,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return rejected
+
+def limited_response(error, status, retry_after):
+    response = jsonify({'error': error})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+class RateLimiter:
+    """
+    Limites por IP, por email e de carga global (bcrypt) nas rotas de auth.
+
+    A checagem roda antes da view: uma requisição recusada não toca no banco
+    nem no pool de bcrypt, e custa uma transação no arquivo de baldes. Se o
+    arquivo falha, a requisição também é recusada (503).
+    Taxas vêm de RATE_LIMIT_<ENDPOINT>_<ESCOPO> no formato 'requisições/segundos';
+    valor vazio desliga aquele escopo.
+    """
+
+    def __init__(self):
+        self.store = None
+        self.rates = {}
+
+    def init_app(self, app):
+        kind = app.config.get('RATE_LIMIT_BACKEND', 'sqlite')
+        if kind == 'sqlite':
+            path = app.config.get('RATE_LIMIT_STORE_PATH') or os.path.join(tempfile.gettempdir(), 'todo-rate-limit.db')
+            self.store = SQLiteBucketStore(path)
+        elif kind == 'memory':
+            self.store = MemoryBucketStore()
+        elif kind == 'none':
+            self.store = None
+        else:
+            raise ValueError(f'RATE_LIMIT_BACKEND inválido: {kind}')
+
+        self.rates = {}
+        for endpoint, scopes in ENDPOINT_SCOPES.items():
+            for scope in scopes:
+                name = 'RATE_LIMIT_BCRYPT' if scope == 'bcrypt' else f'RATE_LIMIT_{endpoint.upper()}_{scope.upper()}'
+                if app.config.get(name):
+                    self.rates[(endpoint, scope)] = parse_rate(app.config[name])
+
+    def buckets(self, endpoint):
+        buckets = []
+        for scope in ENDPOINT_SCOPES[endpoint]:
+            rate = self.rates.get((endpoint, scope))
+            if rate is None:
+                continue
+            if scope == 'ip':
+                key = f'{endpoint}:ip:{request.remote_addr}'
+            elif scope == 'email':
+                data = request.get_json(silent=True)
+                email = data.get('email') if isinstance(data, dict) else None
+                if not isinstance(email, str) or not email.strip():
+                    continue
+                key = f'{endpoint}:email:{email.lower().strip()}'
+            else:
+                key = scope
+            buckets.append((key, *rate))
+        return buckets
+
+    def check(self, endpoint, now=None):
+        """None when the request may proceed, otherwise the 429/503 response."""
+        if self.store is None:
+            return None
+        buckets = self.buckets(endpoint)
+        if not buckets:
+            return None
+        try:
+            rejected = self.store.take(buckets, now if now is not None else time.time())
+        except sqlite3.Error:
+            # Arquivo de baldes travado ou indisponível (ex.: timeout do lock numa
+            # enxurrada de logins): sem como contar, recusa antes do bcrypt
+            logger.warning('Falha no rate limiter, requisição recusada', exc_info=True)
+            RATE_LIMITED.labels(endpoint, 'store').inc()
+            return limited_response('Servidor ocupado, tente novamente em instantes', 503, 1)
+        if rejected is None:
+            return None
+
+        key, retry_after = rejected
+        scope = 'bcrypt' if key == 'bcrypt' else key.split(':')[1]
+        RATE_LIMITED.labels(endpoint, scope).inc()
+        logger.info('Requisição limitada', extra={'endpoint': endpoint, 'scope': scope, 'ip': request.remote_addr})
+        if scope == 'bcrypt':
+            return limited_response('Servidor ocupado, tente novamente em instantes', 503, retry_after)
+        return limited_response(
+            f'Muitas tentativas. Tente novamente em {max(1, math.ceil(retry_after))} segundos.', 429, retry_after
+        )
+
+    def limit(self, endpoint):
+        """Decorator applying the endpoint's limits before the view runs."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                response = self.check(endpoint)
+                if response is not None:
+                    return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,251 @@
+import calendar
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_, select
+from models import db, Task, TaskSeries, BRAZIL_TZ
+from shard_router import shard_router
+from task_serialization import task_rows_query, fetch_task_rows, rows_to_dicts
+
+RECURRENCE_TYPES = ('daily', 'weekly', 'monthly')
+FIXED_STEPS = {'daily': timedelta(days=1), 'weekly': timedelta(weeks=1)}
+
+
+def as_local(value):
+    """
+    Datetime do banco no fuso UTC-3: o SQLite devolve datetimes sem fuso
+    (gravados no horário local), o PostgreSQL devolve com fuso.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=BRAZIL_TZ)
+    return value.astimezone(BRAZIL_TZ)
+
+
+def add_months(value, months, day=None):
+    """
+    Mesma data `months` meses depois, no dia `day` (padrão: o dia de value),
+    ajustado para o último dia do mês quando o mês é mais curto.
+    """
+    day = day or value.day
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+
+
+def next_recurrence_date(current_due_date, recurrence_type):
+    """
+    Calcula a próxima data de vencimento com base no tipo de recorrência.
+    Retorna None para tipos desconhecidos.
+    """
+    if recurrence_type in FIXED_STEPS:
+        return current_due_date + FIXED_STEPS[recurrence_type]
+    if recurrence_type == 'monthly':
+        return add_months(current_due_date, 1)
+    return None
+
+
+def nth_occurrence(starts_at, recurrence_type, n):
+    """
+    Vencimento da n-ésima ocorrência (0 = starts_at). Mensal conta sempre a
+    partir do dia de starts_at, então 31/01 vira 28/02 e depois 31/03 de novo.
+    """
+    if recurrence_type in FIXED_STEPS:
+        return starts_at + FIXED_STEPS[recurrence_type] * n
+    return add_months(starts_at, n)
+
+
+def first_index_from(starts_at, recurrence_type, moment):
+    """Index of the first occurrence due at or after moment, without walking the series."""
+    if moment <= starts_at:
+        return 0
+    if recurrence_type in FIXED_STEPS:
+        # Divisão com arredondamento para cima
+        return -((starts_at - moment) // FIXED_STEPS[recurrence_type])
+    n = max((moment.year - starts_at.year) * 12 + moment.month - starts_at.month - 1, 0)
+    while nth_occurrence(starts_at, recurrence_type, n) < moment:
+        n += 1
+    return n
+
+
+def expand_occurrences(starts_at, recurrence_type, window_start, window_end, until=None):
+    """Yield the due dates of a series inside [window_start, window_end), up to until."""
+    n = first_index_from(starts_at, recurrence_type, window_start)
+    while True:
+        due = nth_occurrence(starts_at, recurrence_type, n)
+        if due >= window_end or (until is not None and due > until):
+            return
+        yield due
+        n += 1
+
+
+def is_occurrence(series, moment):
+    """Whether moment is exactly one of the series' due dates."""
+    starts_at = as_local(series.starts_at)
+    n = first_index_from(starts_at, series.recurrence_type, moment)
+    until = as_local(series.until)
+    return nth_occurrence(starts_at, series.recurrence_type, n) == moment and (until is None or moment <= until)
+
+
+def virtual_occurrence(series, due):
+    return {
+        'id': None,
+        'title': series.title,
+        'description': series.description,
+        'due_date': due,
+        'completed': False,
+        'is_recurring': True,
+        'recurrence_type': series.recurrence_type,
+        'series_id': series.id,
+        'occurrence_date': due,
+        'virtual': True
+    }
+
+
+def occurrence_task(series, due):
+    """Task row of the series occurrence due at due, with the series' fields."""
+    return Task(
+        title=series.title,
+        description=series.description,
+        due_date=due,
+        completed=False,
+        is_recurring=True,
+        recurrence_type=series.recurrence_type,
+        series_id=series.id,
+        occurrence_date=due,
+        user_id=series.user_id
+    )
+
+
+def materialize_occurrences(series, now, existing=()):
+    """
+    Grava em task as ocorrências da série vencidas até now e a primeira depois
+    dele, a partir de series.materialized_until, e avança esse marco. Datas em
+    existing (ocorrências já alteradas pelo PUT de ocorrência) são puladas.
+    Não faz commit; retorna quantas tarefas foram adicionadas.
+    """
+    starts_at = as_local(series.starts_at)
+    until = as_local(series.until)
+    done = as_local(series.materialized_until)
+    n = 0 if done is None else first_index_from(starts_at, series.recurrence_type, done + timedelta(microseconds=1))
+
+    added = 0
+    while True:
+        due = nth_occurrence(starts_at, series.recurrence_type, n)
+        if until is not None and due > until:
+            # Série encerrada: o marco no fim dela tira a série das próximas rodadas
+            series.materialized_until = max(until, done) if done is not None else until
+            return added
+        if due not in existing:
+            db.session.add(occurrence_task(series, due))
+            added += 1
+        series.materialized_until = done = due
+        if due > now:
+            return added
+        n += 1
+
+
+def materialize_due_series(now=None):
+    """
+    Sweeper job: grava as ocorrências de séries que venceram desde a última
+    rodada e a próxima de cada uma, shard por shard, em lotes de
+    SWEEPER_BATCH_SIZE séries. Assim elas aparecem em GET /api/tasks, no
+    summary e no claim de tarefas vencidas como qualquer outra tarefa.
+    """
+    now = now or datetime.now(BRAZIL_TZ)
+    batch_size = current_app.config.get('SWEEPER_BATCH_SIZE', 500)
+
+    materialized = 0
+    for shard in shard_router.shard_names():
+        with shard_router.using(shard):
+            while True:
+                statement = select(TaskSeries).where(
+                    or_(TaskSeries.materialized_until.is_(None), TaskSeries.materialized_until <= now),
+                    or_(
+                        TaskSeries.until.is_(None),
+                        TaskSeries.materialized_until.is_(None),
+                        TaskSeries.until > TaskSeries.materialized_until
+                    )
+                )
+                # Usuários no meio de um shard_tool move ficam para a próxima rodada
+                moving = shard_router.moving_user_ids(db)
+                if moving:
+                    statement = statement.where(TaskSeries.user_id.not_in(moving))
+                series_list = db.session.scalars(
+                    statement.order_by(TaskSeries.id).limit(batch_size).with_for_update(skip_locked=True)
+                ).all()
+                if not series_list:
+                    break
+
+                statement = select(Task.series_id, Task.occurrence_date).where(
+                    Task.series_id.in_([series.id for series in series_list])
+                )
+                marks = [series.materialized_until for series in series_list]
+                if None not in marks:
+                    # Só as ocorrências depois do marco podem colidir com as novas
+                    statement = statement.where(Task.occurrence_date > min(marks))
+                existing = {}
+                for series_id, occurrence_date in db.session.execute(statement):
+                    existing.setdefault(series_id, set()).add(as_local(occurrence_date))
+                for series in series_list:
+                    materialized += materialize_occurrences(series, now, existing.get(series.id, ()))
+                db.session.commit()
+
+                if len(series_list) < batch_size:
+                    break
+    return materialized
+
+
+def calendar_occurrences(user_id, window_start, window_end):
+    """
+    Ocorrências do usuário com vencimento em [window_start, window_end),
+    ordenadas por vencimento.
+
+    - Tarefas comuns (e as recorrentes legadas, encadeadas por parent_task_id)
+      vêm do banco pelo vencimento.
+    - Séries são expandidas em memória só dentro da janela; ocorrências já
+      materializadas (alteradas ou concluídas) substituem as virtuais.
+
+    Custa três consultas, independente de quantas ocorrências a janela tem.
+    """
+    rows = fetch_task_rows(
+        task_rows_query().where(
+            Task.user_id == user_id,
+            Task.series_id.is_(None),
+            Task.due_date >= window_start,
+            Task.due_date < window_end
+        )
+    )
+    occurrences = [dict(row, virtual=False) for row in rows_to_dicts(rows)]
+
+    series_list = db.session.scalars(
+        select(TaskSeries).where(
+            TaskSeries.user_id == user_id,
+            TaskSeries.starts_at < window_end,
+            (TaskSeries.until.is_(None)) | (TaskSeries.until >= window_start)
+        )
+    ).all()
+    if series_list:
+        materialized = fetch_task_rows(
+            task_rows_query().where(
+                Task.user_id == user_id,
+                Task.series_id.in_([series.id for series in series_list]),
+                Task.occurrence_date >= window_start,
+                Task.occurrence_date < window_end
+            )
+        )
+        overrides = {
+            (row['series_id'], as_local(row['occurrence_date'])): dict(row, virtual=False)
+            for row in rows_to_dicts(materialized)
+        }
+        for series in series_list:
+            dates = expand_occurrences(
+                as_local(series.starts_at), series.recurrence_type,
+                window_start, window_end, as_local(series.until)
+            )
+            for due in dates:
+                occurrences.append(overrides.pop((series.id, due), None) or virtual_occurrence(series, due))
+
+    occurrences.sort(key=lambda item: (as_local(item['due_date'] or item['occurrence_date']), item['id'] or 0))
+    return occurrences
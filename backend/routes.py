@@ -1,26 +1,213 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Task, User, BRAZIL_TZ
+from models import db, Task, TaskSeries, TaskTombstone, BRAZIL_TZ, bump_task_revision, task_sync_state
+from task_queries import paginate_tasks, task_summary, wants_page, InvalidQuery
+from task_search import search_tasks
+from task_archive import paginate_archived_tasks
+from recurrence import RECURRENCE_TYPES, as_local, calendar_occurrences, is_occurrence, materialize_occurrences, next_recurrence_date, occurrence_task
+from task_serialization import task_rows_query, fetch_task_rows, stream_task_rows, iter_json_array, rows_to_dicts, dumps
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from structured_logging import get_logger
+from task_cache import task_cache
+from db_routing import read_routing
+from shard_router import ShardMoving
 from datetime import datetime, timezone, timedelta
-import calendar
+import itertools
 
 api = Blueprint('api', __name__)
+logger = get_logger(__name__)
+
+def parse_due_date(value):
+    """Converte a string ISO recebida do cliente para datetime no fuso UTC-3."""
+    # Converte a string ISO para datetime com timezone
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # Convertemos para o fuso horário local (UTC-3)
+    return dt.astimezone(BRAZIL_TZ)
+
+def due_date_changed(current, new):
+    """Compara vencimentos pelo instante: o SQLite devolve datetimes sem fuso."""
+    return as_local(current) != as_local(new)
+
+def full_task_list(user_id, revision=None):
+    """
+    Array JSON com todas as tarefas do usuário: o payload em cache para a
+    revisão (bytes) ou um gerador que lê só as colunas da API (sem ORM) em
+    streaming e, com o cache ligado, guarda o resultado ao final.
+    """
+    statement = task_rows_query().where(Task.user_id == user_id)
+    if not task_cache.enabled:
+        return iter_json_array(stream_task_rows(statement))
+    
+    # Payload já serializado para a revisão atual: sem consulta das tarefas nem encoding
+    if revision is None:
+        revision = task_cache.current_revision(user_id)
+    payload = task_cache.get(user_id, revision)
+    if payload is not None:
+        return payload
+    return task_cache.store_while_streaming(user_id, revision, iter_json_array(stream_task_rows(statement)))
+
+def json_response(body):
+    """Resposta JSON de um payload pronto (bytes) ou de um gerador de pedaços."""
+    if not isinstance(body, bytes):
+        body = stream_with_context(body)
+    return current_app.response_class(body, mimetype='application/json')
 
 @api.route('/tasks', methods=['GET'])
 @jwt_required()
+@read_routing.replica_reads
 def get_tasks():
     try:
         current_user_id = int(get_jwt_identity())
-        print(f"Carregando tarefas para usuário: {current_user_id}")
-        tasks = Task.query.filter_by(user_id=current_user_id).all()
-        print(f"Encontradas {len(tasks)} tarefas")
-        return jsonify([task.to_dict() for task in tasks])
+        logger.debug('Carregando tarefas', extra={'user_id': current_user_id})
+        
+        # Com parâmetros de página (status, due, is_recurring, sort, limit, cursor) a
+        # listagem é paginada por keyset; sem eles mantém a resposta completa legada
+        if wants_page(request.args):
+            # Lida antes da página: o cliente sincroniza a partir dela (GET /tasks/changes)
+            sync_cursor = task_cache.current_revision(current_user_id)
+            try:
+                rows, next_cursor = paginate_tasks(current_user_id, request.args)
+            except InvalidQuery as e:
+                return jsonify({'error': str(e)}), 400
+            return current_app.response_class(
+                dumps({
+                    'tasks': rows_to_dicts(rows),
+                    'next_cursor': next_cursor,
+                    'sync_cursor': str(sync_cursor)
+                }),
+                mimetype='application/json'
+            )
+        
+        return json_response(full_task_list(current_user_id))
     except Exception as e:
-        print(f"Erro ao carregar tarefas: {str(e)}")
+        logger.exception('Erro ao carregar tarefas')
         return jsonify({'error': str(e)}), 500
 
+@api.route('/tasks/summary', methods=['GET'])
+@jwt_required()
+@read_routing.replica_reads
+def get_task_summary():
+    """
+    Contadores por filtro (today, tomorrow, future, no-date, recurring...) para
+    os badges do painel, sem baixar as tarefas.
+    """
+    current_user_id = int(get_jwt_identity())
+    now = datetime.now(BRAZIL_TZ)
+    if not task_cache.enabled:
+        return current_app.response_class(dumps(task_summary(current_user_id, now)), mimetype='application/json')
+    
+    # Qualquer escrita incrementa a revisão; o dia entra na chave porque "hoje" muda à meia-noite
+    key = (task_cache.current_revision(current_user_id), now.date())
+    payload = task_cache.get_summary(current_user_id, key)
+    if payload is None:
+        payload = dumps(task_summary(current_user_id, now))
+        task_cache.set_summary(current_user_id, key, payload)
+    return current_app.response_class(payload, mimetype='application/json')
+
+@api.route('/tasks/search', methods=['GET'])
+@jwt_required()
+@read_routing.replica_reads
+def search_user_tasks():
+    """
+    Busca textual em título e descrição (q, limit, cursor), por relevância.
+    Usa o índice full-text do banco: tsvector + GIN no PostgreSQL, FTS5 no SQLite.
+    """
+    current_user_id = int(get_jwt_identity())
+    try:
+        tasks, next_cursor = search_tasks(current_user_id, request.args)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+    return current_app.response_class(
+        dumps({'tasks': tasks, 'next_cursor': next_cursor}),
+        mimetype='application/json'
+    )
+
+@api.route('/tasks/archive', methods=['GET'])
+@jwt_required()
+@read_routing.replica_reads
+def get_archived_tasks():
+    """
+    Tarefas concluídas arquivadas pelo sweeper (limit, cursor), das concluídas
+    mais recentemente para as mais antigas. Não aparecem em GET /api/tasks.
+    """
+    current_user_id = int(get_jwt_identity())
+    try:
+        tasks, next_cursor = paginate_archived_tasks(current_user_id, request.args)
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+    return current_app.response_class(
+        dumps({'tasks': tasks, 'next_cursor': next_cursor}),
+        mimetype='application/json'
+    )
+
+@api.route('/tasks/changes', methods=['GET'])
+@jwt_required()
+def get_task_changes():
+    """
+    Sincronização incremental: retorna apenas as tarefas criadas/alteradas e os
+    ids excluídos desde o cursor `since`. Sem `since`, retorna o estado completo.
+    """
+    current_user_id = int(get_jwt_identity())
+    revision, sync_floor = task_sync_state(db.session, current_user_id)
+    
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({'error': 'Cursor inválido'}), 400
+    
+    # Cursor à frente do servidor (ex.: banco recriado) ou anterior a tombstones que o
+    # sweeper já removeu: força o cliente a recarregar tudo
+    reset = since is None or since > revision or since < sync_floor
+    
+    etag = f"tasks-{current_user_id}-{'full' if reset else since}-{revision}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    if reset:
+        # Mesmo array (e mesmo cache) de GET /api/tasks, com o cabeçalho da sincronização antes
+        head = dumps({'cursor': str(revision), 'reset': True, 'deleted': []})[:-1] + b',"tasks":'
+        body = full_task_list(current_user_id, revision)
+        if isinstance(body, bytes):
+            body = head + body + b'}'
+        else:
+            body = itertools.chain((head,), body, (b'}',))
+        response = json_response(body)
+        response.set_etag(etag)
+        return response
+    
+    if since == revision:
+        # Nada mudou: nenhuma consulta além da leitura do contador
+        tasks = []
+        deleted_ids = []
+    else:
+        tasks = fetch_task_rows(
+            task_rows_query().where(Task.user_id == current_user_id, Task.revision > since)
+        )
+        tombstones = db.session.execute(
+            select(TaskTombstone.task_id).where(
+                TaskTombstone.user_id == current_user_id,
+                TaskTombstone.revision > since
+            )
+        ).scalars()
+        # Ids reaproveitados por tarefas novas não devem ser removidos no cliente
+        changed_ids = {task.id for task in tasks}
+        deleted_ids = sorted(set(tombstones) - changed_ids)
+    
+    response = current_app.response_class(
+        dumps({'cursor': str(revision), 'reset': False, 'tasks': rows_to_dicts(tasks), 'deleted': deleted_ids}),
+        mimetype='application/json'
+    )
+    response.set_etag(etag)
+    return response
+
 @api.route('/tasks/<int:task_id>', methods=['GET'])
 @jwt_required()
+@read_routing.replica_reads
 def get_task(task_id):
     current_user_id = int(get_jwt_identity())
     task = Task.query.filter_by(id=task_id, user_id=current_user_id).first_or_404()
@@ -34,10 +221,7 @@ def create_task():
     
     due_date = None
     if data.get('due_date'):
-        # Converte a string ISO para datetime com timezone
-        dt = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
-        # Convertemos para o fuso horário local (UTC-3)
-        due_date = dt.astimezone(BRAZIL_TZ)
+        due_date = parse_due_date(data['due_date'])
     
     task = Task(
         title=data['title'],
@@ -68,10 +252,11 @@ def update_task(task_id):
     if 'description' in data:
         task.description = data['description']
     if 'due_date' in data and data['due_date']:
-        # Converte a string ISO para datetime com timezone
-        dt = datetime.fromisoformat(data['due_date'].replace('Z', '+00:00'))
-        # Convertemos para o fuso horário local (UTC-3)
-        task.due_date = dt.astimezone(BRAZIL_TZ)
+        due_date = parse_due_date(data['due_date'])
+        if due_date_changed(task.due_date, due_date):
+            task.due_date = due_date
+            # Novo vencimento: a tarefa volta a ser elegível para notificação
+            task.notified_at = None
     if 'completed' in data:
         task.completed = data['completed']
     if 'is_recurring' in data:
@@ -80,7 +265,8 @@ def update_task(task_id):
         task.recurrence_type = data['recurrence_type']
     
     # Se a tarefa for marcada como concluída e for recorrente, criar a próxima tarefa
-    if task.completed and not old_completed_status and task.is_recurring and task.due_date:
+    # (ocorrências de uma série não: a próxima já existe virtualmente no calendário)
+    if task.completed and not old_completed_status and task.is_recurring and task.due_date and task.series_id is None:
         create_next_recurring_task(task)
     
     db.session.commit()
@@ -116,49 +302,417 @@ def delete_completed_tasks():
     # Return success response with count of deleted tasks
     return jsonify({"deleted_count": len(completed_tasks)}), 200
 
-def create_next_recurring_task(task):
+# Campos que as operações de lote podem alterar
+BATCH_TASK_FIELDS = ('title', 'description', 'due_date', 'completed', 'is_recurring', 'recurrence_type')
+
+TITLE_MAX_LENGTH = Task.__table__.c.title.type.length
+
+def validate_task_fields(fields, creating):
     """
-    Cria a próxima tarefa recorrente baseada no tipo de recorrência.
+    Valida os campos de uma operação do lote antes de qualquer escrita; levanta
+    ValueError com a mensagem devolvida no resultado da operação.
     """
-    current_due_date = task.due_date
-    next_due_date = None
+    if creating or 'title' in fields:
+        title = fields.get('title')
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError('Título é obrigatório')
+        if len(title) > TITLE_MAX_LENGTH:
+            raise ValueError(f'Título com mais de {TITLE_MAX_LENGTH} caracteres')
+    if fields.get('description') is not None and not isinstance(fields['description'], str):
+        raise ValueError('Descrição inválida')
+    for field in ('completed', 'is_recurring'):
+        if field in fields and not isinstance(fields[field], bool):
+            raise ValueError(f'Campo {field} deve ser booleano')
+    if fields.get('recurrence_type') is not None and fields['recurrence_type'] not in RECURRENCE_TYPES:
+        raise ValueError('Tipo de recorrência inválido')
+    if fields.get('due_date'):
+        if not isinstance(fields['due_date'], str):
+            raise ValueError('Data inválida')
+        try:
+            parse_due_date(fields['due_date'])
+        except ValueError:
+            raise ValueError('Data inválida')
+
+@api.route('/tasks/batch', methods=['POST'])
+@jwt_required()
+def batch_tasks():
+    """
+    Aplica várias operações de tarefas em uma única transação.
     
-    # Calcular próxima data de vencimento com base no tipo de recorrência
-    if task.recurrence_type == 'daily':
-        next_due_date = current_due_date + timedelta(days=1)
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": 1, "data": {...}},
+                          {"op": "delete", "id": 2}]}
     
-    elif task.recurrence_type == 'weekly':
-        next_due_date = current_due_date + timedelta(weeks=1)
+    Ou todas as operações são aplicadas, ou nenhuma: cada operação é validada
+    antes da escrita e as inválidas voltam com status 400 no resultado.
+    Criações, alterações e exclusões vão cada uma em um único comando, e
+    tarefas recorrentes concluídas geram a próxima ocorrência como no
+    endpoint de tarefa única.
+    """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'Lista de operações é obrigatória'}), 400
+    max_operations = current_app.config.get('TASK_BATCH_MAX_OPERATIONS', 500)
+    if len(operations) > max_operations:
+        return jsonify({'error': f'Máximo de {max_operations} operações por lote'}), 400
+    
+    # Estado atual das tarefas referenciadas, em uma única consulta
+    referenced_ids = {
+        op.get('id') for op in operations
+        if isinstance(op, dict) and op.get('op') in ('update', 'delete') and isinstance(op.get('id'), int)
+    }
+    state = {}
+    if referenced_ids:
+        rows = db.session.execute(
+            select(
+                Task.id, Task.title, Task.description, Task.due_date, Task.completed,
+                Task.is_recurring, Task.recurrence_type, Task.series_id
+            ).where(Task.user_id == current_user_id, Task.id.in_(referenced_ids))
+        ).all()
+        state = {row.id: dict(row._mapping) for row in rows}
+    
+    results = []
+    creates = []
+    updates = {}
+    deleted_ids = []
+    spawns = []
+    has_errors = False
     
-    elif task.recurrence_type == 'monthly':
-        # Pegar dia do mês atual
-        current_day = current_due_date.day
-        current_month = current_due_date.month
-        current_year = current_due_date.year
+    for index, op in enumerate(operations):
+        result = {'index': index, 'op': op.get('op') if isinstance(op, dict) else None}
+        results.append(result)
+        try:
+            if not isinstance(op, dict) or op.get('op') not in ('create', 'update', 'delete'):
+                raise ValueError('Operação inválida')
+            fields = op.get('data') or {}
+            if not isinstance(fields, dict):
+                raise ValueError('Dados da operação inválidos')
+            
+            if op['op'] in ('create', 'update'):
+                validate_task_fields(fields, creating=op['op'] == 'create')
+            
+            if op['op'] == 'create':
+                creates.append((index, {
+                    'title': fields['title'],
+                    'description': fields.get('description', ''),
+                    'due_date': parse_due_date(fields['due_date']) if fields.get('due_date') else None,
+                    'completed': fields.get('completed', False),
+                    'is_recurring': fields.get('is_recurring', False),
+                    'recurrence_type': fields.get('recurrence_type'),
+                    'parent_task_id': None,
+                    'notified_at': None
+                }))
+                continue
+            
+            task_id = op.get('id')
+            if task_id not in state:
+                result['status'] = 404
+                raise ValueError('Tarefa não encontrada')
+            result['id'] = task_id
+            
+            if op['op'] == 'delete':
+                del state[task_id]
+                updates.pop(task_id, None)
+                deleted_ids.append(task_id)
+                continue
+            
+            # update: mesma semântica do PUT /tasks/<id>
+            current = state[task_id]
+            changes = updates.setdefault(task_id, {})
+            old_completed_status = current['completed']
+            for field in BATCH_TASK_FIELDS:
+                if field not in fields:
+                    continue
+                if field == 'due_date':
+                    if fields['due_date']:
+                        due_date = parse_due_date(fields['due_date'])
+                        if due_date_changed(current['due_date'], due_date):
+                            current['due_date'] = changes['due_date'] = due_date
+                            changes['notified_at'] = None
+                else:
+                    current[field] = changes[field] = fields[field]
+            
+            if (current['completed'] and not old_completed_status and current['is_recurring']
+                    and current['due_date'] and current['series_id'] is None):
+                next_due_date = next_recurrence_date(current['due_date'], current['recurrence_type'])
+                if next_due_date:
+                    spawns.append({
+                        'title': current['title'],
+                        'description': current['description'],
+                        'due_date': next_due_date,
+                        'completed': False,
+                        'is_recurring': current['is_recurring'],
+                        'recurrence_type': current['recurrence_type'],
+                        'parent_task_id': task_id,
+                        'notified_at': None
+                    })
+        except (ValueError, TypeError, AttributeError) as e:
+            has_errors = True
+            result.setdefault('status', 400)
+            result['error'] = str(e)
+    
+    if has_errors:
+        for result in results:
+            result.setdefault('status', 'skipped')
+        return jsonify({'error': 'Nenhuma operação foi aplicada', 'results': results}), 400
+    
+    try:
+        revision = bump_task_revision(db.session, current_user_id)
+        now = datetime.now(BRAZIL_TZ)
+        stamp = {'user_id': current_user_id, 'revision': revision, 'updated_at': now}
         
-        # Calcular próximo mês
-        if current_month == 12:
-            next_month = 1
-            next_year = current_year + 1
-        else:
-            next_month = current_month + 1
-            next_year = current_year
+        new_rows = [dict(row, **stamp) for _, row in creates] + [dict(row, **stamp) for row in spawns]
+        new_ids = []
+        if new_rows:
+            new_ids = db.session.scalars(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                new_rows
+            ).all()
         
-        # Verificar o número de dias no próximo mês
-        days_in_next_month = calendar.monthrange(next_year, next_month)[1]
+        if updates:
+            db.session.execute(
+                update(Task),
+                [dict(changes, id=task_id, revision=revision, updated_at=now) for task_id, changes in updates.items()]
+            )
         
-        # Ajustar para o último dia do mês se o dia atual for maior
-        if current_day > days_in_next_month:
-            next_day = days_in_next_month
-        else:
-            next_day = current_day
+        if deleted_ids:
+            db.session.execute(
+                delete(Task)
+                .where(Task.user_id == current_user_id, Task.id.in_(deleted_ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.execute(insert(TaskTombstone), [
+                {'task_id': task_id, 'user_id': current_user_id, 'revision': revision, 'deleted_at': now}
+                for task_id in deleted_ids
+            ])
         
-        # Criar nova data com mesmo horário
-        next_due_date = current_due_date.replace(
-            year=next_year,
-            month=next_month,
-            day=next_day
-        )
+        db.session.commit()
+    except ShardMoving:
+        # Vira 503 com Retry-After no handler do app
+        db.session.rollback()
+        raise
+    except Exception:
+        # O detalhe (SQL e parâmetros) fica só no log
+        logger.exception('Erro ao aplicar lote de tarefas', extra={'user_id': current_user_id})
+        db.session.rollback()
+        return jsonify({'error': 'Erro ao aplicar operações; nenhuma foi aplicada'}), 500
+    
+    # Uma consulta para devolver o estado final das tarefas criadas/alteradas
+    returned_ids = set(new_ids) | set(updates)
+    tasks = {}
+    if returned_ids:
+        tasks = {task.id: task for task in Task.query.filter(Task.id.in_(returned_ids)).all()}
+    
+    created_ids = new_ids[:len(creates)]
+    for (index, _), task_id in zip(creates, created_ids):
+        results[index].update({'status': 201, 'id': task_id, 'task': tasks[task_id].to_dict()})
+    for result in results:
+        if result['op'] == 'update':
+            # Atualizada e excluída no mesmo lote: não há estado final a devolver
+            task = tasks.get(result['id'])
+            result.update({'status': 200, 'task': task.to_dict() if task else None})
+        elif result['op'] == 'delete':
+            result['status'] = 204
+    
+    return jsonify({
+        'results': results,
+        'spawned': [tasks[task_id].to_dict() for task_id in new_ids[len(creates):]]
+    }), 200
+
+def parse_calendar_bound(value, name):
+    """Limite da janela do calendário; datas sem fuso são interpretadas em UTC-3."""
+    if not value:
+        raise ValueError(f'Parâmetro {name} é obrigatório')
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Data inválida em {name}: {value}')
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=BRAZIL_TZ)
+    return dt.astimezone(BRAZIL_TZ)
+
+@api.route('/tasks/calendar', methods=['GET'])
+@jwt_required()
+@read_routing.replica_reads
+def get_calendar():
+    """
+    Tarefas e ocorrências de séries com vencimento em [from, to).
+
+    Séries são expandidas só dentro da janela; ocorrências ainda não
+    alteradas vêm com "virtual": true e "id": null. Para alterar ou concluir
+    uma delas, use PUT /api/tasks/series/<id>/occurrences.
+    """
+    current_user_id = int(get_jwt_identity())
+    try:
+        window_start = parse_calendar_bound(request.args.get('from'), 'from')
+        window_end = parse_calendar_bound(request.args.get('to'), 'to')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if window_end <= window_start:
+        return jsonify({'error': 'O parâmetro to deve ser posterior a from'}), 400
+    max_days = current_app.config.get('CALENDAR_MAX_RANGE_DAYS', 366)
+    if window_end - window_start > timedelta(days=max_days):
+        return jsonify({'error': f'Intervalo máximo de {max_days} dias'}), 400
+    
+    occurrences = calendar_occurrences(current_user_id, window_start, window_end)
+    return current_app.response_class(
+        dumps({'from': window_start, 'to': window_end, 'occurrences': occurrences}),
+        mimetype='application/json'
+    )
+
+@api.route('/tasks/series', methods=['GET'])
+@jwt_required()
+@read_routing.replica_reads
+def get_task_series():
+    current_user_id = int(get_jwt_identity())
+    series_list = TaskSeries.query.filter_by(user_id=current_user_id).order_by(TaskSeries.id).all()
+    return jsonify([series.to_dict() for series in series_list])
+
+@api.route('/tasks/series', methods=['POST'])
+@jwt_required()
+def create_task_series():
+    """
+    Cria uma série recorrente. Só as ocorrências já vencidas e a próxima são
+    gravadas em task; as seguintes o sweeper grava conforme vencem.
+    """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    
+    if not data.get('title'):
+        return jsonify({'error': 'Título é obrigatório'}), 400
+    if data.get('recurrence_type') not in RECURRENCE_TYPES:
+        return jsonify({'error': 'Tipo de recorrência inválido'}), 400
+    if not data.get('starts_at'):
+        return jsonify({'error': 'Data da primeira ocorrência é obrigatória'}), 400
+    try:
+        starts_at = parse_due_date(data['starts_at'])
+        until = parse_due_date(data['until']) if data.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'Data inválida'}), 400
+    
+    series = TaskSeries(
+        user_id=current_user_id,
+        title=data['title'],
+        description=data.get('description', ''),
+        recurrence_type=data['recurrence_type'],
+        starts_at=starts_at,
+        until=until
+    )
+    db.session.add(series)
+    db.session.flush()
+    materialize_occurrences(series, datetime.now(BRAZIL_TZ))
+    db.session.commit()
+    
+    return jsonify(series.to_dict()), 201
+
+@api.route('/tasks/series/<int:series_id>', methods=['PUT'])
+@jwt_required()
+def update_task_series(series_id):
+    """
+    Altera título, descrição ou fim da série. As ocorrências virtuais e as
+    pendentes ainda com o texto da série mudam junto; as alteradas ou
+    concluídas mantêm o que foi gravado nelas.
+    """
+    current_user_id = int(get_jwt_identity())
+    series = TaskSeries.query.filter_by(id=series_id, user_id=current_user_id).first_or_404()
+    data = request.get_json(silent=True) or {}
+    pending = Task.query.filter_by(series_id=series.id, user_id=current_user_id, completed=False).all()
+    
+    if 'title' in data:
+        if not data['title']:
+            return jsonify({'error': 'Título é obrigatório'}), 400
+        for task in pending:
+            if task.title == series.title:
+                task.title = data['title']
+        series.title = data['title']
+    if 'description' in data:
+        for task in pending:
+            if task.description == series.description:
+                task.description = data['description']
+        series.description = data['description']
+    if 'until' in data:
+        try:
+            series.until = parse_due_date(data['until']) if data['until'] else None
+        except ValueError:
+            return jsonify({'error': 'Data inválida'}), 400
+    
+    db.session.commit()
+    return jsonify(series.to_dict())
+
+@api.route('/tasks/series/<int:series_id>', methods=['DELETE'])
+@jwt_required()
+def delete_task_series(series_id):
+    """Remove a série e as ocorrências materializadas dela."""
+    current_user_id = int(get_jwt_identity())
+    series = TaskSeries.query.filter_by(id=series_id, user_id=current_user_id).first_or_404()
+    
+    # Pelo ORM para que o before_flush grave os tombstones da sincronização
+    for task in Task.query.filter_by(series_id=series.id, user_id=current_user_id).all():
+        db.session.delete(task)
+    db.session.delete(series)
+    db.session.commit()
+    
+    return '', 204
+
+@api.route('/tasks/series/<int:series_id>/occurrences', methods=['PUT'])
+@jwt_required()
+def update_occurrence(series_id):
+    """
+    Materializa uma ocorrência da série e aplica as alterações.
+    
+    Body: {"occurrence_date": "<vencimento original>", "title": ..., "description": ...,
+           "due_date": ..., "completed": ...}
+    
+    A primeira alteração insere a linha em task; as seguintes (aqui ou por
+    PUT /api/tasks/<id>) alteram essa mesma linha.
+    """
+    current_user_id = int(get_jwt_identity())
+    series = TaskSeries.query.filter_by(id=series_id, user_id=current_user_id).first_or_404()
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        occurrence_date = parse_due_date(data['occurrence_date'])
+        due_date = parse_due_date(data['due_date']) if data.get('due_date') else None
+    except KeyError:
+        return jsonify({'error': 'Data da ocorrência é obrigatória'}), 400
+    except (ValueError, AttributeError):
+        return jsonify({'error': 'Data inválida'}), 400
+    if not is_occurrence(series, occurrence_date):
+        return jsonify({'error': 'Data não corresponde a uma ocorrência da série'}), 400
+    
+    task = Task.query.filter_by(series_id=series.id, occurrence_date=occurrence_date).first()
+    created = task is None
+    if created:
+        task = occurrence_task(series, occurrence_date)
+        db.session.add(task)
+    
+    if 'title' in data:
+        task.title = data['title']
+    if 'description' in data:
+        task.description = data['description']
+    if due_date and due_date_changed(task.due_date, due_date):
+        task.due_date = due_date
+        task.notified_at = None
+    if 'completed' in data:
+        task.completed = data['completed']
+    
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Outra requisição materializou a mesma ocorrência primeiro
+        db.session.rollback()
+        return jsonify({'error': 'Ocorrência alterada por outra requisição, tente novamente'}), 409
+    
+    return jsonify(task.to_dict()), 201 if created else 200
+
+def create_next_recurring_task(task):
+    """
+    Cria a próxima tarefa recorrente baseada no tipo de recorrência.
+    """
+    next_due_date = next_recurrence_date(task.due_date, task.recurrence_type)
     
     if next_due_date:
         # Criar nova tarefa recorrente
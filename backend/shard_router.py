@@ -0,0 +1,210 @@
+import bisect
+import contextvars
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from flask import has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import Boolean, Integer, String, column, inspect, select, table
+from sqlalchemy.sql.util import find_tables
+from db_pool import engine_options
+
+# Tabelas que moram no shard do usuário. As demais (user, auth, outbox,
+# diretório) ficam no banco principal
+SHARDED_TABLES = frozenset({'task', 'task_series', 'task_tombstone', 'task_fts', 'task_archive'})
+
+# Shard que aponta para o próprio banco principal (SQLALCHEMY_DATABASE_URI)
+DEFAULT_SHARD = 'default'
+
+VIRTUAL_NODES = 64
+DIRECTORY_CACHE_MAX_ENTRIES = 100_000
+
+directory = table(
+    'task_shard_directory',
+    column('user_id', Integer), column('shard', String), column('moving', Boolean)
+)
+
+_current_shard = contextvars.ContextVar('current_shard', default=None)
+
+class ShardMoving(Exception):
+    """Escrita nas tarefas de um usuário enquanto o shard_tool as move."""
+
+    def __init__(self, user_id, retry_after):
+        super().__init__(f'Tarefas do usuário {user_id} em migração entre shards')
+        self.retry_after = retry_after
+
+def parse_shards(value):
+    """
+    'default,s1=sqlite:///s1.db' -> {'default': None, 's1': 'sqlite:///s1.db'}.
+    None marks the primary database; order is kept.
+    """
+    shards = {}
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, uri = item.partition('=')
+        name = name.strip()
+        if uri.startswith(('postgres://', 'postgresql://')):
+            uri = 'postgresql+psycopg://' + uri.split('://', 1)[1]
+        if name != DEFAULT_SHARD and not uri:
+            raise ValueError(f'Shard {name} sem URL (use nome=url)')
+        shards[name] = uri or None
+    return shards
+
+def stable_hash(value):
+    return int.from_bytes(hashlib.md5(str(value).encode()).digest()[:8], 'big')
+
+class HashRing:
+    """
+    Consistent hashing com VIRTUAL_NODES pontos por shard: acrescentar um
+    shard só muda o dono de ~1/N dos usuários.
+    """
+
+    def __init__(self, names, virtual_nodes=VIRTUAL_NODES):
+        points = sorted((stable_hash(f'{name}#{i}'), name) for name in names for i in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def node_for(self, key):
+        index = bisect.bisect(self._hashes, stable_hash(key)) % len(self._hashes)
+        return self._names[index]
+
+class ShardRouter:
+    """
+    Escolhe o banco das tarefas de cada usuário.
+
+    O dono é o shard do anel de consistent hashing, a menos que o diretório
+    (task_shard_directory, no banco principal) tenha uma linha para o usuário:
+    é assim que o shard_tool move usuários e fixa onde os dados já estão.
+    As consultas ao diretório ficam em cache por SHARD_DIRECTORY_CACHE_SECONDS;
+    o shard_tool espera esse tempo entre as etapas de uma migração.
+
+    Dentro de uma requisição o usuário vem do JWT; fora dela (agendador,
+    sweeper, ferramentas) o código escolhe o shard com using().
+    """
+
+    def __init__(self):
+        self.shards = {}
+        self.ring = None
+        self.cache_seconds = 5
+        self._directory_cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.shards)
+
+    def init_app(self, app):
+        """Register one bind per shard; must run before db.init_app."""
+        self.shards = parse_shards(app.config.get('TASK_SHARDS'))
+        self.ring = HashRing(list(self.shards)) if self.shards else None
+        self.cache_seconds = app.config.get('SHARD_DIRECTORY_CACHE_SECONDS', 5)
+        self._directory_cache = {}
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        for name, uri in self.shards.items():
+            if uri is not None:
+                binds[f'shard:{name}'] = {'url': uri, **engine_options(app.config, uri)}
+
+    def shard_names(self):
+        """Shards to fan out over; [None] (the primary only) when sharding is off."""
+        return list(self.shards) if self.enabled else [None]
+
+    def engine(self, db, name):
+        if name is None or self.shards.get(name) is None:
+            return db.engines[None]
+        return db.engines[f'shard:{name}']
+
+    def is_sharded(self, mapper=None, clause=None):
+        if mapper is not None:
+            # Aceita a classe do modelo ou o Mapper, como Session.get_bind
+            return inspect(mapper).local_table.name in SHARDED_TABLES
+        if clause is not None:
+            return any(
+                getattr(found, 'name', None) in SHARDED_TABLES
+                for found in find_tables(clause, include_crud=True, include_joins=True)
+            )
+        return False
+
+    def directory_query(self, user_id):
+        return select(directory.c.shard, directory.c.moving).where(directory.c.user_id == user_id)
+
+    def route_from_row(self, user_id, row):
+        """(shard, moving) from the user's directory row, or the ring when there is none."""
+        if row is not None:
+            return row.shard, bool(row.moving)
+        return self.ring.node_for(user_id), False
+
+    def lookup(self, db, user_id):
+        """(shard, moving) straight from the directory, without the cache."""
+        with db.engines[None].connect() as connection:
+            row = connection.execute(self.directory_query(user_id)).first()
+        return self.route_from_row(user_id, row)
+
+    def moving_user_ids(self, db):
+        """Users the shard_tool is moving right now (no cache): background jobs skip them."""
+        if not self.enabled:
+            return set()
+        with db.engines[None].connect() as connection:
+            return set(connection.execute(
+                select(directory.c.user_id).where(directory.c.moving == True)
+            ).scalars())
+
+    def cached_route(self, user_id):
+        """(shard, moving) from the directory cache, or None when missing or expired."""
+        cached = self._directory_cache.get(user_id)
+        if cached is not None and cached[2] > time.monotonic():
+            return cached[0], cached[1]
+        return None
+
+    def remember_route(self, user_id, shard, moving):
+        with self._lock:
+            if len(self._directory_cache) >= DIRECTORY_CACHE_MAX_ENTRIES:
+                self._directory_cache.clear()
+            self._directory_cache[user_id] = (shard, moving, time.monotonic() + self.cache_seconds)
+
+    def route_for_user(self, db, user_id):
+        route = self.cached_route(user_id)
+        if route is not None:
+            return route
+        shard, moving = self.lookup(db, user_id)
+        self.remember_route(user_id, shard, moving)
+        return shard, moving
+
+    def current_route(self, db):
+        """(shard, moving, user_id) for the statement being executed."""
+        shard = _current_shard.get()
+        if shard is not None:
+            return shard, False, None
+        user_id = None
+        if has_request_context():
+            try:
+                user_id = get_jwt_identity()
+            except RuntimeError:
+                # Rota sem JWT verificado
+                pass
+        if user_id is None:
+            raise RuntimeError('Consulta de tarefas sem usuário ou shard definido (use shard_router.using)')
+        shard, moving = self.route_for_user(db, int(user_id))
+        return shard, moving, user_id
+
+    @contextmanager
+    def using(self, shard):
+        """Route task statements in the block to shard (None: primary/unchanged)."""
+        token = _current_shard.set(shard)
+        try:
+            yield
+        finally:
+            _current_shard.reset(token)
+
+    def group_by_shard(self, db, user_ids):
+        """[(shard, [user_id, ...])] for a fan-out over known users."""
+        if not self.enabled:
+            return [(None, list(user_ids))]
+        groups = {}
+        for user_id in user_ids:
+            groups.setdefault(self.route_for_user(db, user_id)[0], []).append(user_id)
+        return list(groups.items())
+
+shard_router = ShardRouter()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Operações nos shards de tarefas (TASK_SHARDS), com a aplicação no ar.
+
+    python shard_tool.py locate 42
+    python shard_tool.py move 42 s2
+    python shard_tool.py pin-all --shard default
+    python shard_tool.py rebalance --limit 100
+
+Ligando shards num banco que já tem tarefas: rode `pin-all --shard default`
+antes de configurar TASK_SHARDS, para que cada usuário continue lendo do
+banco principal, e depois `rebalance` para levá-los ao shard do anel.
+Acrescentando um shard: `pin-all` com a configuração antiga, troque
+TASK_SHARDS e rode `rebalance`.
+
+Uma migração (move) não para o usuário:
+1. o diretório marca o usuário como moving; escritas dele recebem 503 e
+   leituras continuam no shard de origem;
+2. depois do cache do diretório expirar em todos os workers, tarefas,
+   séries, tombstones e o arquivo são copiados numa transação no destino;
+3. o diretório passa a apontar para o destino;
+4. depois de mais um ciclo do cache, as linhas da origem são apagadas.
+
+Os ids mudam no destino (cada banco tem sua sequência): a revisão do
+usuário é incrementada e os ids antigos viram tombstones, então a
+sincronização incremental dos clientes troca uma tarefa pela outra.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from sqlalchemy import delete, insert, select, update
+from models import db, User, Task, TaskArchive, TaskSeries, TaskTombstone, TaskShardDirectory, BRAZIL_TZ
+from models import bump_task_revision, copy_user_to_shard, task_revision
+from shard_router import shard_router
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+PIN_BATCH_SIZE = 1000
+
+def set_directory(user_id, shard, moving=False):
+    """Pin user_id to shard; a row equal to the ring's choice is removed instead."""
+    if not moving and shard_router.ring.node_for(user_id) == shard:
+        db.session.execute(delete(TaskShardDirectory).where(TaskShardDirectory.user_id == user_id))
+    else:
+        db.session.merge(TaskShardDirectory(
+            user_id=user_id, shard=shard, moving=moving, updated_at=datetime.now(BRAZIL_TZ)
+        ))
+    db.session.commit()
+
+def purge_user_tasks(user_id, shard, drop_user_copy):
+    """Delete the user's task rows on shard (and the shard's copy of the user row)."""
+    with shard_router.using(shard):
+        for model in (Task, TaskSeries, TaskTombstone, TaskArchive):
+            db.session.execute(
+                delete(model).where(model.user_id == user_id).execution_options(synchronize_session=False)
+            )
+        if drop_user_copy:
+            users = User.__table__
+            db.session.execute(delete(users).where(users.c.id == user_id), bind_arguments={'mapper': Task})
+
+def copy_user_tasks(user_id, source, target):
+    """Copy tasks, series, tombstones and archive of user_id from source to target in one transaction."""
+    tasks, series, tombstones, archive, users = (
+        Task.__table__, TaskSeries.__table__, TaskTombstone.__table__, TaskArchive.__table__, User.__table__
+    )
+    with shard_router.using(source):
+        series_rows = db.session.execute(select(series).where(series.c.user_id == user_id)).mappings().all()
+        task_rows = db.session.execute(
+            select(tasks).where(tasks.c.user_id == user_id).order_by(tasks.c.id)
+        ).mappings().all()
+        tombstone_rows = db.session.execute(
+            select(tombstones).where(tombstones.c.user_id == user_id)
+        ).mappings().all()
+        archive_rows = db.session.execute(select(archive).where(archive.c.user_id == user_id)).mappings().all()
+        source_revision = task_revision(db.session, user_id)
+    db.session.commit()
+
+    with shard_router.using(target):
+        # Sobras de uma migração interrompida: o diretório ainda aponta para a origem
+        purge_user_tasks(user_id, target, drop_user_copy=False)
+
+        # A revisão continua de onde parou na origem, para os cursores dos clientes
+        set_revision = update(users).where(users.c.id == user_id).values(task_revision=source_revision)
+        connection = db.session.connection(bind_arguments={'mapper': Task, 'clause': set_revision})
+        if connection.execute(set_revision).rowcount == 0:
+            copy_user_to_shard(db.session, connection, user_id)
+            connection.execute(set_revision)
+        revision = bump_task_revision(db.session, user_id)
+        now = datetime.now(BRAZIL_TZ)
+
+        series_ids = {}
+        if series_rows:
+            new_ids = db.session.execute(
+                insert(series).returning(series.c.id, sort_by_parameter_order=True),
+                [{key: value for key, value in row.items() if key != 'id'} for row in series_rows]
+            ).scalars().all()
+            series_ids = dict(zip([row['id'] for row in series_rows], new_ids))
+
+        task_ids = {}
+        if task_rows:
+            new_ids = db.session.execute(
+                insert(tasks).returning(tasks.c.id, sort_by_parameter_order=True),
+                [
+                    dict(
+                        {key: value for key, value in row.items() if key != 'id'},
+                        series_id=series_ids.get(row['series_id']), revision=revision, updated_at=now
+                    )
+                    for row in task_rows
+                ]
+            ).scalars().all()
+            task_ids = dict(zip([row['id'] for row in task_rows], new_ids))
+            # parent_task_id aponta para o id antigo da tarefa de origem
+            for row in task_rows:
+                if row['parent_task_id'] is not None:
+                    db.session.execute(
+                        update(tasks)
+                        .where(tasks.c.id == task_ids[row['id']])
+                        .values(parent_task_id=task_ids.get(row['parent_task_id']))
+                    )
+
+        moved_tombstones = [{key: value for key, value in row.items() if key != 'id'} for row in tombstone_rows]
+        moved_tombstones += [
+            {'task_id': task_id, 'user_id': user_id, 'revision': revision, 'deleted_at': now}
+            for task_id in task_ids
+        ]
+        if moved_tombstones:
+            db.session.execute(insert(tombstones), moved_tombstones)
+        if archive_rows:
+            db.session.execute(insert(archive), [
+                {key: value for key, value in row.items() if key != 'id'} for row in archive_rows
+            ])
+    db.session.commit()
+    return {
+        'tasks': len(task_rows), 'series': len(series_rows), 'archived': len(archive_rows), 'revision': revision
+    }
+
+def move_user(user_id, target, wait=None):
+    """Move the tasks of user_id to target while the app keeps serving them."""
+    if target not in shard_router.shards:
+        raise ValueError(f'Shard desconhecido: {target}')
+    wait = shard_router.cache_seconds if wait is None else wait
+    source, moving = shard_router.lookup(db, user_id)
+    if source == target:
+        if moving:
+            set_directory(user_id, source)
+        return {'user_id': user_id, 'moved': False, 'shard': source}
+
+    set_directory(user_id, source, moving=True)
+    time.sleep(wait)
+    try:
+        copied = copy_user_tasks(user_id, source, target)
+    except Exception:
+        db.session.rollback()
+        set_directory(user_id, source)
+        raise
+    set_directory(user_id, target)
+
+    # Workers com o diretório antigo em cache ainda leem da origem
+    time.sleep(wait)
+    purge_user_tasks(user_id, source, drop_user_copy=shard_router.shards[source] is not None)
+    db.session.commit()
+    logger.info('Usuário movido de shard', extra={'user_id': user_id, 'from': source, 'to': target, **copied})
+    return {'user_id': user_id, 'moved': True, 'from': source, 'to': target, **copied}
+
+def locate(user_id):
+    row = db.session.get(TaskShardDirectory, user_id)
+    shard, moving = shard_router.lookup(db, user_id)
+    return {
+        'user_id': user_id,
+        'ring': shard_router.ring.node_for(user_id),
+        'directory': row.shard if row else None,
+        'shard': shard,
+        'moving': moving
+    }
+
+def pin_all(shard=None):
+    """Directory rows for every user without one: shard, or where the user is routed today."""
+    pinned = 0
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id)
+            .outerjoin(TaskShardDirectory, TaskShardDirectory.user_id == User.id)
+            .where(User.id > last_id, TaskShardDirectory.user_id.is_(None))
+            .order_by(User.id)
+            .limit(PIN_BATCH_SIZE)
+        ).scalars().all()
+        if not user_ids:
+            return pinned
+        now = datetime.now(BRAZIL_TZ)
+        db.session.execute(insert(TaskShardDirectory), [
+            {
+                'user_id': user_id, 'shard': shard or shard_router.ring.node_for(user_id),
+                'moving': False, 'updated_at': now
+            }
+            for user_id in user_ids
+        ])
+        db.session.commit()
+        pinned += len(user_ids)
+        last_id = user_ids[-1]
+
+def rebalance(limit=None, wait=None):
+    """Move pinned users to their ring shard, one at a time."""
+    rows = db.session.execute(
+        select(TaskShardDirectory.user_id, TaskShardDirectory.shard).order_by(TaskShardDirectory.user_id)
+    ).all()
+    db.session.commit()
+    moved = []
+    for user_id, shard in rows:
+        if limit is not None and len(moved) >= limit:
+            break
+        target = shard_router.ring.node_for(user_id)
+        if target != shard:
+            moved.append(move_user(user_id, target, wait))
+    return moved
+
+if __name__ == '__main__':
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Operações nos shards de tarefas')
+    commands = parser.add_subparsers(dest='command', required=True)
+    locate_parser = commands.add_parser('locate', help='onde estão as tarefas do usuário')
+    locate_parser.add_argument('user_id', type=int)
+    move_parser = commands.add_parser('move', help='move as tarefas do usuário para outro shard')
+    move_parser.add_argument('user_id', type=int)
+    move_parser.add_argument('shard')
+    pin_parser = commands.add_parser('pin-all', help='fixa no diretório todos os usuários ainda sem linha')
+    pin_parser.add_argument('--shard', help='shard fixo (padrão: o do anel atual)')
+    rebalance_parser = commands.add_parser('rebalance', help='leva usuários fixados ao shard do anel')
+    rebalance_parser.add_argument('--limit', type=int)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if not shard_router.enabled:
+            parser.error('TASK_SHARDS não está configurado')
+        if args.command == 'locate':
+            result = locate(args.user_id)
+        elif args.command == 'move':
+            result = move_user(args.user_id, args.shard)
+        elif args.command == 'pin-all':
+            if args.shard and args.shard not in shard_router.shards:
+                parser.error(f'Shard desconhecido: {args.shard}')
+            result = {'pinned': pin_all(args.shard)}
+        else:
+            result = {'moved': rebalance(args.limit)}
+        print(json.dumps(result, indent=2, default=str))
@@ -0,0 +1,102 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+ROOT_LOGGER = 'todo'
+
+# Atributos padrão de um LogRecord; o resto veio de extra={...} e vira campo do JSON
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+def get_logger(name):
+    """Logger under the app namespace, e.g. get_logger(__name__) -> 'todo.routes'"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus any extra fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RESERVED})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, extra fields as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = ' '.join(f'{key}={value}' for key, value in vars(record).items() if key not in _RESERVED)
+        return f'{line} {fields}' if fields else line
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records below WARNING. Warnings and errors
+    always pass, so sampling never hides a failure.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def configure_logging(config):
+    """
+    Configura o logger 'todo' a partir de LOG_LEVEL, LOG_FORMAT e LOG_SAMPLE_RATE.
+
+    A escrita no stdout acontece em uma thread separada (QueueHandler +
+    QueueListener), então a requisição não bloqueia em I/O de log.
+    LOG_LEVEL=OFF desliga os logs da aplicação.
+    """
+    global _listener
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    _stop_listener()
+
+    level = str(config.get('LOG_LEVEL', 'INFO')).upper()
+    if level == 'OFF':
+        # Acima de CRITICAL: nenhum logger 'todo.*' emite nada
+        logger.setLevel(logging.CRITICAL + 1)
+        return logger
+    logger.setLevel(level)
+
+    # O registro é formatado ao enfileirar; a thread do listener só escreve a linha pronta
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.setFormatter(JsonFormatter() if config.get('LOG_FORMAT', 'json') == 'json' else TextFormatter())
+    handler.addFilter(SamplingFilter(float(config.get('LOG_SAMPLE_RATE', 1.0))))
+    logger.addHandler(handler)
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter('%(message)s'))
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return logger
+
+atexit.register(_stop_listener)
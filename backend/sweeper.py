@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Periodic maintenance jobs for the whole deployment.
+
+A single process (Procfile `sweeper`) keeps the jobs in a min-heap ordered
+by their next run time and sleeps until the earliest one is due, so thread
+count and memory stay constant no matter how many users sign up. Every job
+works in set-based, bounded batches and is idempotent, so an accidental
+second sweeper only repeats work instead of corrupting it.
+
+    python sweeper.py
+"""
+
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete, exists
+from models import db, User, Task, TaskTombstone, VerificationCode, RefreshToken, BRAZIL_TZ, raise_task_sync_floors
+from shard_router import shard_router
+from task_archive import archive_completed_tasks
+from notifications import notify_due_tasks
+from recurrence import materialize_due_series
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+class Sweeper:
+    """Min-heap scheduler of periodic jobs"""
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def every(self, seconds, name, job):
+        """Run job every `seconds`, starting right away"""
+        heapq.heappush(self._heap, (time.monotonic(), next(self._sequence), seconds, name, job))
+
+    def run_pending(self, now=None):
+        """Run every job that is due and reschedule it; returns the names run"""
+        now = now if now is not None else time.monotonic()
+        ran = []
+        while self._heap and self._heap[0][0] <= now:
+            _, sequence, seconds, name, job = heapq.heappop(self._heap)
+            try:
+                result = job()
+                if result:
+                    logger.info('Job do sweeper concluído', extra={'job': name, 'result': result})
+            except Exception:
+                logger.exception('Erro no job do sweeper', extra={'job': name})
+                db.session.rollback()
+            finally:
+                db.session.remove()
+            heapq.heappush(self._heap, (now + seconds, sequence, seconds, name, job))
+            ran.append(name)
+        return ran
+
+    def seconds_until_next(self):
+        if not self._heap:
+            return None
+        return max(0, self._heap[0][0] - time.monotonic())
+
+    def run_forever(self, app):
+        with app.app_context():
+            logger.info('Sweeper iniciado', extra={'jobs': len(self._heap)})
+            while True:
+                self.run_pending()
+                time.sleep(self.seconds_until_next() or 1)
+
+def purge_unverified_users(now=None):
+    """
+    Delete users that did not verify their email within UNVERIFIED_USER_TTL_SECONDS,
+    together with their verification codes, in bounded batches. Users holding
+    a code that has not expired yet are kept, so whoever verifies within the
+    code's lifetime (or after a resend) always finds the account.
+    """
+    config = current_app.config
+    now = now or datetime.now(BRAZIL_TZ)
+    cutoff = now - timedelta(seconds=config.get('UNVERIFIED_USER_TTL_SECONDS', 600))
+    batch_size = config.get('SWEEPER_BATCH_SIZE', 500)
+    pending_code = exists().where(
+        VerificationCode.email == User.email,
+        VerificationCode.expires_at >= now
+    )
+
+    removed = 0
+    while True:
+        rows = db.session.execute(
+            select(User.id, User.email)
+            .where(User.email_verified == False, User.created_at < cutoff, ~pending_code)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        user_ids = [row.id for row in rows]
+        emails = [row.email for row in rows]
+        # Clean up verification codes FIRST, then the users
+        db.session.execute(
+            delete(VerificationCode)
+            .where(VerificationCode.email.in_(emails))
+            .execution_options(synchronize_session=False)
+        )
+        for shard in shard_router.shard_names():
+            with shard_router.using(shard):
+                db.session.execute(
+                    delete(Task)
+                    .where(Task.user_id.in_(user_ids))
+                    .execution_options(synchronize_session=False)
+                )
+        db.session.execute(
+            delete(User)
+            .where(User.id.in_(user_ids), User.email_verified == False)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        removed += len(user_ids)
+
+        if len(rows) < batch_size:
+            break
+    return removed
+
+def purge_expired_verification_codes(now=None):
+    """
+    Delete verification codes past expires_at in bounded batches, so the
+    table only ever holds codes from the last few minutes.
+    """
+    now = now or datetime.now(BRAZIL_TZ)
+    batch_size = current_app.config.get('SWEEPER_BATCH_SIZE', 500)
+
+    removed = 0
+    while True:
+        ids = db.session.execute(
+            select(VerificationCode.id).where(VerificationCode.expires_at < now).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(
+            delete(VerificationCode)
+            .where(VerificationCode.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        removed += len(ids)
+
+        if len(ids) < batch_size:
+            break
+    return removed
+
+def purge_expired_refresh_tokens(now=None):
+    """
+    Delete refresh tokens past their expiry in bounded batches. Revoked but
+    unexpired rows are kept: they are what detects a reused token.
+    """
+    now = now or datetime.now(BRAZIL_TZ)
+    batch_size = current_app.config.get('SWEEPER_BATCH_SIZE', 500)
+
+    removed = 0
+    while True:
+        jtis = db.session.execute(
+            select(RefreshToken.jti).where(RefreshToken.expires_at < now).limit(batch_size)
+        ).scalars().all()
+        if not jtis:
+            break
+        db.session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.jti.in_(jtis))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        removed += len(jtis)
+
+        if len(jtis) < batch_size:
+            break
+    return removed
+
+def purge_task_tombstones(now=None):
+    """
+    Delete task tombstones older than TASK_TOMBSTONE_RETENTION_DAYS, shard by
+    shard, in bounded batches. Each user's task_sync_floor is raised to the
+    newest revision purged in the same transaction, so a delta-sync cursor
+    from before it gets a full reset instead of missing those deletions.
+    """
+    config = current_app.config
+    now = now or datetime.now(BRAZIL_TZ)
+    cutoff = now - timedelta(days=config.get('TASK_TOMBSTONE_RETENTION_DAYS', 30))
+    batch_size = config.get('SWEEPER_BATCH_SIZE', 500)
+
+    removed = 0
+    for shard in shard_router.shard_names():
+        with shard_router.using(shard):
+            while True:
+                rows = db.session.execute(
+                    select(TaskTombstone.id, TaskTombstone.user_id, TaskTombstone.revision)
+                    .where(TaskTombstone.deleted_at < cutoff)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                floors = {}
+                for row in rows:
+                    floors[row.user_id] = max(floors.get(row.user_id, 0), row.revision)
+                raise_task_sync_floors(db.session, floors)
+                db.session.execute(
+                    delete(TaskTombstone)
+                    .where(TaskTombstone.id.in_([row.id for row in rows]))
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                removed += len(rows)
+
+                if len(rows) < batch_size:
+                    break
+    return removed
+
+def build_sweeper(config):
+    """Register the maintenance jobs with their configured intervals"""
+    sweeper = Sweeper()
+    sweeper.every(config.get('SWEEPER_UNVERIFIED_INTERVAL_SECONDS', 30), 'purge_unverified_users', purge_unverified_users)
+    sweeper.every(config.get('SWEEPER_REFRESH_TOKEN_INTERVAL_SECONDS', 3600), 'purge_expired_refresh_tokens', purge_expired_refresh_tokens)
+    sweeper.every(config.get('SWEEPER_VERIFICATION_CODE_INTERVAL_SECONDS', 300), 'purge_expired_verification_codes', purge_expired_verification_codes)
+    sweeper.every(config.get('SWEEPER_ARCHIVE_INTERVAL_SECONDS', 3600), 'archive_completed_tasks', archive_completed_tasks)
+    sweeper.every(config.get('SWEEPER_TOMBSTONE_INTERVAL_SECONDS', 3600), 'purge_task_tombstones', purge_task_tombstones)
+    sweeper.every(config.get('SWEEPER_SERIES_INTERVAL_SECONDS', 300), 'materialize_due_series', materialize_due_series)
+    # Claim único das tarefas vencidas; os processos web só entregam aos streams
+    sweeper.every(config.get('NOTIFICATION_INTERVAL_SECONDS', 30), 'notify_due_tasks', notify_due_tasks)
+    return sweeper
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    build_sweeper(app.config).run_forever(app)
@@ -0,0 +1,58 @@
+import time
+from flask import current_app
+from sqlalchemy import func, select, text
+from models import db
+from metrics import TABLE_BYTES, TABLE_ROWS
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Tabelas que crescem com o uso e têm job de limpeza no sweeper (ou deveriam ter)
+TRACKED_TABLES = (
+    'user', 'task', 'task_series', 'task_tombstone', 'task_archive', 'verification_code', 'email_outbox',
+    'refresh_token'
+)
+
+_last_refresh = {'at': None}
+
+def table_sizes(connection):
+    """
+    {table: (rows, bytes)} for TRACKED_TABLES. On PostgreSQL both come from
+    the catalog, so the cost does not grow with the tables; bytes is None
+    on other databases, where rows is an exact COUNT(*).
+    """
+    if connection.dialect.name == 'postgresql':
+        rows = connection.execute(
+            text(
+                "SELECT relname, GREATEST(reltuples, 0)::bigint, pg_total_relation_size(oid) "
+                "FROM pg_class WHERE relkind = 'r' AND relname = ANY(:names) "
+                "AND relnamespace = 'public'::regnamespace"
+            ),
+            {'names': list(TRACKED_TABLES)}
+        ).all()
+        return {name: (count, size) for name, count, size in rows}
+
+    sizes = {}
+    tables = db.metadata.tables
+    for name in TRACKED_TABLES:
+        if name in tables:
+            sizes[name] = (connection.execute(select(func.count()).select_from(tables[name])).scalar(), None)
+    return sizes
+
+def refresh_table_metrics():
+    """Scrape hook: update the table gauges at most every TABLE_METRICS_INTERVAL_SECONDS."""
+    interval = current_app.config.get('TABLE_METRICS_INTERVAL_SECONDS', 60)
+    now = time.monotonic()
+    if _last_refresh['at'] is not None and now - _last_refresh['at'] < interval:
+        return
+    _last_refresh['at'] = now
+    try:
+        with db.engine.connect() as connection:
+            sizes = table_sizes(connection)
+    except Exception:
+        logger.warning('Falha ao ler o tamanho das tabelas', exc_info=True)
+        return
+    for name, (count, size) in sizes.items():
+        TABLE_ROWS.labels(name).set(count)
+        if size is not None:
+            TABLE_BYTES.labels(name).set(size)
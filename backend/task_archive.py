@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, delete, insert, or_, select
+from models import db, Task, TaskArchive, BRAZIL_TZ, bump_task_revision, raise_task_sync_floors
+from shard_router import shard_router
+from task_queries import decode_cursor, encode_cursor, parse_page_size
+
+ARCHIVE_SORT = 'completed_at'
+
+
+def archivable_tasks(cutoff):
+    """
+    Completed tasks whose last change is older than cutoff. Occurrences of a
+    TaskSeries stay in task: they are what marks that date of the series as
+    done in the calendar.
+    """
+    return select(Task).where(
+        Task.completed == True,
+        Task.series_id.is_(None),
+        or_(
+            Task.updated_at < cutoff,
+            and_(Task.updated_at.is_(None), Task.created_at < cutoff)
+        )
+    )
+
+
+def archive_values(task, now):
+    return {
+        'task_id': task.id,
+        'user_id': task.user_id,
+        'title': task.title,
+        'description': task.description,
+        'due_date': task.due_date,
+        'created_at': task.created_at,
+        'completed_at': task.updated_at or task.created_at,
+        'is_recurring': task.is_recurring,
+        'recurrence_type': task.recurrence_type,
+        'archived_at': now
+    }
+
+
+def archive_shard(cutoff, batch_size, now):
+    """Archive the current shard's candidates, one committed batch at a time."""
+    archived = 0
+    while True:
+        statement = archivable_tasks(cutoff)
+        # Usuários no meio de um shard_tool move ficam para a próxima rodada
+        moving = shard_router.moving_user_ids(db)
+        if moving:
+            statement = statement.where(Task.user_id.not_in(moving))
+        tasks = db.session.scalars(
+            statement.order_by(Task.id).limit(batch_size).with_for_update(skip_locked=True)
+        ).all()
+        if not tasks:
+            break
+
+        db.session.execute(insert(TaskArchive), [archive_values(task, now) for task in tasks])
+        # Exclusão sem o ORM, logo sem tombstones (o histórico não passa de task
+        # para task_tombstone). A revisão nova descarta o task_cache, e o piso de
+        # sincronização faz os clientes recarregarem a lista sem as arquivadas
+        db.session.execute(
+            delete(Task)
+            .where(Task.id.in_([task.id for task in tasks]))
+            .execution_options(synchronize_session=False)
+        )
+        raise_task_sync_floors(db.session, {
+            user_id: bump_task_revision(db.session, user_id)
+            for user_id in {task.user_id for task in tasks}
+        })
+        db.session.commit()
+        archived += len(tasks)
+
+        if len(tasks) < batch_size:
+            break
+    return archived
+
+
+def archive_completed_tasks(now=None):
+    """
+    Sweeper job: move tasks completed more than TASK_ARCHIVE_AFTER_DAYS ago
+    from task to task_archive, on every shard, so task only grows with the
+    active tasks.
+    """
+    config = current_app.config
+    days = config.get('TASK_ARCHIVE_AFTER_DAYS', 30)
+    if not days:
+        return 0
+    now = now or datetime.now(BRAZIL_TZ)
+    cutoff = now - timedelta(days=days)
+    batch_size = config.get('SWEEPER_BATCH_SIZE', 500)
+
+    archived = 0
+    for shard in shard_router.shard_names():
+        with shard_router.using(shard):
+            archived += archive_shard(cutoff, batch_size, now)
+    return archived
+
+
+def paginate_archived_tasks(user_id, args):
+    """
+    Uma página das tarefas arquivadas do usuário (limit, cursor), das concluídas
+    mais recentemente para as mais antigas, pelo índice (user_id, completed_at, id).
+
+    Returns (tasks, next_cursor); next_cursor is None on the last page.
+    """
+    limit = parse_page_size(args.get('limit'))
+    statement = select(TaskArchive).where(TaskArchive.user_id == user_id)
+    cursor = args.get('cursor')
+    if cursor:
+        value, last_id = decode_cursor(cursor, ARCHIVE_SORT)
+        statement = statement.where(or_(
+            TaskArchive.completed_at < value,
+            and_(TaskArchive.completed_at == value, TaskArchive.id < last_id)
+        ))
+    rows = db.session.scalars(
+        statement.order_by(TaskArchive.completed_at.desc(), TaskArchive.id.desc()).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(ARCHIVE_SORT, rows[-1]) if has_more else None
+    return [row.to_dict() for row in rows], next_cursor
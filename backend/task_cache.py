@@ -0,0 +1,272 @@
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, task_revision
+from db_routing import reading_from_replica
+from metrics import TASK_CACHE_BYTES, TASK_CACHE_EVICTIONS, TASK_CACHE_REQUESTS, TASK_SUMMARY_CACHE_REQUESTS
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Overhead aproximado de cada entrada (chave, nó do OrderedDict, objeto bytes)
+ENTRY_OVERHEAD_BYTES = 200
+
+class LocalLRUBackend:
+    """
+    LRU em memória limitado por bytes, um por processo. Guarda só a versão
+    mais recente da lista de cada usuário.
+    """
+
+    shared = False
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, revision):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != revision:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id, revision, payload):
+        size = len(payload) + ENTRY_OVERHEAD_BYTES
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(user_id, None)
+            if previous is not None:
+                self.bytes -= len(previous[1]) + ENTRY_OVERHEAD_BYTES
+            self._entries[user_id] = (revision, payload)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                _, (_, old_payload) = self._entries.popitem(last=False)
+                self.bytes -= len(old_payload) + ENTRY_OVERHEAD_BYTES
+                evicted += 1
+        return evicted
+
+    def invalidate(self, user_id, revision):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] < revision:
+                del self._entries[user_id]
+                self.bytes -= len(entry[1]) + ENTRY_OVERHEAD_BYTES
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisBackend:
+    """
+    Backend compartilhado entre os workers (redis é dependência opcional).
+
+    Além do payload guarda a revisão atual de cada usuário, publicada após o
+    commit de quem escreveu, então uma leitura com cache quente não toca no banco.
+    """
+
+    shared = True
+
+    def __init__(self, url, ttl):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("TASK_CACHE_BACKEND=redis requer o pacote 'redis'")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.bytes = 0
+
+    def get(self, user_id, revision):
+        return self.client.get(f'tasks:{user_id}:{revision}')
+
+    def set(self, user_id, revision, payload):
+        self.client.set(f'tasks:{user_id}:{revision}', payload, ex=self.ttl)
+        return 0
+
+    def get_revision(self, user_id):
+        value = self.client.get(f'tasks-rev:{user_id}')
+        return int(value) if value is not None else None
+
+    def add_revision(self, user_id, revision):
+        # nx: a revisão lida do banco por um leitor não sobrescreve a publicada por um commit
+        self.client.set(f'tasks-rev:{user_id}', revision, ex=self.ttl, nx=True)
+
+    def invalidate(self, user_id, revision):
+        self.client.set(f'tasks-rev:{user_id}', revision, ex=self.ttl)
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+class TaskListCache:
+    """
+    Cache do payload JSON de GET /api/tasks por usuário e revisão.
+
+    A chave inclui User.task_revision, que toda escrita incrementa
+    (bump_task_revision), então uma entrada nunca fica desatualizada: a
+    próxima leitura após uma escrita simplesmente procura outra chave.
+
+    - local: LRU por processo limitado por TASK_CACHE_MAX_BYTES. A revisão
+      atual vem do banco (um SELECT pela chave primária), porque escritas em
+      outros workers não passam por este processo.
+    - redis: compartilhado entre workers; a revisão também fica no Redis e
+      um hit não executa nenhum SQL.
+    - none: desligado.
+
+    Os contadores de GET /api/tasks/summary ficam em um LRU local à parte,
+    com chave (revisão, dia): mudam com qualquer escrita e também à meia-noite.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.summaries = None
+        self.max_entry_bytes = 4 * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        kind = app.config.get('TASK_CACHE_BACKEND', 'local')
+        self.max_entry_bytes = app.config.get('TASK_CACHE_MAX_ENTRY_BYTES', self.max_entry_bytes)
+        if kind == 'local':
+            self.backend = LocalLRUBackend(app.config.get('TASK_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        elif kind == 'redis':
+            self.backend = RedisBackend(app.config['TASK_CACHE_REDIS_URL'], app.config.get('TASK_CACHE_TTL_SECONDS', 300))
+        elif kind == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f'TASK_CACHE_BACKEND inválido: {kind}')
+        self.summaries = None
+        if self.backend is not None:
+            self.summaries = LocalLRUBackend(app.config.get('TASK_SUMMARY_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def current_revision(self, user_id):
+        if self.backend is not None and self.backend.shared:
+            try:
+                revision = self.backend.get_revision(user_id)
+                if revision is not None:
+                    return revision
+            except Exception:
+                logger.warning('Falha ao ler revisão do cache', exc_info=True)
+        revision = task_revision(db.session, user_id)
+        # Revisão lida da réplica pode estar atrasada: não é publicada no cache compartilhado
+        if self.backend is not None and self.backend.shared and not reading_from_replica():
+            try:
+                self.backend.add_revision(user_id, revision)
+            except Exception:
+                logger.warning('Falha ao gravar revisão no cache', exc_info=True)
+        return revision
+
+    def get(self, user_id, revision):
+        payload = None
+        try:
+            payload = self.backend.get(user_id, revision)
+        except Exception:
+            logger.warning('Falha ao ler o cache de tarefas', exc_info=True)
+        result = 'hit' if payload is not None else 'miss'
+        if payload is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        TASK_CACHE_REQUESTS.labels(result).inc()
+        return payload
+
+    def set(self, user_id, revision, payload):
+        if len(payload) > self.max_entry_bytes:
+            return
+        try:
+            evicted = self.backend.set(user_id, revision, payload)
+        except Exception:
+            logger.warning('Falha ao gravar no cache de tarefas', exc_info=True)
+            return
+        if evicted:
+            TASK_CACHE_EVICTIONS.labels(type(self.backend).__name__).inc(evicted)
+        TASK_CACHE_BYTES.labels(type(self.backend).__name__).set(self.backend.bytes)
+
+    def store_while_streaming(self, user_id, revision, chunks):
+        """
+        Repassa os pedaços do JSON para a resposta e, se o corpo inteiro couber
+        em TASK_CACHE_MAX_ENTRY_BYTES, guarda o payload ao final do stream.
+        """
+        parts = []
+        size = 0
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size > self.max_entry_bytes:
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+        if parts is not None:
+            self.set(user_id, revision, b''.join(parts))
+
+    async def astore_while_streaming(self, user_id, revision, chunks):
+        """store_while_streaming for an async iterator of chunks (views do asgi.py)."""
+        parts = []
+        size = 0
+        async for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size > self.max_entry_bytes:
+                    parts = None
+                else:
+                    parts.append(chunk)
+            yield chunk
+        if parts is not None:
+            self.set(user_id, revision, b''.join(parts))
+
+    def get_summary(self, user_id, key):
+        payload = self.summaries.get(user_id, key)
+        TASK_SUMMARY_CACHE_REQUESTS.labels('hit' if payload is not None else 'miss').inc()
+        return payload
+
+    def set_summary(self, user_id, key, payload):
+        self.summaries.set(user_id, key, payload)
+
+    def publish(self, revisions):
+        """Write-through after commit: mark each user's new revision as current."""
+        if self.backend is None:
+            return
+        for user_id, revision in revisions.items():
+            try:
+                self.backend.invalidate(user_id, revision)
+            except Exception:
+                logger.warning('Falha ao invalidar o cache de tarefas', exc_info=True)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        enabled = self.backend is not None
+        return {
+            'backend': type(self.backend).__name__ if enabled else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'entries': len(self.backend) if enabled else 0,
+            'bytes': self.backend.bytes if enabled else 0,
+            'summary_entries': len(self.summaries) if self.summaries is not None else 0
+        }
+
+task_cache = TaskListCache()
+
+@event.listens_for(Session, 'after_commit')
+def publish_task_revisions(session):
+    revisions = session.info.pop('task_revisions', None)
+    if revisions:
+        task_cache.publish(revisions)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_task_revisions(session):
+    session.info.pop('task_revisions', None)
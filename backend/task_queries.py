@@ -0,0 +1,239 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_, case, func, select
+from models import db, Task, BRAZIL_TZ
+from task_serialization import task_rows_query, fetch_task_rows
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+STATUS_CHOICES = ('all', 'active', 'completed')
+DUE_CHOICES = ('all', 'today', 'tomorrow', 'future', 'no-date')
+SORT_CHOICES = ('created_at', 'title', 'due_date')
+
+# Parâmetros que pedem a listagem paginada; outros (ex.: ?_=123 contra cache) são ignorados
+PAGE_PARAMS = ('limit', 'cursor', 'status', 'due', 'sort', 'is_recurring')
+
+# Contadores de GET /api/tasks/summary (mesmas chaves dos filtros da TaskList)
+SUMMARY_KEYS = ('all', 'today', 'tomorrow', 'future', 'no-date', 'overdue', 'recurring', 'completed')
+
+
+class InvalidQuery(ValueError):
+    """Raised when list parameters or a cursor cannot be parsed."""
+
+
+def parse_bool(value):
+    """Parse 'true'/'false' style query string values (None means not informed)."""
+    if value is None or value == '':
+        return None
+    lowered = value.lower()
+    if lowered in ('1', 'true', 'yes'):
+        return True
+    if lowered in ('0', 'false', 'no'):
+        return False
+    raise InvalidQuery(f'Valor booleano inválido: {value}')
+
+
+def day_bounds(now=None):
+    """
+    Retorna o início de hoje, amanhã e depois de amanhã no fuso UTC-3,
+    usados para separar as tarefas em hoje/amanhã/futuras.
+    """
+    now = now or datetime.now(BRAZIL_TZ)
+    start_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    start_tomorrow = start_today + timedelta(days=1)
+    start_after_tomorrow = start_today + timedelta(days=2)
+    return start_today, start_tomorrow, start_after_tomorrow
+
+
+def apply_filters(query, status='all', due='all', is_recurring=None, now=None):
+    """Apply the status, due-date bucket and recurrence filters to a Task query."""
+    if status not in STATUS_CHOICES:
+        raise InvalidQuery(f'Status inválido: {status}')
+    if due not in DUE_CHOICES:
+        raise InvalidQuery(f'Filtro de vencimento inválido: {due}')
+
+    if status == 'active':
+        query = query.filter(Task.completed == False)
+    elif status == 'completed':
+        query = query.filter(Task.completed == True)
+
+    if due != 'all':
+        start_today, start_tomorrow, start_after_tomorrow = day_bounds(now)
+        if due == 'today':
+            query = query.filter(Task.due_date >= start_today, Task.due_date < start_tomorrow)
+        elif due == 'tomorrow':
+            query = query.filter(Task.due_date >= start_tomorrow, Task.due_date < start_after_tomorrow)
+        elif due == 'future':
+            query = query.filter(Task.due_date >= start_after_tomorrow)
+        elif due == 'no-date':
+            query = query.filter(Task.due_date.is_(None))
+
+    if is_recurring is not None:
+        query = query.filter(Task.is_recurring == is_recurring)
+
+    return query
+
+
+def encode_cursor(sort, task):
+    """Encode the keyset position of the last task on a page."""
+    value = getattr(task, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, task.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """Decode a cursor produced by encode_cursor, checking it matches the sort."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_sort in ('created_at', 'due_date', 'completed_at') and value is not None:
+            value = datetime.fromisoformat(value)
+        task_id = int(task_id)
+    except (ValueError, TypeError):
+        raise InvalidQuery('Cursor inválido')
+    if cursor_sort != sort:
+        raise InvalidQuery('Cursor não corresponde à ordenação solicitada')
+    return value, task_id
+
+
+def apply_keyset(query, sort, cursor=None):
+    """
+    Order the query by the requested sort and, when a cursor is given, seek
+    past it. The id column breaks ties so every position is unique.
+
+    - created_at: mais recentes primeiro
+    - title: ordem alfabética
+    - due_date: mais próximas primeiro, tarefas sem data no final
+    """
+    if sort not in SORT_CHOICES:
+        raise InvalidQuery(f'Ordenação inválida: {sort}')
+
+    position = decode_cursor(cursor, sort) if cursor else None
+
+    if sort == 'created_at':
+        if position:
+            value, last_id = position
+            query = query.filter(or_(
+                Task.created_at < value,
+                and_(Task.created_at == value, Task.id < last_id)
+            ))
+        return query.order_by(Task.created_at.desc(), Task.id.desc())
+
+    if sort == 'title':
+        if position:
+            value, last_id = position
+            query = query.filter(or_(
+                Task.title > value,
+                and_(Task.title == value, Task.id > last_id)
+            ))
+        return query.order_by(Task.title.asc(), Task.id.asc())
+
+    # due_date
+    if position:
+        value, last_id = position
+        if value is None:
+            query = query.filter(Task.due_date.is_(None), Task.id > last_id)
+        else:
+            query = query.filter(or_(
+                Task.due_date > value,
+                and_(Task.due_date == value, Task.id > last_id),
+                Task.due_date.is_(None)
+            ))
+    return query.order_by(Task.due_date.asc().nulls_last(), Task.id.asc())
+
+
+def parse_page_size(value):
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidQuery(f'Limite inválido: {value}')
+    if limit < 1:
+        raise InvalidQuery(f'Limite inválido: {value}')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def wants_page(args):
+    """True when the query string asks for a keyset page instead of the full list."""
+    return any(name in args for name in PAGE_PARAMS)
+
+
+def page_query(user_id, args):
+    """
+    Statement of one page of the user's tasks from the query string
+    (status, due, is_recurring, sort, limit, cursor), plus the sort and limit
+    that page_result needs. Shared by the sync and async views.
+    """
+    sort = args.get('sort') or 'created_at'
+    limit = parse_page_size(args.get('limit'))
+
+    query = task_rows_query().filter(Task.user_id == user_id)
+    query = apply_filters(
+        query,
+        status=args.get('status') or 'all',
+        due=args.get('due') or 'all',
+        is_recurring=parse_bool(args.get('is_recurring'))
+    )
+    query = apply_keyset(query, sort, args.get('cursor'))
+
+    # Busca um registro a mais para saber se existe próxima página sem COUNT(*)
+    return query.limit(limit + 1), sort, limit
+
+
+def page_result(rows, sort, limit):
+    """(tasks, next_cursor) from the limit + 1 rows fetched by page_query."""
+    has_more = len(rows) > limit
+    tasks = rows[:limit]
+    next_cursor = encode_cursor(sort, tasks[-1]) if has_more else None
+    return tasks, next_cursor
+
+
+def paginate_tasks(user_id, args):
+    """
+    Busca uma página de tarefas do usuário a partir dos parâmetros da query string
+    (status, due, is_recurring, sort, limit, cursor).
+
+    Returns a (rows, next_cursor) tuple of TaskRow tuples; next_cursor is None
+    on the last page.
+    """
+    statement, sort, limit = page_query(user_id, args)
+    return page_result(fetch_task_rows(statement), sort, limit)
+
+
+def task_summary(user_id, now=None):
+    """
+    Contadores das tarefas do usuário por filtro, em uma única consulta
+    agrupada que só lê o índice (user_id, completed, due_date, is_recurring).
+
+    all, today, tomorrow, future, no-date, overdue e recurring contam apenas
+    tarefas pendentes; completed conta as concluídas.
+    """
+    start_today, start_tomorrow, start_after_tomorrow = day_bounds(now)
+    bucket = case(
+        (Task.due_date.is_(None), 'no-date'),
+        (Task.due_date < start_today, 'overdue'),
+        (Task.due_date < start_tomorrow, 'today'),
+        (Task.due_date < start_after_tomorrow, 'tomorrow'),
+        else_='future'
+    ).label('bucket')
+    rows = db.session.execute(
+        select(Task.completed, bucket, Task.is_recurring, func.count())
+        .where(Task.user_id == user_id)
+        .group_by(Task.completed, bucket, Task.is_recurring)
+    ).all()
+
+    summary = dict.fromkeys(SUMMARY_KEYS, 0)
+    for completed, bucket_name, is_recurring, count in rows:
+        if completed:
+            summary['completed'] += count
+            continue
+        summary['all'] += count
+        summary[bucket_name] += count
+        if is_recurring:
+            summary['recurring'] += count
+    return summary
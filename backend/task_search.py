@@ -0,0 +1,138 @@
+import re
+from sqlalchemy import column, func, literal_column, or_, select, table, text
+from models import db, Task
+from task_queries import InvalidQuery, parse_page_size
+from task_serialization import TASK_COLUMNS, TASK_FIELDS
+
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 8
+# Paginação por offset: além deste ponto a busca para de oferecer próxima página,
+# para que páginas profundas não custem mais que a primeira
+MAX_SEARCH_RESULTS = 1000
+
+# Criados pela migração 0006 e fora do metadata (dependem do banco)
+SEARCH_SCHEMA_OBJECTS = frozenset({
+    'search_vector', 'ix_task_search_vector',
+    'task_fts', 'task_fts_data', 'task_fts_idx', 'task_fts_docsize', 'task_fts_config'
+})
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+task_fts = table('task_fts', column('rowid'))
+
+_fts_available = {}
+
+
+def include_name(name, type_, parent_names):
+    """Filtro do autogenerate: não propõe remover os objetos de busca."""
+    return name not in SEARCH_SCHEMA_OBJECTS
+
+
+def search_backend():
+    """
+    'postgresql' (tsvector + GIN), 'sqlite' (FTS5) ou 'like' quando o índice
+    não existe (SQLite sem FTS5 ou banco ainda não migrado).
+
+    Decidido pelo banco onde a busca vai rodar (shard do usuário ou réplica),
+    não pelo primário: com TASK_SHARDS cada shard tem o próprio schema.
+    """
+    engine = db.session.get_bind(mapper=Task)
+    if engine.dialect.name == 'postgresql':
+        return 'postgresql'
+    if engine.dialect.name == 'sqlite':
+        key = str(engine.url)
+        if key not in _fts_available:
+            _fts_available[key] = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'"),
+                bind_arguments={'mapper': Task}
+            ).first() is not None
+        if _fts_available[key]:
+            return 'sqlite'
+    return 'like'
+
+
+def parse_terms(q):
+    """Words of the query, lowercased; operators and punctuation are dropped."""
+    q = (q or '').strip()
+    if not q:
+        raise InvalidQuery('Parâmetro q é obrigatório')
+    if len(q) > MAX_QUERY_LENGTH:
+        raise InvalidQuery(f'Busca limitada a {MAX_QUERY_LENGTH} caracteres')
+    terms = TERM_RE.findall(q.lower())[:MAX_TERMS]
+    if not terms:
+        raise InvalidQuery('A busca não tem nenhuma palavra')
+    return terms
+
+
+def parse_offset(cursor):
+    if not cursor:
+        return 0
+    try:
+        offset = int(cursor)
+    except ValueError:
+        raise InvalidQuery('Cursor inválido')
+    if offset < 0 or offset >= MAX_SEARCH_RESULTS:
+        raise InvalidQuery('Cursor inválido')
+    return offset
+
+
+def ranked_statement(backend, user_id, terms):
+    """
+    SELECT das colunas da API mais a relevância (maior é melhor), já ordenado.
+    Todos os termos precisam aparecer; o último também casa como prefixo,
+    para a busca funcionar enquanto o usuário digita.
+    """
+    if backend == 'postgresql':
+        query = func.to_tsquery('portuguese', ' & '.join(terms[:-1] + [terms[-1] + ':*']))
+        vector = literal_column('task.search_vector')
+        rank = func.ts_rank_cd(vector, query)
+        return (
+            select(*TASK_COLUMNS, rank.label('rank'))
+            .where(Task.user_id == user_id, vector.op('@@')(query))
+            .order_by(rank.desc(), Task.id.desc())
+        )
+
+    if backend == 'sqlite':
+        # Termos entre aspas: nada do que o usuário digita vira operador do FTS5
+        match = ' '.join(f'"{term}"' for term in terms) + ' *'
+        # bm25 é menor quanto mais relevante; título pesa 10x a descrição
+        rank = -func.bm25(literal_column('task_fts'), 10.0, 1.0)
+        return (
+            select(*TASK_COLUMNS, rank.label('rank'))
+            .select_from(task_fts.join(Task, Task.id == task_fts.c.rowid))
+            .where(literal_column('task_fts').op('MATCH')(match), Task.user_id == user_id)
+            .order_by(rank.desc(), Task.id.desc())
+        )
+
+    # Sem índice: varredura das tarefas do usuário, só para não quebrar a rota
+    conditions = [or_(Task.title.ilike(f'%{term}%'), Task.description.ilike(f'%{term}%')) for term in terms]
+    return (
+        select(*TASK_COLUMNS, literal_column('NULL').label('rank'))
+        .where(Task.user_id == user_id, *conditions)
+        .order_by(Task.id.desc())
+    )
+
+
+def search_tasks(user_id, args):
+    """
+    Busca textual nas tarefas do usuário a partir da query string (q, limit,
+    cursor), ordenada por relevância.
+
+    Returns a (tasks, next_cursor) tuple; each task dict carries its rank.
+    next_cursor is None on the last page or past MAX_SEARCH_RESULTS.
+    """
+    terms = parse_terms(args.get('q'))
+    limit = parse_page_size(args.get('limit'))
+    offset = parse_offset(args.get('cursor'))
+    limit = min(limit, MAX_SEARCH_RESULTS - offset)
+
+    statement = ranked_statement(search_backend(), user_id, terms)
+    rows = db.session.execute(statement.limit(limit + 1).offset(offset)).all()
+
+    has_more = len(rows) > limit and offset + limit < MAX_SEARCH_RESULTS
+    tasks = []
+    for row in rows[:limit]:
+        task = dict(zip(TASK_FIELDS, row))
+        task['rank'] = row.rank
+        tasks.append(task)
+    return tasks, str(offset + limit) if has_more else None
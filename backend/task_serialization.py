@@ -0,0 +1,86 @@
+import json
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import select
+from models import db, Task
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da stdlib
+    orjson = None
+
+# Colunas devolvidas pela API, na mesma ordem de Task.to_dict()
+TASK_FIELDS = (
+    'id', 'title', 'description', 'due_date', 'completed', 'created_at',
+    'is_recurring', 'recurrence_type', 'parent_task_id', 'series_id', 'occurrence_date',
+    'updated_at', 'revision'
+)
+TASK_COLUMNS = tuple(getattr(Task, field) for field in TASK_FIELDS)
+
+# namedtuple não tem __dict__ por instância: bem mais leve que um Task do ORM
+TaskRow = namedtuple('TaskRow', TASK_FIELDS)
+
+STREAM_CHUNK_SIZE = 1000
+
+def task_rows_query():
+    """SELECT of only the API columns, without ORM hydration or identity map"""
+    return select(*TASK_COLUMNS)
+
+def fetch_task_rows(statement):
+    """Execute a Core statement built from task_rows_query() into TaskRow tuples"""
+    return [TaskRow._make(row) for row in db.session.execute(statement)]
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(value):
+    """Encode to JSON bytes with orjson when installed, the stdlib otherwise"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def rows_to_dicts(rows):
+    return [dict(zip(TASK_FIELDS, row)) for row in rows]
+
+def encode_chunk(chunk, first):
+    """Rows of one chunk as the inside of a JSON array (comma-prefixed after the first)"""
+    return (b'' if first else b',') + dumps(rows_to_dicts(chunk))[1:-1]
+
+def iter_json_array(rows, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream an iterable of task rows as one JSON array, encoding chunk_size
+    rows at a time so the full payload is never held in memory.
+    """
+    yield b'['
+    first = True
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield encode_chunk(chunk, first)
+            first = False
+            chunk = []
+    if chunk:
+        yield encode_chunk(chunk, first)
+    yield b']'
+
+async def aiter_json_array(partitions):
+    """
+    Async twin of iter_json_array over an AsyncResult's partitions() (lists
+    of rows already cut at yield_per), for the views in asgi.py.
+    """
+    yield b'['
+    first = True
+    async for chunk in partitions:
+        if chunk:
+            yield encode_chunk(chunk, first)
+            first = False
+    yield b']'
+
+def stream_task_rows(statement, chunk_size=STREAM_CHUNK_SIZE):
+    """Iterate a statement's rows in chunks straight from the database cursor"""
+    result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+    for row in result:
+        yield TaskRow._make(row)
@@ -0,0 +1,75 @@
+"""
+Fixtures for the backend tests: each test gets the app built against its
+own SQLite files under tmp_path, migrated at boot (AUTO_MIGRATE).
+
+    cd backend && pip install -r requirements_test.txt && python -m pytest -q
+
+requirements_test.txt includes the ASGI stack, so test_asgi.py runs too.
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from config import Config
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Factory of apps on a scratch SQLite file; keyword arguments override Config."""
+    from app import create_app
+    from models import db
+
+    apps = []
+
+    def factory(**overrides):
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'primary.db'),
+            'TESTING': True, 'AUTO_MIGRATE': True, 'LOG_LEVEL': 'WARNING',
+            'RATE_LIMIT_BACKEND': 'none', 'EMAIL_TRANSPORT': 'stub', 'BCRYPT_ROUNDS': 4,
+            'NOTIFICATION_INTERVAL_SECONDS': 3600, 'JWT_SECRET_KEY': 'chave-dos-testes-com-mais-de-32-bytes'
+        }
+        settings.update(overrides)
+        app = create_app(type('TestConfig', (Config,), settings))
+        apps.append(app)
+        return app
+
+    yield factory
+
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_user():
+    """create_user(app, email) -> (user_id, auth headers) of a verified user."""
+    def create(app, email='user@example.com', name='Teste'):
+        from flask_jwt_extended import create_access_token
+        from models import db, User
+
+        with app.app_context():
+            user = User(email=email, name=name, email_verified=True)
+            user.password_hash = 'sem-senha'
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=str(user.id))
+            return user.id, {'Authorization': f'Bearer {token}'}
+
+    return create
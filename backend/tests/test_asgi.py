@@ -0,0 +1,92 @@
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('aiosqlite')
+pytest.importorskip('a2wsgi')
+pytest.importorskip('httpx')
+
+from flask_jwt_extended import create_refresh_token
+from prometheus_client import REGISTRY
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+from async_routes import create_asgi_app, notification_stream
+
+
+@pytest.fixture
+def asgi_client(app):
+    with TestClient(create_asgi_app(app)) as client:
+        yield client
+
+
+def test_async_task_list_matches_the_flask_view(app, asgi_client, create_user):
+    _, headers = create_user(app)
+    for title in ('um', 'dois', 'três'):
+        # POST cai no Flask pelo a2wsgi
+        assert asgi_client.post('/api/tasks', json={'title': title}, headers=headers).status_code == 201
+
+    response = asgi_client.get('/api/tasks', headers=headers)
+    assert response.status_code == 200
+    assert response.json() == app.test_client().get('/api/tasks', headers=headers).get_json()
+    assert asgi_client.get('/api/tasks?_=1', headers=headers).json() == response.json()
+
+    page = asgi_client.get('/api/tasks?limit=2', headers=headers).json()
+    assert len(page['tasks']) == 2 and page['next_cursor']
+    rest = asgi_client.get(f"/api/tasks?limit=2&cursor={page['next_cursor']}", headers=headers).json()
+    assert len(rest['tasks']) == 1 and rest['next_cursor'] is None
+    assert asgi_client.get('/api/tasks?limit=abc', headers=headers).status_code == 400
+
+
+def test_async_views_record_the_flask_request_metrics(app, asgi_client, create_user):
+    _, headers = create_user(app)
+    labels = {'blueprint': 'api', 'endpoint': 'api.get_tasks'}
+
+    def sample(name, **extra):
+        return REGISTRY.get_sample_value(name, dict(labels, **extra)) or 0
+
+    requests_before = sample('todo_http_requests_total', method='GET', status='200')
+    statements_before = sample('todo_http_request_sql_statements_sum')
+    assert asgi_client.get('/api/tasks?limit=5', headers=headers).status_code == 200
+
+    assert sample('todo_http_requests_total', method='GET', status='200') == requests_before + 1
+    # Revisão e página, executadas pelo engine async
+    assert sample('todo_http_request_sql_statements_sum') >= statements_before + 2
+
+
+def test_async_views_answer_like_flask_jwt_extended(app, asgi_client, create_user):
+    user_id, _ = create_user(app)
+    with app.app_context():
+        refresh = create_refresh_token(identity=str(user_id))
+
+    assert asgi_client.get('/api/tasks').status_code == 401
+    assert asgi_client.get('/api/tasks', headers={'Authorization': 'Bearer lixo'}).status_code == 422
+    assert asgi_client.get('/api/tasks', headers={'Authorization': f'Bearer {refresh}'}).status_code == 422
+    assert asgi_client.get('/api/notifications/stream?ticket=lixo').status_code == 401
+
+
+def test_async_stream_sends_the_due_tasks(app, asgi_client, create_user):
+    _, headers = create_user(app)
+    asgi_client.post('/api/tasks', json={'title': 'vencida', 'due_date': '2020-01-01T10:00:00'}, headers=headers)
+    ticket = asgi_client.post('/api/notifications/ticket', headers=headers).json()['ticket']
+
+    # O TestClient só devolve a resposta quando o corpo acaba, e o stream não acaba:
+    # a view é chamada direto, no event loop do cliente, e lida até o primeiro evento
+    async def first_chunks(count):
+        request = Request({
+            'type': 'http', 'method': 'GET', 'path': '/api/notifications/stream', 'headers': [],
+            'query_string': f'ticket={ticket}'.encode(), 'app': asgi_client.app
+        })
+        response = await notification_stream(request)
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            if len(chunks) == count:
+                break
+        await response.body_iterator.aclose()
+        return response, chunks
+
+    response, chunks = asgi_client.portal.call(first_chunks, 2)
+    assert response.media_type == 'text/event-stream'
+    assert chunks[0].startswith('retry:')
+    assert chunks[1].startswith('event: due\n')
+    assert '"vencida"' in chunks[1]
@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import routes
+from models import Task
+
+
+def batch(client, headers, *operations):
+    return client.post('/api/tasks/batch', json={'operations': list(operations)}, headers=headers)
+
+
+def titles(app, user_id):
+    with app.app_context():
+        return sorted(task.title for task in Task.query.filter_by(user_id=user_id))
+
+
+def test_batch_applies_every_operation(app, client, create_user):
+    user_id, headers = create_user(app)
+    updated = client.post('/api/tasks', json={'title': 'antes'}, headers=headers).get_json()['id']
+    deleted = client.post('/api/tasks', json={'title': 'sai'}, headers=headers).get_json()['id']
+    recurring = client.post('/api/tasks', headers=headers, json={
+        'title': 'diária', 'due_date': '2026-01-31T09:00:00-03:00', 'is_recurring': True, 'recurrence_type': 'daily'
+    }).get_json()['id']
+
+    response = batch(
+        client, headers,
+        {'op': 'create', 'data': {'title': 'nova'}},
+        {'op': 'update', 'id': updated, 'data': {'title': 'depois', 'completed': True}},
+        {'op': 'delete', 'id': deleted},
+        {'op': 'update', 'id': recurring, 'data': {'completed': True}}
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [result['status'] for result in body['results']] == [201, 200, 204, 200]
+    assert body['results'][1]['task']['title'] == 'depois'
+    assert [task['due_date'][:10] for task in body['spawned']] == ['2026-02-01']
+    assert titles(app, user_id) == ['depois', 'diária', 'diária', 'nova']
+
+
+@pytest.mark.parametrize('data, error', [
+    ({'title': None}, 'Título é obrigatório'),
+    ({'title': 'x' * 101}, 'Título com mais de 100 caracteres'),
+    ({'completed': 'sim'}, 'Campo completed deve ser booleano'),
+    ({'recurrence_type': 'yearly'}, 'Tipo de recorrência inválido'),
+    ({'due_date': 'amanhã'}, 'Data inválida'),
+])
+def test_invalid_update_is_a_400_for_that_operation(app, client, create_user, data, error):
+    user_id, headers = create_user(app)
+    task_id = client.post('/api/tasks', json={'title': 'intacta'}, headers=headers).get_json()['id']
+
+    response = batch(
+        client, headers,
+        {'op': 'create', 'data': {'title': 'não criada'}},
+        {'op': 'update', 'id': task_id, 'data': data}
+    )
+
+    assert response.status_code == 400
+    results = response.get_json()['results']
+    assert results[0]['status'] == 'skipped'
+    assert (results[1]['status'], results[1]['error']) == (400, error)
+    assert titles(app, user_id) == ['intacta']
+
+
+def test_other_users_task_is_not_found(app, client, create_user):
+    _, owner_headers = create_user(app, email='dono@example.com')
+    _, headers = create_user(app, email='outro@example.com')
+    task_id = client.post('/api/tasks', json={'title': 'alheia'}, headers=owner_headers).get_json()['id']
+
+    response = batch(client, headers, {'op': 'delete', 'id': task_id})
+
+    assert response.status_code == 400
+    assert response.get_json()['results'][0]['status'] == 404
+
+
+def test_database_errors_are_not_sent_to_the_client(app, client, create_user, monkeypatch):
+    _, headers = create_user(app)
+
+    def failing_bump(session, user_id):
+        raise IntegrityError('UPDATE task SET title=?', ('segredo',), Exception('NOT NULL constraint failed'))
+
+    monkeypatch.setattr(routes, 'bump_task_revision', failing_bump)
+    response = batch(client, headers, {'op': 'create', 'data': {'title': 'nova'}})
+
+    assert response.status_code == 500
+    body = response.get_data(as_text=True)
+    assert 'UPDATE' not in body and 'segredo' not in body and 'constraint' not in body
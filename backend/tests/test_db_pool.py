@@ -0,0 +1,22 @@
+from db_pool import engine_options
+
+
+def pgbouncer_config(uri):
+    return {'SQLALCHEMY_DATABASE_URI': uri, 'DB_PGBOUNCER': True}
+
+
+def test_pgbouncer_disables_prepared_statements_on_psycopg3():
+    options = engine_options(pgbouncer_config('postgresql+psycopg://todo@db/todo'))
+
+    assert options['connect_args'] == {'prepare_threshold': None}
+
+
+def test_pgbouncer_leaves_other_drivers_alone():
+    for uri in ('postgresql+psycopg2://todo@db/todo', 'postgresql://todo@db/todo'):
+        assert 'connect_args' not in engine_options(pgbouncer_config(uri))
+
+
+def test_prepared_statements_stay_on_without_pgbouncer():
+    options = engine_options({'SQLALCHEMY_DATABASE_URI': 'postgresql+psycopg://todo@db/todo'})
+
+    assert 'connect_args' not in options
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from models import db, Task, BRAZIL_TZ
+from notifications import DueTaskScheduler, notify_due_tasks
+
+
+def add_task(app, user_id, due_date, **fields):
+    with app.app_context():
+        task = Task(title=fields.pop('title', 'tarefa'), due_date=due_date, user_id=user_id, **fields)
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+
+def notified_at(app, task_id):
+    with app.app_context():
+        return db.session.get(Task, task_id).notified_at
+
+
+def test_same_due_date_keeps_the_task_notified(app, client, create_user):
+    user_id, headers = create_user(app)
+    due = datetime.now(BRAZIL_TZ).replace(microsecond=0) - timedelta(hours=1)
+    task_id = add_task(app, user_id, due, notified_at=due)
+
+    # O cliente reenvia o mesmo vencimento junto com outra alteração
+    response = client.put(f'/api/tasks/{task_id}', headers=headers,
+                          json={'title': 'renomeada', 'due_date': due.isoformat()})
+
+    assert response.status_code == 200
+    assert notified_at(app, task_id) is not None
+
+
+def test_new_due_date_makes_the_task_notifiable_again(app, client, create_user):
+    user_id, headers = create_user(app)
+    due = datetime.now(BRAZIL_TZ).replace(microsecond=0) - timedelta(hours=1)
+    task_id = add_task(app, user_id, due, notified_at=due)
+
+    response = client.put(f'/api/tasks/{task_id}', headers=headers,
+                          json={'due_date': (due + timedelta(days=1)).isoformat()})
+
+    assert response.status_code == 200
+    assert notified_at(app, task_id) is None
+
+
+def test_sweeper_claims_every_users_due_tasks_once(app, create_user):
+    connected_id, _ = create_user(app, email='conectado@example.com')
+    offline_id, _ = create_user(app, email='offline@example.com')
+    now = datetime.now(BRAZIL_TZ)
+    overdue_id = add_task(app, connected_id, now - timedelta(days=2))
+    future_id = add_task(app, connected_id, now + timedelta(days=1))
+    offline_task_id = add_task(app, offline_id, now - timedelta(hours=1))
+
+    with app.app_context():
+        assert notify_due_tasks(now, batch_size=1) == 2
+        assert notify_due_tasks(now) == 0
+
+    # Quem está offline também sai do índice de pendentes: o backlog não se acumula
+    assert notified_at(app, overdue_id) is not None
+    assert notified_at(app, offline_task_id) is not None
+    assert notified_at(app, future_id) is None
+
+
+def test_every_worker_delivers_the_claimed_tasks(app, create_user):
+    user_id, _ = create_user(app)
+    other_id, _ = create_user(app, email='outro@example.com')
+    # Um agendador por worker, cada um com uma aba do mesmo usuário
+    workers = [DueTaskScheduler(lag=0), DueTaskScheduler(lag=0)]
+    tabs = [worker.subscribe(user_id) for worker in workers]
+    task_id = add_task(app, user_id, datetime.now(BRAZIL_TZ) - timedelta(minutes=1))
+    add_task(app, other_id, datetime.now(BRAZIL_TZ) - timedelta(minutes=1))
+
+    with app.app_context():
+        assert notify_due_tasks() == 2
+        assert [worker.run_once() for worker in workers] == [1, 1]
+        assert [worker.run_once() for worker in workers] == [0, 0]
+
+    for events in tabs:
+        assert events.get_nowait()['id'] == task_id
+        assert events.empty()
@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from email_outbox import deliver_batch, enqueue_verification_email
+from email_service import StubTransport
+from models import db, EmailOutbox, BRAZIL_TZ
+
+
+class FailingTransport:
+    def __init__(self):
+        self.calls = 0
+
+    def send(self, params):
+        self.calls += 1
+        raise RuntimeError('resend fora do ar')
+
+
+def queue_email(app, email='user@example.com', code='123456'):
+    with app.app_context():
+        enqueue_verification_email(email, code)
+        db.session.commit()
+        return db.session.scalars(select(EmailOutbox.id).order_by(EmailOutbox.id.desc())).first()
+
+
+def outbox_row(app, message_id):
+    with app.app_context():
+        return db.session.get(EmailOutbox, message_id)
+
+
+def test_delivered_message_is_marked_sent(app):
+    message_id = queue_email(app)
+    transport = StubTransport()
+
+    with app.app_context():
+        counts = deliver_batch(transport)
+
+    assert counts == {'sent': 1, 'retry': 0, 'dead': 0}
+    assert transport.sent[0]['to'] == ['user@example.com']
+    message = outbox_row(app, message_id)
+    assert message.status == 'sent'
+    assert message.attempts == 1
+    assert message.sent_at is not None
+
+
+def test_failed_message_backs_off_then_goes_to_dead_letter(make_app):
+    app = make_app(EMAIL_MAX_ATTEMPTS=3, EMAIL_RETRY_BASE_SECONDS=15, EMAIL_RETRY_MAX_SECONDS=300)
+    message_id = queue_email(app)
+    transport = FailingTransport()
+    now = datetime.now(BRAZIL_TZ)
+
+    with app.app_context():
+        assert deliver_batch(transport, now=now) == {'sent': 0, 'retry': 1, 'dead': 0}
+        # Antes do backoff a mensagem não é tentada de novo
+        assert deliver_batch(transport, now=now + timedelta(seconds=10)) == {'sent': 0, 'retry': 0, 'dead': 0}
+        assert deliver_batch(transport, now=now + timedelta(seconds=15)) == {'sent': 0, 'retry': 1, 'dead': 0}
+        assert deliver_batch(transport, now=now + timedelta(seconds=45)) == {'sent': 0, 'retry': 0, 'dead': 1}
+        assert deliver_batch(transport, now=now + timedelta(days=1)) == {'sent': 0, 'retry': 0, 'dead': 0}
+
+    assert transport.calls == 3
+    message = outbox_row(app, message_id)
+    assert message.status == 'dead'
+    assert message.attempts == 3
+    assert 'resend fora do ar' in message.last_error
+
+
+def test_resend_replaces_the_unsent_code(make_app):
+    app = make_app(BCRYPT_POOL_WORKERS=0)
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'email': 'novo@example.com', 'name': 'Novo', 'password': 'senha-segura'
+    })
+
+    response = client.post('/api/auth/resend-verification', json={'email': 'novo@example.com'})
+
+    assert response.status_code == 200
+    with app.app_context():
+        messages = db.session.scalars(select(EmailOutbox)).all()
+        assert [message.status for message in messages] == ['pending']
+        code = json.loads(messages[0].payload)['code']
+        transport = StubTransport()
+        deliver_batch(transport)
+    assert code in transport.sent[0]['html']
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from models import db, Task, BRAZIL_TZ
+from notification_routes import KEEP_ALIVE
+from notifications import notify_due_tasks, scheduler
+
+
+def open_stream(client, url, **kwargs):
+    response = client.get(url, **kwargs)
+    first = next(iter(response.response)) if response.status_code == 200 else None
+    response.close()
+    return response.status_code, first
+
+
+def test_ticket_opens_the_stream(app, client, create_user):
+    _, headers = create_user(app)
+    ticket = client.post('/api/notifications/ticket', headers=headers).get_json()['ticket']
+
+    status, first = open_stream(client, f'/api/notifications/stream?ticket={ticket}')
+
+    assert status == 200
+    assert 'retry' in (first.decode() if isinstance(first, bytes) else first)
+
+
+def test_access_token_is_not_accepted_in_the_url(app, client, create_user):
+    _, headers = create_user(app)
+    token = headers['Authorization'].split()[1]
+
+    status, _ = open_stream(client, f'/api/notifications/stream?jwt={token}')
+
+    assert status == 401
+
+
+def test_expired_or_forged_ticket_is_rejected(make_app, create_user):
+    app = make_app(NOTIFICATION_TICKET_SECONDS=-1)
+    client = app.test_client()
+    _, headers = create_user(app)
+    ticket = client.post('/api/notifications/ticket', headers=headers).get_json()['ticket']
+
+    assert open_stream(client, f'/api/notifications/stream?ticket={ticket}')[0] == 401
+    assert open_stream(client, '/api/notifications/stream?ticket=forjado')[0] == 401
+
+
+def test_ticket_is_not_a_bearer_token(app, client, create_user):
+    _, headers = create_user(app)
+    ticket = client.post('/api/notifications/ticket', headers=headers).get_json()['ticket']
+
+    response = client.get('/api/tasks', headers={'Authorization': f'Bearer {ticket}'})
+
+    assert response.status_code in (401, 422)
+
+
+def test_header_token_still_opens_the_stream(app, client, create_user):
+    _, headers = create_user(app)
+
+    assert open_stream(client, '/api/notifications/stream', headers=headers)[0] == 200
+
+
+def test_stream_does_not_repeat_its_initial_state(make_app, create_user, monkeypatch):
+    app = make_app(NOTIFICATION_HEARTBEAT_SECONDS=1)
+    monkeypatch.setattr(scheduler, 'lag', 0)
+    user_id, headers = create_user(app)
+    with app.app_context():
+        due = datetime.now(BRAZIL_TZ) - timedelta(hours=1)
+        db.session.add(Task(title='vencida', due_date=due, user_id=user_id))
+        db.session.commit()
+
+    response = app.test_client().get('/api/notifications/stream', headers=headers, buffered=False)
+    chunks = (chunk.decode() for chunk in response.response)
+    try:
+        assert next(chunks).startswith('retry')
+        assert '"vencida"' in next(chunks)
+
+        with app.app_context():
+            db.session.add(Task(title='nova', due_date=datetime.now(BRAZIL_TZ), user_id=user_id))
+            db.session.commit()
+            # O claim inclui a tarefa que a conexão já enviou no estado inicial
+            assert notify_due_tasks() == 2
+            scheduler.run_once()
+
+        assert '"nova"' in next(chunks)
+        assert next(chunks) == KEEP_ALIVE
+    finally:
+        response.close()
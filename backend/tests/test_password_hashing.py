@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from password_hashing import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher()
+    hasher.workers = 1
+    hasher.queue_size = 1
+    hasher.timeout = 0.05
+    hasher._slots = threading.BoundedSemaphore(hasher.queue_size)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_timed_out_job_keeps_its_slot_until_it_finishes(hasher):
+    with pytest.raises(PasswordHasherBusy, match='Tempo esgotado'):
+        hasher.hash('senha')
+
+    # O job continua no pool: a vaga ainda está ocupada
+    with pytest.raises(PasswordHasherBusy, match='Fila'):
+        hasher.hash('senha')
+
+    assert hasher._slots.acquire(timeout=60)
+    hasher._slots.release()
+
+
+def test_finished_job_frees_its_slot(hasher):
+    hasher.timeout = 60
+    password_hash = hasher.hash('senha')
+
+    assert hasher.check('senha', password_hash)
+    assert hasher._slots.acquire(timeout=5)
+    hasher._slots.release()
+
+
+GEVENT_POOL_SCRIPT = textwrap.dedent("""
+    from gevent import monkey
+    monkey.patch_all()
+
+    import gevent
+    from password_hashing import PasswordHasher
+
+    hasher = PasswordHasher()
+    hasher.rounds = 10
+    beats = []
+
+    def heartbeat():
+        while True:
+            beats.append(1)
+            gevent.sleep(0.01)
+
+    ticker = gevent.spawn(heartbeat)
+    jobs = [gevent.spawn(hasher.hash, f'senha{i}') for i in range(8)]
+    gevent.joinall(jobs, timeout=60, raise_error=True)
+    assert all(hasher.check(f'senha{i}', job.value) for i, job in enumerate(jobs))
+    ticker.kill()
+    hasher.shutdown()
+    print(len(beats))
+""")
+
+
+def test_process_pool_under_gevent_workers():
+    pytest.importorskip('gevent')
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    # Processo separado: o monkey patch não pode vazar para os outros testes
+    result = subprocess.run([sys.executable, '-c', GEVENT_POOL_SCRIPT], cwd=backend_dir,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    # O hub do gevent continuou rodando enquanto o bcrypt ocupava o pool
+    assert int(result.stdout.split()[-1]) > 10
@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from sqlalchemy import event
+
+from models import db
+from password_hashing import hasher
+from rate_limit import MemoryBucketStore, SQLiteBucketStore, rate_limiter, take_tokens
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_take_tokens_is_all_or_nothing():
+    states = {'vazio': (0.5, 100.0)}
+    buckets = [('cheio', 5, 1.0), ('vazio', 1, 0.1)]
+
+    new_states, rejected = take_tokens(states, buckets, 100.0)
+    assert new_states is None
+    # Retry-After do balde mais longe de um token: (1 - 0.5) / 0.1
+    assert rejected[0] == 'vazio' and rejected[1] == pytest.approx(5.0)
+
+    store = MemoryBucketStore()
+    assert store.take([('a', 5, 1.0), ('b', 1, 0.1)], 100.0) is None
+    assert store.take([('a', 5, 1.0), ('b', 1, 0.1)], 100.0)[0] == 'b'
+    # O balde com folga não perdeu o token da tentativa recusada
+    assert store._states['a'] == (4, 100.0)
+    # Recarga proporcional ao tempo parado
+    assert store.take([('b', 1, 0.1)], 110.0) is None
+
+
+def test_sqlite_store_is_shared_across_connections_and_processes(tmp_path):
+    path = str(tmp_path / 'baldes.db')
+    buckets = [('login:ip:1.2.3.4', 3, 0.001)]
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+
+    assert first.take(buckets, 100.0) is None
+    assert second.take(buckets, 100.0) is None
+    # Outro processo, como outro worker do gunicorn
+    script = textwrap.dedent(f"""
+        from rate_limit import SQLiteBucketStore
+        print(SQLiteBucketStore({path!r}).take({buckets!r}, 100.0))
+    """)
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'None'
+
+    key, retry_after = first.take(buckets, 100.0)
+    assert key == 'login:ip:1.2.3.4' and retry_after == pytest.approx(1000.0)
+
+
+@pytest.fixture
+def limited_app(make_app, tmp_path):
+    app = make_app(
+        RATE_LIMIT_BACKEND='sqlite', RATE_LIMIT_STORE_PATH=str(tmp_path / 'baldes.db'),
+        RATE_LIMIT_LOGIN_IP='', RATE_LIMIT_LOGIN_EMAIL='2/60',
+        RATE_LIMIT_REGISTER_IP='1/60', RATE_LIMIT_REGISTER_EMAIL='', RATE_LIMIT_BCRYPT='100/1'
+    )
+    yield app
+    # O limiter é global: os próximos apps dos testes voltam para RATE_LIMIT_BACKEND='none'
+    rate_limiter.store = None
+
+
+@pytest.fixture
+def no_work(limited_app, monkeypatch):
+    """Counts SQL statements and fails on any bcrypt call once armed."""
+    calls = []
+    with limited_app.app_context():
+        engines = list(db.engines.values())
+
+    def count(*args):
+        calls.append('sql')
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', count)
+
+    def arm():
+        calls.clear()
+
+        def fail(*args):
+            calls.append('bcrypt')
+            raise AssertionError('bcrypt não deveria rodar')
+
+        monkeypatch.setattr(hasher, 'check', fail)
+        monkeypatch.setattr(hasher, 'hash', fail)
+        return calls
+
+    yield arm
+    for engine in engines:
+        event.remove(engine, 'before_cursor_execute', count)
+
+
+def login(client, email='alguem@example.com'):
+    return client.post('/api/auth/login', json={'email': email, 'password': 'errada'})
+
+
+def test_throttled_login_is_rejected_before_db_and_bcrypt(limited_app, no_work):
+    client = limited_app.test_client()
+    assert login(client).status_code == 401
+    assert login(client).status_code == 401
+
+    calls = no_work()
+    response = login(client)
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= 30
+    assert calls == []
+    # Outro email tem o próprio balde e chega à consulta do usuário
+    calls = no_work()
+    assert login(client, 'outro@example.com').status_code == 401
+    assert 'sql' in calls
+
+
+def test_throttled_register_is_rejected_before_db_and_bcrypt(limited_app, no_work):
+    client = limited_app.test_client()
+    body = {'name': 'Teste', 'email': 'novo@example.com', 'password': 'curta'}
+    assert client.post('/api/auth/register', json=body).status_code != 429
+
+    calls = no_work()
+    response = client.post('/api/auth/register', json=dict(body, email='outro@example.com'))
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) == 60
+    assert calls == []
+
+
+def test_bcrypt_bucket_and_store_failures_answer_503(make_app, limited_app, no_work, monkeypatch):
+    client = limited_app.test_client()
+    calls = no_work()
+
+    def broken(*args):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(rate_limiter.store, 'take', broken)
+    response = login(client)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert calls == []
+
+    # Balde global do bcrypt esgotado: carga, não abuso
+    app = make_app(
+        RATE_LIMIT_BACKEND='memory', RATE_LIMIT_LOGIN_IP='', RATE_LIMIT_LOGIN_EMAIL='', RATE_LIMIT_BCRYPT='1/10'
+    )
+    client = app.test_client()
+    assert login(client, 'a@example.com').status_code == 401
+    response = login(client, 'b@example.com')
+    assert response.status_code == 503
+    assert 1 <= int(response.headers['Retry-After']) <= 10
@@ -0,0 +1,77 @@
+import sqlite3
+import time
+
+import pytest
+from flask import g
+from sqlalchemy import select
+
+from db_routing import REPLICA_BIND, WRITTEN_AT_HEADER
+from models import db, Task
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    return make_app(
+        SQLALCHEMY_REPLICA_URI='sqlite:///' + str(tmp_path / 'replica.db'),
+        REPLICA_STICKY_SECONDS=5, TASK_CACHE_BACKEND='none'
+    )
+
+
+def replicate(tmp_path):
+    """Copia o primário para a réplica: tudo que for escrito depois fica só no primário."""
+    primary = sqlite3.connect(tmp_path / 'primary.db')
+    replica = sqlite3.connect(tmp_path / 'replica.db')
+    primary.backup(replica)
+    primary.close()
+    replica.close()
+
+
+def task_titles(client, headers):
+    response = client.get('/api/tasks', headers=headers)
+    assert response.status_code == 200
+    return [task['title'] for task in response.get_json()]
+
+
+def test_reads_go_to_the_replica(app, client, create_user, tmp_path):
+    _, headers = create_user(app)
+    client.post('/api/tasks', json={'title': 'replicada'}, headers=headers)
+    replicate(tmp_path)
+    response = client.post('/api/tasks', json={'title': 'só no primário'}, headers=headers)
+
+    assert response.status_code == 201
+    # Sem X-DB-Written-At a leitura cai na réplica, que ainda não tem a nova tarefa
+    assert task_titles(client, headers) == ['replicada']
+
+
+def test_recent_write_reads_from_the_primary(app, client, create_user, tmp_path):
+    _, headers = create_user(app)
+    replicate(tmp_path)
+    response = client.post('/api/tasks', json={'title': 'nova'}, headers=headers)
+    written_at = response.headers[WRITTEN_AT_HEADER]
+
+    assert task_titles(client, dict(headers, **{WRITTEN_AT_HEADER: written_at})) == ['nova']
+
+    # Fora da janela (ou no futuro distante) o cliente volta para a réplica
+    stale = str(int((time.time() - 60) * 1000))
+    future = str(int((time.time() + 3600) * 1000))
+    assert task_titles(client, dict(headers, **{WRITTEN_AT_HEADER: stale})) == []
+    assert task_titles(client, dict(headers, **{WRITTEN_AT_HEADER: future})) == []
+
+
+def test_writes_and_flushes_go_to_the_primary(app, create_user, tmp_path):
+    user_id, _ = create_user(app)
+    replicate(tmp_path)
+
+    with app.test_request_context('/api/tasks'):
+        g.db_route = REPLICA_BIND
+        assert db.session.get_bind(mapper=Task) is db.engines[REPLICA_BIND]
+
+        db.session.add(Task(title='gravada', user_id=user_id))
+        db.session.flush()
+        db.session.commit()
+        # A leitura continua na réplica, que não recebeu a escrita
+        assert db.session.scalars(select(Task.title)).all() == []
+        db.session.remove()
+
+    with app.app_context():
+        assert db.session.scalars(select(Task.title)).all() == ['gravada']
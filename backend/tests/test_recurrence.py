@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+from models import db, Task, TaskSeries, BRAZIL_TZ
+from notifications import claim_due_tasks
+from recurrence import expand_occurrences, first_index_from, is_occurrence, materialize_due_series, nth_occurrence
+
+
+def local(*args):
+    return datetime(*args, tzinfo=BRAZIL_TZ)
+
+
+def start_of_series():
+    """Meio-dia daqui a cinco dias: na criação só a primeira ocorrência é gravada."""
+    now = datetime.now(BRAZIL_TZ)
+    return now.replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=5)
+
+
+def create_series(client, headers, starts_at, **fields):
+    body = dict({'title': 'diária', 'recurrence_type': 'daily', 'starts_at': starts_at.isoformat()}, **fields)
+    response = client.post('/api/tasks/series', json=body, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def series_tasks(app, series_id):
+    with app.app_context():
+        return [
+            (task.occurrence_date.replace(tzinfo=BRAZIL_TZ), task.title, task.completed)
+            for task in Task.query.filter_by(series_id=series_id).order_by(Task.occurrence_date)
+        ]
+
+
+def test_monthly_occurrences_clamp_to_the_month_end():
+    starts_at = local(2026, 1, 31, 9)
+
+    assert [nth_occurrence(starts_at, 'monthly', n) for n in range(3)] == [
+        starts_at, local(2026, 2, 28, 9), local(2026, 3, 31, 9)
+    ]
+    assert first_index_from(starts_at, 'monthly', local(2026, 3, 1)) == 2
+    assert first_index_from(starts_at, 'monthly', local(2026, 3, 31, 9)) == 2
+    assert first_index_from(starts_at, 'monthly', local(2026, 3, 31, 10)) == 3
+    assert list(expand_occurrences(starts_at, 'monthly', local(2026, 2, 1), local(2026, 5, 1))) == [
+        local(2026, 2, 28, 9), local(2026, 3, 31, 9), local(2026, 4, 30, 9)
+    ]
+    assert list(expand_occurrences(
+        starts_at, 'monthly', local(2026, 2, 1), local(2026, 5, 1), until=local(2026, 3, 31, 9)
+    )) == [local(2026, 2, 28, 9), local(2026, 3, 31, 9)]
+
+
+def test_fixed_steps_round_up_to_the_next_occurrence():
+    starts_at = local(2026, 1, 1, 9)
+
+    assert first_index_from(starts_at, 'daily', local(2025, 12, 1)) == 0
+    assert first_index_from(starts_at, 'daily', local(2026, 1, 3, 9)) == 2
+    assert first_index_from(starts_at, 'daily', local(2026, 1, 3, 9, 1)) == 3
+    assert first_index_from(starts_at, 'weekly', local(2026, 1, 9)) == 2
+    assert list(expand_occurrences(starts_at, 'weekly', local(2026, 1, 2), local(2026, 1, 22))) == [
+        local(2026, 1, 8, 9), local(2026, 1, 15, 9)
+    ]
+
+
+def test_is_occurrence():
+    series = TaskSeries(recurrence_type='monthly', starts_at=local(2026, 1, 31, 9), until=local(2026, 4, 1))
+
+    assert is_occurrence(series, local(2026, 2, 28, 9))
+    assert is_occurrence(series, local(2026, 3, 31, 9))
+    assert not is_occurrence(series, local(2026, 2, 27, 9))
+    assert not is_occurrence(series, local(2026, 2, 28, 10))
+    # Depois do fim da série
+    assert not is_occurrence(series, local(2026, 4, 30, 9))
+
+
+def test_occurrence_put_materializes_one_row(app, client, create_user):
+    _, headers = create_user(app)
+    starts_at = start_of_series()
+    series_id = create_series(client, headers, starts_at)
+    second = starts_at + timedelta(days=1)
+    url = f'/api/tasks/series/{series_id}/occurrences'
+
+    created = client.put(url, json={'occurrence_date': second.isoformat(), 'title': 'alterada'}, headers=headers)
+    assert created.status_code == 201
+    updated = client.put(url, json={'occurrence_date': second.isoformat(), 'completed': True}, headers=headers)
+    assert updated.status_code == 200
+    assert updated.get_json()['id'] == created.get_json()['id']
+    assert series_tasks(app, series_id) == [(starts_at, 'diária', False), (second, 'alterada', True)]
+
+    not_an_occurrence = (second + timedelta(hours=1)).isoformat()
+    assert client.put(url, json={'occurrence_date': not_an_occurrence}, headers=headers).status_code == 400
+
+    window = f'from={starts_at.isoformat()}&to={(starts_at + timedelta(days=3)).isoformat()}'
+    occurrences = client.get(f'/api/tasks/calendar?{window}'.replace('+', '%2B'), headers=headers).get_json()['occurrences']
+    assert [(item['title'], item['virtual']) for item in occurrences] == [
+        ('diária', False), ('alterada', False), ('diária', True)
+    ]
+
+
+def test_sweeper_materializes_occurrences_as_they_fall_due(app, client, create_user):
+    _, headers = create_user(app)
+    starts_at = start_of_series()
+    series_id = create_series(client, headers, starts_at)
+    # Ocorrência alterada antes de vencer não é gravada de novo
+    client.put(
+        f'/api/tasks/series/{series_id}/occurrences',
+        json={'occurrence_date': (starts_at + timedelta(days=1)).isoformat(), 'title': 'alterada'},
+        headers=headers
+    )
+    later = starts_at + timedelta(days=1, hours=1)
+
+    with app.app_context():
+        assert materialize_due_series(now=later) == 1
+        assert materialize_due_series(now=later) == 0
+        # As vencidas entram no claim das notificações como qualquer tarefa
+        assert claim_due_tasks(now=later) == 2
+    assert series_tasks(app, series_id) == [
+        (starts_at, 'diária', False),
+        (starts_at + timedelta(days=1), 'alterada', False),
+        (starts_at + timedelta(days=2), 'diária', False)
+    ]
+
+    tasks = client.get('/api/tasks', headers=headers).get_json()
+    assert sorted(task['title'] for task in tasks) == ['alterada', 'diária', 'diária']
+    summary = client.get('/api/tasks/summary', headers=headers).get_json()
+    assert summary['future'] == 3 and summary['recurring'] == 3
+
+
+def test_sweeper_stops_at_the_end_of_the_series(app, client, create_user):
+    _, headers = create_user(app)
+    starts_at = start_of_series()
+    until = starts_at + timedelta(days=1)
+    series_id = create_series(client, headers, starts_at, until=until.isoformat())
+
+    with app.app_context():
+        assert materialize_due_series(now=starts_at + timedelta(days=10)) == 1
+        assert materialize_due_series(now=starts_at + timedelta(days=20)) == 0
+        assert db.session.get(TaskSeries, series_id).materialized_until.replace(tzinfo=BRAZIL_TZ) == until
+    assert [row[0] for row in series_tasks(app, series_id)] == [starts_at, until]
+
+
+def test_renaming_the_series_renames_untouched_pending_occurrences(app, client, create_user):
+    _, headers = create_user(app)
+    starts_at = start_of_series()
+    series_id = create_series(client, headers, starts_at)
+    client.put(
+        f'/api/tasks/series/{series_id}/occurrences',
+        json={'occurrence_date': (starts_at + timedelta(days=1)).isoformat(), 'title': 'alterada'},
+        headers=headers
+    )
+
+    assert client.put(f'/api/tasks/series/{series_id}', json={'title': 'nova'}, headers=headers).status_code == 200
+    assert [row[1] for row in series_tasks(app, series_id)] == ['nova', 'alterada']
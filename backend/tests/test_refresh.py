@@ -0,0 +1,60 @@
+import pytest
+
+from models import db, User
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(BCRYPT_POOL_WORKERS=0, REFRESH_REUSE_GRACE_SECONDS=10)
+
+
+def login(app, client, email='user@example.com'):
+    with app.app_context():
+        user = User(email=email, name='Teste', email_verified=True)
+        user.set_password('senha-segura')
+        db.session.add(user)
+        db.session.commit()
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'senha-segura'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def refresh(client, refresh_token):
+    return client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+
+
+def test_concurrent_refresh_asks_the_other_tab_to_retry(app, client):
+    tokens = login(app, client)
+
+    first = refresh(client, tokens['refresh_token'])
+    second = refresh(client, tokens['refresh_token'])
+
+    assert first.status_code == 200
+    assert second.status_code == 409
+    assert second.get_json()['retry'] is True
+    # A família continua válida: a aba que venceu segue renovando
+    assert refresh(client, first.get_json()['refresh_token']).status_code == 200
+
+
+def test_reuse_after_the_grace_window_revokes_the_family(make_app):
+    app = make_app(BCRYPT_POOL_WORKERS=0, REFRESH_REUSE_GRACE_SECONDS=-1)
+    client = app.test_client()
+    tokens = login(app, client)
+
+    rotated = refresh(client, tokens['refresh_token']).get_json()
+
+    assert refresh(client, tokens['refresh_token']).status_code == 401
+    assert refresh(client, rotated['refresh_token']).status_code == 401
+
+
+def test_refresh_reloads_the_user_claims(app, client):
+    tokens = login(app, client)
+    with app.app_context():
+        user = db.session.scalars(db.select(User)).one()
+        user.name = 'Nome Novo'
+        db.session.commit()
+
+    access_token = refresh(client, tokens['refresh_token']).get_json()['access_token']
+    me = client.get('/api/auth/me', headers={'Authorization': f'Bearer {access_token}'})
+
+    assert me.get_json()['user']['name'] == 'Nome Novo'
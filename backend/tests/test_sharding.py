@@ -0,0 +1,210 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import verify_jwt_in_request
+from sqlalchemy import update
+
+from models import db, Task, User, BRAZIL_TZ
+from shard_router import HashRing, shard_router
+from sweeper import purge_unverified_users
+from task_archive import archive_completed_tasks
+from task_search import search_backend
+import shard_tool
+
+SHARDS = ('default', 's1', 's2')
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    return make_app(
+        TASK_SHARDS=f"default,s1=sqlite:///{tmp_path / 's1.db'},s2=sqlite:///{tmp_path / 's2.db'}",
+        SHARD_DIRECTORY_CACHE_SECONDS=0, TASK_CACHE_BACKEND='none'
+    )
+
+
+@pytest.fixture
+def count_rows(tmp_path):
+    """count_rows(shard, user_id, table='task') lido direto do arquivo do shard."""
+    files = {'default': tmp_path / 'primary.db', 's1': tmp_path / 's1.db', 's2': tmp_path / 's2.db'}
+
+    def count(shard, user_id, table='task'):
+        connection = sqlite3.connect(files[shard])
+        try:
+            return connection.execute(f'select count(*) from {table} where user_id = ?', (user_id,)).fetchone()[0]
+        finally:
+            connection.close()
+
+    return count
+
+
+@pytest.fixture
+def users_by_shard(app, create_user):
+    """{shard: (user_id, headers)} with one verified user owned by each shard."""
+    owners = {}
+    index = 0
+    while len(owners) < len(SHARDS):
+        user_id, headers = create_user(app, email=f'user{index}@example.com')
+        index += 1
+        owners.setdefault(shard_router.ring.node_for(user_id), (user_id, headers))
+    return owners
+
+
+def test_ring_is_stable_and_grows_by_about_one_nth():
+    keys = range(10000)
+    ring = HashRing(list(SHARDS))
+    placement = {key: ring.node_for(key) for key in keys}
+
+    assert placement == {key: HashRing(list(SHARDS)).node_for(key) for key in keys}
+    assert set(placement.values()) == set(SHARDS)
+
+    grown = HashRing(list(SHARDS) + ['s3'])
+    moved = [key for key in keys if grown.node_for(key) != placement[key]]
+    # Só o shard novo recebe usuários, e só ~1/4 deles muda de dono
+    assert {grown.node_for(key) for key in moved} == {'s3'}
+    assert 0.15 < len(moved) / len(placement) < 0.35
+
+
+def test_tasks_are_written_to_the_users_shard(app, users_by_shard, count_rows):
+    client = app.test_client()
+    for shard, (user_id, headers) in users_by_shard.items():
+        assert client.post('/api/tasks', json={'title': f'no {shard}'}, headers=headers).status_code == 201
+
+    for shard, (user_id, headers) in users_by_shard.items():
+        assert [count_rows(other, user_id) for other in SHARDS] == [int(other == shard) for other in SHARDS]
+        assert [task['title'] for task in client.get('/api/tasks', headers=headers).get_json()] == [f'no {shard}']
+
+
+def test_get_bind_picks_the_users_shard(app, users_by_shard):
+    for shard, (user_id, headers) in users_by_shard.items():
+        with app.test_request_context('/api/tasks', headers=headers):
+            verify_jwt_in_request()
+            assert db.session.get_bind(mapper=Task) is shard_router.engine(db, shard)
+            # Tabelas fora de SHARDED_TABLES continuam no banco principal
+            assert db.session.get_bind(mapper=User) is db.engines[None]
+
+
+def test_directory_overrides_the_ring(app, users_by_shard, count_rows):
+    user_id, headers = users_by_shard['s1']
+    with app.app_context():
+        shard_tool.set_directory(user_id, 's2')
+
+    response = app.test_client().post('/api/tasks', json={'title': 'fixada'}, headers=headers)
+
+    assert response.status_code == 201
+    assert count_rows('s1', user_id) == 0
+    assert count_rows('s2', user_id) == 1
+
+
+def test_writes_during_a_move_get_503(app, users_by_shard):
+    client = app.test_client()
+    user_id, headers = users_by_shard['s1']
+    client.post('/api/tasks', json={'title': 'antes'}, headers=headers)
+    with app.app_context():
+        shard_tool.set_directory(user_id, 's1', moving=True)
+
+    response = client.post('/api/tasks', json={'title': 'durante'}, headers=headers)
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    # Leituras continuam no shard de origem
+    assert [task['title'] for task in client.get('/api/tasks', headers=headers).get_json()] == ['antes']
+
+
+def test_shard_tool_moves_a_user(app, users_by_shard, count_rows):
+    client = app.test_client()
+    user_id, headers = users_by_shard['s1']
+    for title in ('um', 'dois'):
+        client.post('/api/tasks', json={'title': title}, headers=headers)
+    changes = client.get('/api/tasks/changes', headers=headers).get_json()
+    old_ids = sorted(task['id'] for task in changes['tasks'])
+
+    with app.app_context():
+        result = shard_tool.move_user(user_id, 's2', wait=0)
+        assert shard_tool.locate(user_id)['shard'] == 's2'
+
+    assert result['moved'] and result['tasks'] == 2
+    assert count_rows('s1', user_id) == 0
+    assert count_rows('s2', user_id) == 2
+    tasks = client.get('/api/tasks', headers=headers).get_json()
+    assert sorted(task['title'] for task in tasks) == ['dois', 'um']
+    # Os ids mudam no destino: a sincronização incremental traz as tarefas novas e
+    # remove os ids antigos (ou os substitui, quando o destino reaproveita o id)
+    new_ids = sorted(task['id'] for task in tasks)
+    delta = client.get(f"/api/tasks/changes?since={changes['cursor']}", headers=headers).get_json()
+    assert not delta['reset']
+    assert sorted(task['id'] for task in delta['tasks']) == new_ids
+    assert set(old_ids) <= set(delta['deleted']) | set(new_ids)
+    assert client.post('/api/tasks', json={'title': 'depois'}, headers=headers).status_code == 201
+    assert count_rows('s2', user_id) == 3
+
+
+def test_purge_unverified_users_covers_every_shard(app, count_rows):
+    signed_up = datetime.now(BRAZIL_TZ) - timedelta(hours=1)
+    owners = {}
+    with app.app_context():
+        index = 0
+        while len(owners) < len(SHARDS):
+            user = User(email=f'pendente{index}@example.com', name='Pendente', email_verified=False)
+            user.password_hash = 'sem-senha'
+            user.created_at = signed_up
+            db.session.add(user)
+            db.session.commit()
+            index += 1
+            owners.setdefault(shard_router.ring.node_for(user.id), user.id)
+        for shard, user_id in owners.items():
+            with shard_router.using(shard):
+                db.session.add(Task(title='sobra', user_id=user_id))
+                db.session.commit()
+
+        assert purge_unverified_users() == index
+        assert db.session.query(User).count() == 0
+
+    for shard, user_id in owners.items():
+        assert count_rows(shard, user_id) == 0
+
+
+def test_archive_runs_on_every_shard(app, users_by_shard, count_rows):
+    client = app.test_client()
+    for user_id, headers in users_by_shard.values():
+        task_id = client.post('/api/tasks', json={'title': 'feita'}, headers=headers).get_json()['id']
+        client.put(f'/api/tasks/{task_id}', json={'completed': True}, headers=headers)
+        client.post('/api/tasks', json={'title': 'pendente'}, headers=headers)
+
+    old = datetime.now(BRAZIL_TZ) - timedelta(days=40)
+    with app.app_context():
+        for shard in SHARDS:
+            with shard_router.using(shard):
+                db.session.execute(update(Task).where(Task.completed == True).values(updated_at=old))
+                db.session.commit()
+
+        assert archive_completed_tasks() == len(SHARDS)
+
+    for shard, (user_id, headers) in users_by_shard.items():
+        assert count_rows(shard, user_id) == 1
+        assert count_rows(shard, user_id, table='task_archive') == 1
+        archived = client.get('/api/tasks/archive', headers=headers).get_json()['tasks']
+        assert [task['title'] for task in archived] == ['feita']
+
+
+def test_search_backend_is_resolved_per_shard(app, users_by_shard, tmp_path):
+    # s1 sem o índice FTS5 (ainda não migrado): a busca cai no LIKE só nele
+    connection = sqlite3.connect(tmp_path / 's1.db')
+    for trigger in ('task_fts_insert', 'task_fts_delete', 'task_fts_update'):
+        connection.execute(f'DROP TRIGGER {trigger}')
+    connection.execute('DROP TABLE task_fts')
+    connection.commit()
+    connection.close()
+
+    client = app.test_client()
+    for shard, (user_id, headers) in users_by_shard.items():
+        client.post('/api/tasks', json={'title': f'relatório {shard}'}, headers=headers)
+        with app.test_request_context('/api/tasks/search', headers=headers):
+            verify_jwt_in_request()
+            assert search_backend() == ('like' if shard == 's1' else 'sqlite')
+
+        response = client.get('/api/tasks/search?q=relat', headers=headers)
+        assert response.status_code == 200
+        found = response.get_json()['tasks']
+        assert [task['title'] for task in found] == [f'relatório {shard}']
+        assert (found[0]['rank'] is None) == (shard == 's1')
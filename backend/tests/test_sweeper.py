@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from models import db, User, VerificationCode, BRAZIL_TZ
+from sweeper import purge_unverified_users
+
+EMAIL = 'novo@example.com'
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(BCRYPT_POOL_WORKERS=0)
+
+
+def register(client):
+    response = client.post('/api/auth/register', json={
+        'email': EMAIL, 'name': 'Novo', 'password': 'senha-segura'
+    })
+    assert response.status_code == 201
+
+
+def purge_after(app, **delta):
+    with app.app_context():
+        return purge_unverified_users(now=datetime.now(BRAZIL_TZ) + timedelta(**delta))
+
+
+def test_user_verifies_within_ten_minutes(app, client):
+    register(client)
+
+    # Várias passadas do sweeper enquanto o usuário abre o email
+    for minutes in (1, 3, 5, 9):
+        assert purge_after(app, minutes=minutes) == 0
+
+    with app.app_context():
+        code = db.session.scalars(select(VerificationCode.code).where(VerificationCode.email == EMAIL)).one()
+    response = client.post('/api/auth/verify-email', json={'email': EMAIL, 'code': code})
+
+    assert response.status_code == 200
+    assert response.get_json()['user']['email'] == EMAIL
+
+
+def test_valid_code_outlives_a_short_ttl(make_app):
+    app = make_app(BCRYPT_POOL_WORKERS=0, UNVERIFIED_USER_TTL_SECONDS=60)
+    register(app.test_client())
+
+    assert purge_after(app, minutes=9) == 0
+
+
+def test_user_is_removed_after_the_code_expires(app, client):
+    register(client)
+
+    assert purge_after(app, minutes=11) == 1
+    with app.app_context():
+        assert db.session.scalars(select(User).where(User.email == EMAIL)).first() is None
+        assert db.session.scalars(select(VerificationCode)).first() is None
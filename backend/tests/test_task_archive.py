@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import db, Task, TaskArchive, TaskTombstone, BRAZIL_TZ
+from task_archive import archive_completed_tasks
+
+
+def age_completed_tasks(app, days):
+    with app.app_context():
+        old = datetime.now(BRAZIL_TZ) - timedelta(days=days)
+        db.session.execute(update(Task).where(Task.completed == True).values(updated_at=old))
+        db.session.commit()
+
+
+def test_archive_moves_old_completed_tasks_without_tombstones(app, client, create_user):
+    _, headers = create_user(app)
+    done = client.post('/api/tasks', json={'title': 'feita'}, headers=headers).get_json()['id']
+    client.put(f'/api/tasks/{done}', json={'completed': True}, headers=headers)
+    client.post('/api/tasks', json={'title': 'pendente'}, headers=headers)
+    age_completed_tasks(app, 40)
+    recent = client.post('/api/tasks', json={'title': 'recente', 'completed': True}, headers=headers).get_json()['id']
+    cursor = client.get('/api/tasks/changes', headers=headers).get_json()['cursor']
+    assert len(client.get('/api/tasks', headers=headers).get_json()) == 3
+
+    with app.app_context():
+        assert archive_completed_tasks() == 1
+        assert db.session.query(TaskTombstone).count() == 0
+        assert [row.task_id for row in TaskArchive.query.all()] == [done]
+        assert db.session.get(Task, recent) is not None
+
+    # Nova revisão: o cache não serve a lista antiga, e o cursor anterior recarrega tudo
+    assert sorted(task['title'] for task in client.get('/api/tasks', headers=headers).get_json()) == ['pendente', 'recente']
+    changes = client.get(f'/api/tasks/changes?since={cursor}', headers=headers).get_json()
+    assert changes['reset']
+    assert sorted(task['title'] for task in changes['tasks']) == ['pendente', 'recente']
+
+
+def test_archive_pages_by_completion_date(app, client, create_user):
+    _, headers = create_user(app)
+    for index, title in enumerate(('primeira', 'segunda', 'terceira')):
+        task_id = client.post('/api/tasks', json={'title': title}, headers=headers).get_json()['id']
+        client.put(f'/api/tasks/{task_id}', json={'completed': True}, headers=headers)
+        with app.app_context():
+            completed_at = datetime.now(BRAZIL_TZ) - timedelta(days=60 - index)
+            db.session.execute(update(Task).where(Task.id == task_id).values(updated_at=completed_at))
+            db.session.commit()
+    with app.app_context():
+        assert archive_completed_tasks() == 3
+
+    first = client.get('/api/tasks/archive?limit=2', headers=headers).get_json()
+    second = client.get(f"/api/tasks/archive?limit=2&cursor={first['next_cursor']}", headers=headers).get_json()
+
+    assert [task['title'] for task in first['tasks']] == ['terceira', 'segunda']
+    assert [task['title'] for task in second['tasks']] == ['primeira']
+    assert second['next_cursor'] is None
+    assert client.get('/api/tasks/archive?cursor=lixo', headers=headers).status_code == 400
@@ -0,0 +1,96 @@
+from models import db, Task
+from task_cache import ENTRY_OVERHEAD_BYTES, LocalLRUBackend, TaskListCache, task_cache
+
+
+def list_titles(client, headers):
+    response = client.get('/api/tasks', headers=headers)
+    assert response.status_code == 200
+    return sorted(task['title'] for task in response.get_json())
+
+
+def test_write_moves_the_list_to_a_new_revision(app, client, create_user):
+    _, headers = create_user(app)
+    client.post('/api/tasks', json={'title': 'primeira'}, headers=headers)
+    hits, misses = task_cache.hits, task_cache.misses
+
+    assert list_titles(client, headers) == ['primeira']
+    assert list_titles(client, headers) == ['primeira']
+    assert (task_cache.hits - hits, task_cache.misses - misses) == (1, 1)
+
+    # A escrita incrementa a revisão: a entrada antiga nunca é servida
+    client.post('/api/tasks', json={'title': 'segunda'}, headers=headers)
+    assert list_titles(client, headers) == ['primeira', 'segunda']
+    assert (task_cache.hits - hits, task_cache.misses - misses) == (1, 2)
+    assert list_titles(client, headers) == ['primeira', 'segunda']
+    assert task_cache.hits - hits == 2
+
+
+def test_rolled_back_write_does_not_invalidate_the_entry(app, client, create_user):
+    user_id, headers = create_user(app)
+    client.post('/api/tasks', json={'title': 'fica'}, headers=headers)
+    list_titles(client, headers)
+
+    with app.app_context():
+        db.session.add(Task(title='desfeita', user_id=user_id))
+        db.session.flush()
+        assert user_id in db.session.info['task_revisions']
+        db.session.rollback()
+        assert 'task_revisions' not in db.session.info
+        # Um commit seguinte na mesma sessão não publica a revisão desfeita
+        db.session.commit()
+
+    hits = task_cache.hits
+    assert list_titles(client, headers) == ['fica']
+    assert task_cache.hits == hits + 1
+
+
+def test_local_lru_evicts_least_recently_used_to_stay_under_the_byte_budget():
+    payload = b'x' * 100
+    entry = len(payload) + ENTRY_OVERHEAD_BYTES
+    backend = LocalLRUBackend(max_bytes=entry * 2)
+
+    assert backend.set(1, 1, payload) == 0
+    assert backend.set(2, 1, payload) == 0
+    assert backend.get(1, 1) == payload  # 1 passa a ser o mais recente
+    assert backend.set(3, 1, payload) == 1
+    assert backend.get(2, 1) is None
+    assert backend.get(1, 1) == payload and backend.get(3, 1) == payload
+    assert backend.bytes == entry * 2
+
+    # Uma revisão nova substitui a entrada do usuário em vez de somar bytes
+    backend.set(3, 2, b'y' * 50)
+    assert backend.get(3, 1) is None
+    assert backend.bytes == entry + 50 + ENTRY_OVERHEAD_BYTES
+    # invalidate só remove revisões anteriores à publicada
+    backend.invalidate(3, 2)
+    assert backend.get(3, 2) == b'y' * 50
+    backend.invalidate(3, 3)
+    assert backend.get(3, 2) is None
+    assert len(backend) == 1 and backend.bytes == entry
+
+
+def test_oversized_list_is_streamed_but_not_stored():
+    cache = TaskListCache()
+    cache.backend = LocalLRUBackend(max_bytes=1024 * 1024)
+    cache.max_entry_bytes = 10
+    chunks = [b'[', b'{"id":1}', b',{"id":2}', b']']
+
+    assert list(cache.store_while_streaming(1, 5, iter(chunks))) == chunks
+    assert cache.backend.get(1, 5) is None and cache.backend.bytes == 0
+
+    cache.max_entry_bytes = 100
+    assert list(cache.store_while_streaming(1, 5, iter(chunks))) == chunks
+    assert cache.backend.get(1, 5) == b''.join(chunks)
+
+
+def test_oversized_list_is_served_from_the_database(make_app, create_user):
+    app = make_app(TASK_CACHE_MAX_ENTRY_BYTES=64)
+    client = app.test_client()
+    _, headers = create_user(app)
+    client.post('/api/tasks', json={'title': 'uma tarefa com um título comprido'}, headers=headers)
+    misses = task_cache.misses
+
+    assert list_titles(client, headers) == ['uma tarefa com um título comprido']
+    assert list_titles(client, headers) == ['uma tarefa com um título comprido']
+    assert task_cache.misses == misses + 2
+    assert len(task_cache.backend) == 0
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import db, TaskTombstone, BRAZIL_TZ
+from sweeper import purge_task_tombstones
+from task_cache import task_cache
+
+
+def changes(client, headers, since=None):
+    url = '/api/tasks/changes' + (f'?since={since}' if since is not None else '')
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_delta_brings_changed_tasks_and_tombstones(app, client, create_user):
+    _, headers = create_user(app)
+    kept = client.post('/api/tasks', json={'title': 'fica'}, headers=headers).get_json()['id']
+    gone = client.post('/api/tasks', json={'title': 'sai'}, headers=headers).get_json()['id']
+    cursor = changes(client, headers)['cursor']
+
+    client.put(f'/api/tasks/{kept}', json={'title': 'renomeada'}, headers=headers)
+    client.delete(f'/api/tasks/{gone}', headers=headers)
+    delta = changes(client, headers, cursor)
+
+    assert not delta['reset']
+    assert [task['title'] for task in delta['tasks']] == ['renomeada']
+    assert delta['deleted'] == [gone]
+    assert changes(client, headers, delta['cursor']) == dict(delta, tasks=[], deleted=[])
+
+
+def test_reset_is_the_cached_task_list(app, client, create_user):
+    _, headers = create_user(app)
+    for title in ('um', 'dois'):
+        client.post('/api/tasks', json={'title': title}, headers=headers)
+
+    full = changes(client, headers)
+    hits = task_cache.hits
+    again = changes(client, headers)
+
+    assert full['reset'] and full['deleted'] == []
+    assert full['tasks'] == client.get('/api/tasks', headers=headers).get_json()
+    # A segunda carga completa (e o GET /api/tasks) saem do payload guardado pela primeira
+    assert again == full
+    assert task_cache.hits == hits + 2
+
+
+def test_cursor_older_than_purged_tombstones_gets_a_reset(app, client, create_user):
+    _, headers = create_user(app)
+    old_cursor = changes(client, headers)['cursor']
+    task_id = client.post('/api/tasks', json={'title': 'antiga'}, headers=headers).get_json()['id']
+    client.delete(f'/api/tasks/{task_id}', headers=headers)
+    recent_cursor = changes(client, headers, old_cursor)['cursor']
+    client.post('/api/tasks', json={'title': 'nova'}, headers=headers)
+
+    old = datetime.now(BRAZIL_TZ) - timedelta(days=60)
+    with app.app_context():
+        db.session.execute(update(TaskTombstone).values(deleted_at=old))
+        db.session.commit()
+        assert purge_task_tombstones() == 1
+        assert db.session.query(TaskTombstone).count() == 0
+
+    # O cursor de antes da exclusão perderia o tombstone removido: recarrega tudo
+    full = changes(client, headers, old_cursor)
+    assert full['reset'] and [task['title'] for task in full['tasks']] == ['nova']
+    delta = changes(client, headers, recent_cursor)
+    assert not delta['reset'] and [task['title'] for task in delta['tasks']] == ['nova']
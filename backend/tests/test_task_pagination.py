@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import db, Task, BRAZIL_TZ
+
+
+def create_tasks(client, headers, titles):
+    return [client.post('/api/tasks', json={'title': title}, headers=headers).get_json()['id'] for title in titles]
+
+
+def set_column(app, column, values):
+    with app.app_context():
+        for task_id, value in values.items():
+            db.session.execute(update(Task).where(Task.id == task_id).values({column: value}))
+        db.session.commit()
+
+
+def walk(client, headers, query, limit=2):
+    """Ids of every page of the query, following next_cursor until the last page."""
+    ids, cursor = [], None
+    while True:
+        url = f'/api/tasks?{query}&limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['tasks']) <= limit
+        ids += [task['id'] for task in page['tasks']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_created_at_pages_break_ties_by_id(app, client, create_user):
+    _, headers = create_user(app)
+    ids = create_tasks(client, headers, ['a', 'b', 'c', 'd', 'e'])
+    base = datetime.now(BRAZIL_TZ).replace(microsecond=0)
+    # b, c e d no mesmo instante: a posição no cursor precisa do id
+    set_column(app, 'created_at', {
+        ids[0]: base - timedelta(hours=1), ids[1]: base, ids[2]: base, ids[3]: base, ids[4]: base + timedelta(hours=1)
+    })
+
+    assert walk(client, headers, 'sort=created_at') == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+
+def test_title_pages_follow_alphabetical_order(app, client, create_user):
+    _, headers = create_user(app)
+    ids = create_tasks(client, headers, ['banana', 'abacaxi', 'caju', 'abacaxi', 'banana'])
+
+    assert walk(client, headers, 'sort=title') == [ids[1], ids[3], ids[0], ids[4], ids[2]]
+
+
+def test_due_date_pages_put_tasks_without_date_last(app, client, create_user):
+    _, headers = create_user(app)
+    ids = create_tasks(client, headers, ['sem data 1', 'depois', 'sem data 2', 'antes', 'sem data 3'])
+    base = datetime.now(BRAZIL_TZ).replace(microsecond=0) + timedelta(days=5)
+    set_column(app, 'due_date', {ids[1]: base + timedelta(days=1), ids[3]: base})
+
+    expected = [ids[3], ids[1], ids[0], ids[2], ids[4]]
+    assert walk(client, headers, 'sort=due_date') == expected
+    # Com limit=1 há cursores sobre a data e sobre tarefas sem data (valor NULL)
+    assert walk(client, headers, 'sort=due_date', limit=1) == expected
+    assert walk(client, headers, 'sort=due_date&due=no-date', limit=1) == [ids[0], ids[2], ids[4]]
+
+
+def test_filters_and_invalid_parameters(app, client, create_user):
+    _, headers = create_user(app)
+    done, pending = create_tasks(client, headers, ['feita', 'pendente'])
+    client.put(f'/api/tasks/{done}', json={'completed': True}, headers=headers)
+
+    assert walk(client, headers, 'status=active') == [pending]
+    assert walk(client, headers, 'status=completed') == [done]
+    assert walk(client, headers, 'is_recurring=true') == []
+    for query in ('status=todas', 'sort=prioridade', 'limit=0', 'cursor=invalido'):
+        assert client.get(f'/api/tasks?{query}', headers=headers).status_code == 400
+    # Cursor de outra ordenação não é aceito
+    cursor = client.get('/api/tasks?sort=title&limit=1', headers=headers).get_json()['next_cursor']
+    assert client.get(f'/api/tasks?sort=created_at&cursor={cursor}', headers=headers).status_code == 400
+
+
+def test_unrelated_parameters_keep_the_full_list(app, client, create_user):
+    _, headers = create_user(app)
+    create_tasks(client, headers, ['um', 'dois', 'três'])
+
+    full = client.get('/api/tasks', headers=headers).get_json()
+    assert isinstance(full, list) and len(full) == 3
+    assert client.get('/api/tasks?_=1', headers=headers).get_json() == full
+
+
+def test_page_carries_the_sync_cursor(app, client, create_user):
+    _, headers = create_user(app)
+    create_tasks(client, headers, ['um'])
+    page = client.get('/api/tasks?limit=1', headers=headers).get_json()
+    assert page['sync_cursor'] == client.get('/api/tasks/changes', headers=headers).get_json()['cursor']
+
+    create_tasks(client, headers, ['dois'])
+    delta = client.get(f"/api/tasks/changes?since={page['sync_cursor']}", headers=headers).get_json()
+    assert [task['title'] for task in delta['tasks']] == ['dois']
@@ -0,0 +1,85 @@
+from sqlalchemy import text
+
+import task_search
+from models import db
+
+
+def search(client, headers, q, **params):
+    response = client.get('/api/tasks/search', query_string=dict(params, q=q), headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def titles(client, headers, q):
+    return [task['title'] for task in search(client, headers, q)['tasks']]
+
+
+def check_fts_integrity(app):
+    """FTS5 integrity-check com rank=1 compara o índice com a tabela task."""
+    with app.app_context():
+        db.session.execute(text("INSERT INTO task_fts(task_fts, rank) VALUES ('integrity-check', 1)"))
+
+
+def test_triggers_keep_the_index_in_sync(app, client, create_user):
+    _, headers = create_user(app)
+    task_id = client.post(
+        '/api/tasks', json={'title': 'Relatório mensal', 'description': 'planilha de custos'}, headers=headers
+    ).get_json()['id']
+    client.post('/api/tasks', json={'title': 'Outra tarefa'}, headers=headers)
+    with app.app_context():
+        assert task_search.search_backend() == 'sqlite'
+
+    assert titles(client, headers, 'relatorio') == ['Relatório mensal']
+    assert titles(client, headers, 'planilha') == ['Relatório mensal']
+
+    client.put(f'/api/tasks/{task_id}', json={'title': 'Orçamento anual'}, headers=headers)
+    assert titles(client, headers, 'relatorio') == []
+    assert titles(client, headers, 'orcamento') == ['Orçamento anual']
+    # A descrição antiga continua indexada até mudar
+    assert titles(client, headers, 'planilha') == ['Orçamento anual']
+
+    client.put(f'/api/tasks/{task_id}', json={'description': 'notas fiscais'}, headers=headers)
+    assert titles(client, headers, 'planilha') == []
+    assert titles(client, headers, 'fiscais') == ['Orçamento anual']
+    # Mudar outra coluna não tira a tarefa do índice
+    client.put(f'/api/tasks/{task_id}', json={'completed': True}, headers=headers)
+    assert titles(client, headers, 'orcamento') == ['Orçamento anual']
+    check_fts_integrity(app)
+
+    assert client.delete(f'/api/tasks/{task_id}', headers=headers).status_code == 204
+    assert titles(client, headers, 'orcamento') == []
+    assert titles(client, headers, 'fiscais') == []
+    check_fts_integrity(app)
+
+
+def test_search_is_scoped_to_the_user(app, client, create_user):
+    _, headers = create_user(app)
+    _, other_headers = create_user(app, 'outro@example.com')
+    client.post('/api/tasks', json={'title': 'comprar pão'}, headers=headers)
+    client.post('/api/tasks', json={'title': 'comprar leite'}, headers=other_headers)
+
+    assert titles(client, headers, 'comprar') == ['comprar pão']
+    # O último termo casa como prefixo
+    assert titles(client, other_headers, 'comprar lei') == ['comprar leite']
+
+
+def test_offset_pagination_stops_at_the_cap(app, client, create_user, monkeypatch):
+    monkeypatch.setattr(task_search, 'MAX_SEARCH_RESULTS', 5)
+    _, headers = create_user(app)
+    for index in range(7):
+        client.post('/api/tasks', json={'title': f'mercado {index}'}, headers=headers)
+
+    pages, cursor = [], None
+    while True:
+        params = {'limit': 2, 'cursor': cursor} if cursor else {'limit': 2}
+        page = search(client, headers, 'mercado', **params)
+        pages.append(len(page['tasks']))
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    # A última página é cortada no limite, mesmo havendo mais resultados
+    assert pages == [2, 2, 1]
+
+    for cursor in ('5', '-1', 'abc'):
+        response = client.get(f'/api/tasks/search?q=mercado&cursor={cursor}', headers=headers)
+        assert response.status_code == 400
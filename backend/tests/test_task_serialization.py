@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import task_serialization
+from models import db, Task, BRAZIL_TZ
+from task_serialization import TASK_FIELDS, TaskRow, dumps, iter_json_array, rows_to_dicts, stream_task_rows, task_rows_query
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    """Runs the test with orjson and with the stdlib fallback."""
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(task_serialization, 'orjson', None)
+    return request.param
+
+
+def ordered_to_dicts(app, user_id):
+    with app.app_context():
+        return [task.to_dict() for task in Task.query.filter_by(user_id=user_id).order_by(Task.id)]
+
+
+def test_empty_list_is_an_empty_array(app, client, create_user, encoder):
+    _, headers = create_user(app)
+
+    assert b''.join(iter_json_array([])) == b'[]'
+    assert client.get('/api/tasks', headers=headers).data == b'[]'
+
+
+def test_streamed_rows_match_to_dict(app, client, create_user, encoder):
+    user_id, headers = create_user(app)
+    client.post('/api/tasks', json={'title': 'sem data'}, headers=headers)
+    client.post('/api/tasks', json={'title': 'com data', 'due_date': '2026-03-01T12:30:15.250000Z'}, headers=headers)
+    recurring = client.post('/api/tasks', headers=headers, json={
+        'title': 'diária', 'description': 'acentuação e "aspas"', 'due_date': '2026-01-31T09:00:00-03:00',
+        'is_recurring': True, 'recurrence_type': 'daily'
+    }).get_json()['id']
+    # Conclusão cria a próxima (parent_task_id) e preenche updated_at
+    client.put(f'/api/tasks/{recurring}', json={'completed': True}, headers=headers)
+    expected = ordered_to_dicts(app, user_id)
+    assert len(expected) == 4
+
+    with app.app_context():
+        rows = stream_task_rows(task_rows_query().where(Task.user_id == user_id).order_by(Task.id))
+        # chunk_size pequeno para passar pela vírgula entre os pedaços
+        assert json.loads(b''.join(iter_json_array(rows, chunk_size=3))) == expected
+
+    listed = client.get('/api/tasks', headers=headers).get_json()
+    assert sorted(listed, key=lambda task: task['id']) == expected
+    page = client.get('/api/tasks?sort=title&limit=10', headers=headers).get_json()
+    assert sorted(page['tasks'], key=lambda task: task['id']) == expected
+
+
+def test_aware_datetimes_keep_the_isoformat_offset(encoder):
+    # O PostgreSQL devolve datetimes com fuso; o SQLite, sem
+    values = {
+        'id': 7, 'title': 'tarefa', 'description': None,
+        'due_date': datetime(2026, 5, 1, 18, 0, tzinfo=BRAZIL_TZ),
+        'completed': False,
+        'created_at': datetime(2026, 4, 30, 21, 15, 30, 123456, tzinfo=timezone.utc),
+        'is_recurring': False, 'recurrence_type': None, 'parent_task_id': None,
+        'series_id': None, 'occurrence_date': None,
+        'updated_at': datetime(2026, 4, 30, 22, 0, tzinfo=timezone(timedelta(hours=-3))),
+        'revision': 3
+    }
+    row = TaskRow(**values)
+    task = Task(**values)
+
+    assert json.loads(dumps(rows_to_dicts([row]))) == [task.to_dict()]
+    assert json.loads(b''.join(iter_json_array([row]))) == [task.to_dict()]
+    assert list(rows_to_dicts([row])[0]) == list(TASK_FIELDS) == list(task.to_dict())
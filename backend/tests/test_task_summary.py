@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import routes
+from models import db, Task, BRAZIL_TZ
+from task_queries import task_summary
+
+
+def local(*args):
+    return datetime(*args, tzinfo=BRAZIL_TZ)
+
+
+def add_tasks(app, user_id, tasks):
+    with app.app_context():
+        db.session.add_all(Task(user_id=user_id, **fields) for fields in tasks)
+        db.session.commit()
+
+
+def test_buckets_split_pending_tasks_by_local_day(app, create_user):
+    user_id, _ = create_user(app)
+    add_tasks(app, user_id, [
+        {'title': 'sem data'},
+        {'title': 'ontem', 'due_date': local(2026, 6, 9, 23, 59, 59)},
+        {'title': 'ontem, recorrente', 'due_date': local(2026, 6, 9, 8), 'is_recurring': True, 'recurrence_type': 'daily'},
+        # Os limites do dia pertencem ao balde que começa nele
+        {'title': 'meia-noite de hoje', 'due_date': local(2026, 6, 10)},
+        {'title': 'fim de hoje', 'due_date': local(2026, 6, 10, 23, 59, 59)},
+        {'title': 'meia-noite de amanhã', 'due_date': local(2026, 6, 11)},
+        {'title': 'depois de amanhã', 'due_date': local(2026, 6, 12), 'is_recurring': True, 'recurrence_type': 'weekly'},
+        # Concluídas só entram em completed, qualquer que seja a data
+        {'title': 'feita ontem', 'due_date': local(2026, 6, 9), 'completed': True},
+        {'title': 'feita sem data', 'completed': True, 'is_recurring': True, 'recurrence_type': 'daily'},
+    ])
+    # Outro usuário não entra na contagem
+    other_id, _ = create_user(app, 'outro@example.com')
+    add_tasks(app, other_id, [{'title': 'de outro', 'due_date': local(2026, 6, 10, 12)}])
+
+    with app.app_context():
+        summary = task_summary(user_id, now=local(2026, 6, 10, 15))
+    assert summary == {
+        'all': 7, 'today': 2, 'tomorrow': 1, 'future': 1, 'no-date': 1,
+        'overdue': 2, 'recurring': 2, 'completed': 2
+    }
+
+
+def test_cached_summary_rolls_over_at_midnight(app, client, create_user, monkeypatch):
+    user_id, headers = create_user(app)
+    add_tasks(app, user_id, [{'title': 'amanhã', 'due_date': local(2026, 6, 11, 10)}])
+    clock = [local(2026, 6, 10, 23, 58)]
+    computed = []
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock[0]
+
+    def counting_summary(*args):
+        computed.append(args)
+        return task_summary(*args)
+
+    monkeypatch.setattr(routes, 'datetime', FrozenDatetime)
+    monkeypatch.setattr(routes, 'task_summary', counting_summary)
+
+    def summary():
+        response = client.get('/api/tasks/summary', headers=headers)
+        assert response.status_code == 200
+        return response.get_json()
+
+    before = summary()
+    assert (before['today'], before['tomorrow']) == (0, 1)
+    assert summary() == before
+    assert len(computed) == 1
+    clock[0] = local(2026, 6, 10, 23, 59, 59)
+    assert summary()['tomorrow'] == 1
+    assert len(computed) == 1
+
+    # Sem nenhuma escrita, a revisão é a mesma: só o dia da chave muda
+    clock[0] = local(2026, 6, 11, 0, 0, 1)
+    rolled = summary()
+    assert (rolled['today'], rolled['tomorrow']) == (1, 0)
+    assert len(computed) == 2
+    summary()
+    assert len(computed) == 2
+
+    # E uma escrita no mesmo dia também troca a chave
+    client.post('/api/tasks', json={'title': 'nova'}, headers=headers)
+    assert summary()['no-date'] == 1
+    assert len(computed) == 3
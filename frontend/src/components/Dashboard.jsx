@@ -1,6 +1,7 @@
 import { useState } from "react";
 import TaskList from "./TaskList";
 import Notifications from "./Notifications";
+import UpcomingCalendar from "./UpcomingCalendar";
 import Header from "./Header";
 
 export default function Dashboard() {
@@ -34,6 +35,7 @@ export default function Dashboard() {
               <div className="lg:col-span-1">
                 <div className="sticky top-8">
                   <Notifications tasks={tasks} />
+                  <UpcomingCalendar tasks={tasks} />
                 </div>
               </div>
             </div>
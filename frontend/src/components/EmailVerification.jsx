@@ -51,7 +51,7 @@ export default function EmailVerification() {
       setSuccess('Email verificado com sucesso! Redirecionando...');
       
       // Login automático após verificação
-      login(response.user, response.access_token);
+      login(response.user, response.access_token, response.refresh_token);
       
       // Redirecionar após 1 segundo
       setTimeout(() => {
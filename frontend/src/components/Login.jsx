@@ -32,7 +32,7 @@ export default function Login() {
       const response = await loginApi(formData);
       console.log('Resposta do login:', response);
       
-      login(response.user, response.access_token);
+      login(response.user, response.access_token, response.refresh_token);
       
       // Redirecionar após login bem-sucedido
       navigate('/');
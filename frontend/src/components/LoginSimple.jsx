@@ -31,7 +31,7 @@ export default function LoginSimple() {
       const response = await loginApi(formData);
       console.log('Resposta do login:', response);
       
-      login(response.user, response.access_token);
+      login(response.user, response.access_token, response.refresh_token);
       navigate('/');
     } catch (err) {
       console.error('Erro no login:', err);
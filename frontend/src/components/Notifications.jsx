@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { FaBell, FaExclamationCircle } from "react-icons/fa";
 import { checkForDueTasks } from "../utils/notificationUtils";
+import { openNotificationStream } from "../services/api";
 
 const Notifications = ({ tasks, onTaskClick }) => {
   const [dueTasks, setDueTasks] = useState([]);
@@ -18,61 +19,60 @@ const Notifications = ({ tasks, onTaskClick }) => {
     }
   }, [tasks]);
 
-  // Configurar notificações do navegador
+  // Remove IDs de tarefas concluídas da lista de notificadas
   useEffect(() => {
-    // IDs de tarefas que já foram notificadas (mantém entre re-renders)
-    const notifiedTaskIds = JSON.parse(localStorage.getItem('notifiedTaskIds') || '[]');
-    const notifiedSet = new Set(notifiedTaskIds);
+    const notifiedSet = new Set(JSON.parse(localStorage.getItem('notifiedTaskIds') || '[]'));
+    const before = notifiedSet.size;
+    tasks.forEach((task) => {
+      if (task.completed) {
+        notifiedSet.delete(task.id);
+      }
+    });
+    if (notifiedSet.size !== before) {
+      localStorage.setItem('notifiedTaskIds', JSON.stringify([...notifiedSet]));
+    }
+  }, [tasks]);
+
+  // Receber tarefas vencidas do servidor via SSE (substitui a verificação a cada minuto)
+  useEffect(() => {
+    const notify = (task) => {
+      // Atualiza a lista do menu mesmo que a tarefa ainda não esteja no estado local
+      setDueTasks((current) =>
+        current.some((t) => t.id === task.id) ? current : [...current, task]
+      );
+      setHasNewNotifications(true);
 
-    // Verificar tarefas vencidas e enviar notificações
-    const checkAndNotify = () => {
-      const currentDueTasks = checkForDueTasks(tasks);
+      // IDs de tarefas que já foram notificadas (mantém entre re-renders)
+      const notifiedSet = new Set(JSON.parse(localStorage.getItem('notifiedTaskIds') || '[]'));
+      if (Notification.permission !== "granted" || notifiedSet.has(task.id)) {
+        return;
+      }
 
-      if (Notification.permission === "granted") {
-        currentDueTasks.forEach((task) => {
-          // Só notifica para tarefas que ainda não foram notificadas e não estão concluídas
-          if (!notifiedSet.has(task.id) && !task.completed) {
-            try {
-              const notification = new Notification("Tarefa Vencida", {
-                body: `A tarefa "${task.title}" está vencida!`,
-                icon: "/notification-icon.png",
-              });
+      try {
+        const notification = new Notification("Tarefa Vencida", {
+          body: `A tarefa "${task.title}" está vencida!`,
+          icon: "/notification-icon.png",
+        });
 
-              // Adiciona o ID da tarefa ao conjunto de tarefas notificadas
-              notifiedSet.add(task.id);
-              localStorage.setItem('notifiedTaskIds', JSON.stringify([...notifiedSet]));
+        // Adiciona o ID da tarefa ao conjunto de tarefas notificadas
+        notifiedSet.add(task.id);
+        localStorage.setItem('notifiedTaskIds', JSON.stringify([...notifiedSet]));
 
-              // Quando o usuário clica na notificação, abre o app e foca na tarefa
-              notification.onclick = () => {
-                window.focus();
-                if (onTaskClick) {
-                  onTaskClick(task);
-                }
-              };
-            } catch (err) {
-              console.log("Erro ao criar notificação:", err);
-            }
+        // Quando o usuário clica na notificação, abre o app e foca na tarefa
+        notification.onclick = () => {
+          window.focus();
+          if (onTaskClick) {
+            onTaskClick(task);
           }
-        });
+        };
+      } catch (err) {
+        console.log("Erro ao criar notificação:", err);
       }
-
-      // Remove IDs de tarefas concluídas da lista de notificadas
-      tasks.forEach((task) => {
-        if (task.completed && notifiedSet.has(task.id)) {
-          notifiedSet.delete(task.id);
-          localStorage.setItem('notifiedTaskIds', JSON.stringify([...notifiedSet]));
-        }
-      });
     };
 
-    // Verificar a cada minuto
-    const intervalId = setInterval(checkAndNotify, 60000);
-
-    // Verificação inicial após 1 segundo
-    setTimeout(checkAndNotify, 1000);
-
-    return () => clearInterval(intervalId);
-  }, [tasks, onTaskClick]); // Atualiza quando tasks mudam
+    const source = openNotificationStream(notify);
+    return () => source.close();
+  }, [onTaskClick]);
 
   // Handle permission request on user interaction
   const handleRequestPermission = async () => {
@@ -59,7 +59,7 @@ export default function Register() {
       } else {
         // Old flow for backward compatibility
         setSuccess('Conta criada com sucesso! Redirecionando...');
-        login(response.user, response.access_token);
+        login(response.user, response.access_token, response.refresh_token);
         
         setTimeout(() => {
           navigate('/');
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import {
   FaPlus,
   FaAngleDown,
@@ -13,17 +13,45 @@ import TaskItem from "./TaskItem";
 import TaskForm from "./TaskForm";
 import Modal from "./Modal";
 import {
-  getTasks,
+  getTasksPage,
+  getTaskChanges,
+  getTaskSummary,
   createTask,
+  createTaskSeries,
   updateTask,
   deleteTask,
   deleteAllCompletedTasks,
 } from "../services/api";
-import { isToday, isTomorrow, parseISO } from "date-fns";
+
+// Intervalo da sincronização incremental (GET /api/tasks/changes)
+const TASK_SYNC_INTERVAL_MS = 30000;
+
+// Tamanho de cada página e limite do servidor por página (MAX_PAGE_SIZE em task_queries.py)
+const TASK_PAGE_SIZE = 50;
+const TASK_PAGE_MAX = 200;
+
+// Filtro e ordenação da lista de pendentes viram parâmetros de GET /api/tasks
+const pendingParams = (filter, sort) => {
+  const params = { status: "active", sort };
+  if (filter === "recurring") {
+    params.is_recurring = true;
+  } else if (filter !== "all") {
+    params.due = filter;
+  }
+  return params;
+};
+
+// Ao recarregar, busca de uma vez quantas tarefas já estavam carregadas
+const reloadLimit = (loaded) =>
+  Math.min(Math.max(loaded, TASK_PAGE_SIZE), TASK_PAGE_MAX);
 
 const TaskList = ({ id, onTasksUpdate }) => {
   const [tasks, setTasks] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [completedTasks, setCompletedTasks] = useState([]);
+  const [completedNextCursor, setCompletedNextCursor] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [currentTask, setCurrentTask] = useState(null);
@@ -32,41 +60,156 @@ const TaskList = ({ id, onTasksUpdate }) => {
   const [showCompletedTasks, setShowCompletedTasks] = useState(true);
   const [activeFilter, setActiveFilter] = useState("all"); // 'all', 'today', 'tomorrow', 'future', 'recurring'
   const [isConfirmModalOpen, setIsConfirmModalOpen] = useState(false);
-
-  const loadTasks = useCallback(async () => {
+  const [summary, setSummary] = useState(null);
+  // Cursor e ETag da sincronização, a partir do sync_cursor da última página carregada
+  const syncState = useRef({ cursor: null, etag: null });
+  // Quantas tarefas de cada seção estão carregadas (para recarregar sem perder páginas)
+  const loaded = useRef({ pending: 0, completed: 0 });
+  // Descarta respostas de uma visão anterior (filtro ou ordenação trocados no meio da busca)
+  const requestId = useRef(0);
+
+  // Filtro e ordenação rodam no servidor: a lista só guarda as páginas já exibidas
+  const loadTasks = useCallback(async (keepLoaded = false) => {
+    const request = ++requestId.current;
+    const { pending, completed } = keepLoaded
+      ? loaded.current
+      : { pending: 0, completed: 0 };
+    const [pendingPage, completedPage] = await Promise.all([
+      getTasksPage({ ...pendingParams(activeFilter, sortBy), limit: reloadLimit(pending) }),
+      // Concluídas só aparecem em "Todas", sempre das mais recentes para as mais antigas
+      activeFilter === "all"
+        ? getTasksPage({ status: "completed", sort: "created_at", limit: reloadLimit(completed) })
+        : null,
+    ]);
+    if (request !== requestId.current) {
+      return;
+    }
+    syncState.current = { cursor: pendingPage.sync_cursor, etag: null };
+    loaded.current = {
+      pending: pendingPage.tasks.length,
+      completed: completedPage ? completedPage.tasks.length : 0,
+    };
+    setTasks(pendingPage.tasks);
+    setNextCursor(pendingPage.next_cursor);
+    setCompletedTasks(completedPage ? completedPage.tasks : []);
+    setCompletedNextCursor(completedPage ? completedPage.next_cursor : null);
+  }, [activeFilter, sortBy]);
+
+  // Badges vêm do servidor (uma consulta agrupada, em cache até a próxima escrita).
+  // Recarregados só no carregamento, após as alterações feitas aqui e quando a
+  // sincronização traz mudanças, não a cada render da lista
+  const loadSummary = useCallback(async () => {
     try {
-      setIsLoading(true);
-      const data = await getTasks();
-      setTasks(data);
+      setSummary(await getTaskSummary());
+    } catch (err) {
+      console.error(err);
+    }
+  }, []);
+
+  // Após uma escrita: recarrega as páginas exibidas (a tarefa pode ter mudado de posição
+  // ou saído do filtro) e os badges
+  const refreshTasks = useCallback(async () => {
+    await loadTasks(true);
+    loadSummary();
+  }, [loadTasks, loadSummary]);
+
+  useEffect(() => {
+    const load = async () => {
+      try {
+        setIsLoading(true);
+        await loadTasks();
+        setError(null);
+      } catch (err) {
+        setError("Erro ao carregar tarefas. Tente novamente mais tarde.");
+        console.error(err);
+      } finally {
+        setIsLoading(false);
+      }
+    };
+    load();
+  }, [loadTasks]);
+
+  useEffect(() => {
+    loadSummary();
+  }, [loadSummary]);
 
-      // Propagar dados de tarefas para o componente App
-      if (onTasksUpdate) {
-        onTasksUpdate(data);
+  // Alterações de outras abas e dispositivos: GET /tasks/changes responde 304 enquanto nada
+  // muda; quando muda, recarrega as páginas exibidas. Periodicamente e ao voltar para a aba
+  useEffect(() => {
+    const poll = async () => {
+      const { cursor, etag } = syncState.current;
+      if (cursor === null) {
+        return;
+      }
+      const changes = await getTaskChanges(cursor, etag);
+      if (!changes) {
+        return;
       }
+      syncState.current = { cursor: changes.cursor, etag: changes.etag };
+      if (changes.reset || changes.tasks.length > 0 || changes.deleted.length > 0) {
+        await refreshTasks();
+      }
+    };
+    const onPoll = () => poll().catch((err) => console.error(err));
+    const intervalId = setInterval(onPoll, TASK_SYNC_INTERVAL_MS);
+    window.addEventListener("focus", onPoll);
+    return () => {
+      clearInterval(intervalId);
+      window.removeEventListener("focus", onPoll);
+    };
+  }, [refreshTasks]);
+
+  // Propagar a lista para o Dashboard (notificações) sempre que ela mudar.
+  // onTasksUpdate fica fora das dependências: é uma função nova a cada render do Dashboard
+  useEffect(() => {
+    if (onTasksUpdate) {
+      onTasksUpdate(tasks);
+    }
+  }, [tasks]); // eslint-disable-line react-hooks/exhaustive-deps
 
-      setError(null);
+  // Próxima página de uma seção, a partir do next_cursor da anterior
+  const handleLoadMore = async (completed) => {
+    try {
+      setIsLoadingMore(true);
+      const request = requestId.current;
+      const page = completed
+        ? await getTasksPage({ status: "completed", sort: "created_at", cursor: completedNextCursor, limit: TASK_PAGE_SIZE })
+        : await getTasksPage({ ...pendingParams(activeFilter, sortBy), cursor: nextCursor, limit: TASK_PAGE_SIZE });
+      if (request !== requestId.current) {
+        return;
+      }
+      if (completed) {
+        setCompletedTasks((current) => [...current, ...page.tasks]);
+        setCompletedNextCursor(page.next_cursor);
+        loaded.current.completed += page.tasks.length;
+      } else {
+        setTasks((current) => [...current, ...page.tasks]);
+        setNextCursor(page.next_cursor);
+        loaded.current.pending += page.tasks.length;
+      }
     } catch (err) {
       setError("Erro ao carregar tarefas. Tente novamente mais tarde.");
       console.error(err);
     } finally {
-      setIsLoading(false);
+      setIsLoadingMore(false);
     }
-  }, []); // Remove onTasksUpdate dependency to prevent infinite loop
-
-  useEffect(() => {
-    loadTasks();
-  }, [loadTasks]);
+  };
 
   const handleCreateTask = async (taskData) => {
     try {
-      const newTask = await createTask(taskData);
-      const updatedTasks = [...tasks, newTask];
-      setTasks(updatedTasks);
-
-      // Propagar tarefas atualizadas
-      if (onTasksUpdate) {
-        onTasksUpdate(updatedTasks);
+      // Recorrente com data vira uma série: o servidor grava só a próxima ocorrência
+      // e as seguintes conforme vencem, em vez de uma tarefa por conclusão
+      if (taskData.is_recurring && taskData.due_date) {
+        await createTaskSeries({
+          title: taskData.title,
+          description: taskData.description,
+          recurrence_type: taskData.recurrence_type,
+          starts_at: taskData.due_date,
+        });
+      } else {
+        await createTask(taskData);
       }
+      await refreshTasks();
 
       setIsModalOpen(false);
     } catch (err) {
@@ -82,17 +225,8 @@ const TaskList = ({ id, onTasksUpdate }) => {
         ...taskData,
         completed: currentTask.completed, // Maintain the current completed state
       };
-      const updatedTask = await updateTask(currentTask.id, updatedTaskData);
-      const updatedTasks = tasks.map((task) =>
-        task.id === updatedTask.id ? updatedTask : task
-      );
-
-      setTasks(updatedTasks);
-
-      // Propagar tarefas atualizadas
-      if (onTasksUpdate) {
-        onTasksUpdate(updatedTasks);
-      }
+      await updateTask(currentTask.id, updatedTaskData);
+      await refreshTasks();
 
       setIsModalOpen(false);
       setCurrentTask(null);
@@ -106,13 +240,7 @@ const TaskList = ({ id, onTasksUpdate }) => {
     if (window.confirm("Tem certeza que deseja excluir esta tarefa?")) {
       try {
         await deleteTask(taskId);
-        const updatedTasks = tasks.filter((task) => task.id !== taskId);
-        setTasks(updatedTasks);
-
-        // Propagar tarefas atualizadas
-        if (onTasksUpdate) {
-          onTasksUpdate(updatedTasks);
-        }
+        await refreshTasks();
       } catch (err) {
         setError("Erro ao excluir tarefa.");
         console.error(err);
@@ -125,14 +253,7 @@ const TaskList = ({ id, onTasksUpdate }) => {
       const result = await deleteAllCompletedTasks();
       console.log(`Deleted ${result.deleted_count} completed tasks`);
 
-      // Atualizar o estado removendo as tarefas concluídas
-      const updatedTasks = tasks.filter((task) => !task.completed);
-      setTasks(updatedTasks);
-
-      // Propagar tarefas atualizadas
-      if (onTasksUpdate) {
-        onTasksUpdate(updatedTasks);
-      }
+      await refreshTasks();
 
       // Fechar o modal de confirmação
       setIsConfirmModalOpen(false);
@@ -145,25 +266,11 @@ const TaskList = ({ id, onTasksUpdate }) => {
 
   const handleToggleComplete = async (taskId, completed) => {
     try {
-      const task = tasks.find((t) => t.id === taskId);
-      const updatedTask = await updateTask(taskId, { ...task, completed });
-
-      // O servidor vai criar a próxima tarefa recorrente se necessário
-      // Vamos recarregar todas as tarefas para obter a nova tarefa
-      if (completed && task.is_recurring) {
-        await loadTasks();
-      } else {
-        const updatedTasks = tasks.map((t) =>
-          t.id === updatedTask.id ? updatedTask : t
-        );
-
-        setTasks(updatedTasks);
-
-        // Propagar tarefas atualizadas
-        if (onTasksUpdate) {
-          onTasksUpdate(updatedTasks);
-        }
-      }
+      const task = [...tasks, ...completedTasks].find((t) => t.id === taskId);
+      // O servidor cria a próxima tarefa recorrente se necessário: o recarregamento
+      // traz a tarefa concluída e a nova
+      await updateTask(taskId, { ...task, completed });
+      await refreshTasks();
     } catch (err) {
       setError("Erro ao atualizar estado da tarefa.");
       console.error(err);
@@ -185,80 +292,15 @@ const TaskList = ({ id, onTasksUpdate }) => {
     setShowSortOptions(false);
   };
 
-  // Função para classificar tarefas por data e recorrência
-  const filterTasksByDateAndRecurrence = (tasks) => {
-    return tasks.filter((task) => {
-      // Para o filtro "Recorrentes"
-      if (activeFilter === "recurring") {
-        return task.is_recurring;
-      }
-
-      if (!task.due_date) {
-        // Tarefas sem data de vencimento são mostradas em "Todas" ou quando o filtro é "Tarefas sem data"
-        return activeFilter === "all" || activeFilter === "no-date";
-      }
-
-      const dueDate = parseISO(task.due_date);
-
-      if (activeFilter === "today") {
-        return isToday(dueDate);
-      } else if (activeFilter === "tomorrow") {
-        return isTomorrow(dueDate);
-      } else if (activeFilter === "future") {
-        return (
-          !isToday(dueDate) && !isTomorrow(dueDate) && dueDate > new Date()
-        );
-      } else if (activeFilter === "all") {
-        return true;
-      }
-
-      return false;
-    });
-  };
-
-  // Filtrar tarefas ativas e concluídas
-  const activeTasks = tasks.filter((task) => !task.completed);
-  const filteredActiveTasks = filterTasksByDateAndRecurrence(activeTasks);
-  const completedTasks = tasks.filter((task) => task.completed);
-
-  // Ordenar tarefas ativas
-  const sortedActiveTasks = [...filteredActiveTasks].sort((a, b) => {
-    if (sortBy === "title") {
-      return a.title.localeCompare(b.title);
-    } else if (sortBy === "due_date") {
-      // Colocar tarefas sem data no final
-      if (!a.due_date) return 1;
-      if (!b.due_date) return -1;
-      return new Date(a.due_date) - new Date(b.due_date);
-    } else {
-      // created_at (padrão)
-      return new Date(b.created_at) - new Date(a.created_at);
-    }
-  });
-
-  // Ordenar tarefas concluídas (sempre pela data de conclusão, mais recentes primeiro)
-  const sortedCompletedTasks = [...completedTasks].sort((a, b) => {
-    return new Date(b.created_at) - new Date(a.created_at);
-  });
-
-  // Contar tarefas por seção para mostrar badges
+  // Contadores por seção para mostrar badges (GET /api/tasks/summary)
   const taskCounts = {
-    all: activeTasks.length,
-    today: activeTasks.filter(
-      (task) => task.due_date && isToday(parseISO(task.due_date))
-    ).length,
-    tomorrow: activeTasks.filter(
-      (task) => task.due_date && isTomorrow(parseISO(task.due_date))
-    ).length,
-    future: activeTasks.filter(
-      (task) =>
-        task.due_date &&
-        !isToday(parseISO(task.due_date)) &&
-        !isTomorrow(parseISO(task.due_date)) &&
-        parseISO(task.due_date) > new Date()
-    ).length,
-    "no-date": activeTasks.filter((task) => !task.due_date).length,
-    recurring: activeTasks.filter((task) => task.is_recurring).length,
+    all: summary?.all ?? 0,
+    today: summary?.today ?? 0,
+    tomorrow: summary?.tomorrow ?? 0,
+    future: summary?.future ?? 0,
+    "no-date": summary?.["no-date"] ?? 0,
+    recurring: summary?.recurring ?? 0,
+    completed: summary?.completed ?? completedTasks.length,
   };
 
   return (
@@ -474,7 +516,7 @@ const TaskList = ({ id, onTasksUpdate }) => {
 
         {isLoading ? (
           <div className="text-center py-4">Carregando...</div>
-        ) : tasks.length === 0 ? (
+        ) : tasks.length === 0 && completedTasks.length === 0 && activeFilter === "all" ? (
           <div className="text-center py-8 text-gray-500">
             Nenhuma tarefa encontrada. Crie uma nova tarefa!
           </div>
@@ -495,7 +537,7 @@ const TaskList = ({ id, onTasksUpdate }) => {
                   ? "Tarefas Recorrentes"
                   : "Tarefas Sem Data"}
               </h2>
-              {sortedActiveTasks.length === 0 ? (
+              {tasks.length === 0 ? (
                 <div className="text-center py-4 text-gray-500">
                   {activeFilter === "all"
                     ? "Você não tem tarefas pendentes. Bom trabalho!"
@@ -512,7 +554,7 @@ const TaskList = ({ id, onTasksUpdate }) => {
                       }!`}
                 </div>
               ) : (
-                sortedActiveTasks.map((task) => (
+                tasks.map((task) => (
                   <TaskItem
                     key={task.id}
                     task={task}
@@ -522,10 +564,19 @@ const TaskList = ({ id, onTasksUpdate }) => {
                   />
                 ))
               )}
+              {nextCursor && (
+                <button
+                  onClick={() => handleLoadMore(false)}
+                  disabled={isLoadingMore}
+                  className="block w-full mt-2 py-2 text-sm text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+                >
+                  {isLoadingMore ? "Carregando..." : "Carregar mais"}
+                </button>
+              )}
             </div>
 
             {/* Tarefas concluídas - só mostra se houver tarefas concluídas */}
-            {sortedCompletedTasks.length > 0 && activeFilter === "all" && (
+            {completedTasks.length > 0 && activeFilter === "all" && (
               <div className="mt-8 border-t pt-4">
                 <div className="flex justify-between items-center mb-3">
                   <button
@@ -538,12 +589,12 @@ const TaskList = ({ id, onTasksUpdate }) => {
                       <FaAngleRight className="mr-2" />
                     )}
                     <h2 className="text-lg font-medium">
-                      Tarefas Concluídas ({sortedCompletedTasks.length})
+                      Tarefas Concluídas ({taskCounts.completed})
                     </h2>
                   </button>
 
                   {/* New button to delete all completed tasks */}
-                  {showCompletedTasks && sortedCompletedTasks.length > 0 && (
+                  {showCompletedTasks && completedTasks.length > 0 && (
                     <button
                       onClick={() => setIsConfirmModalOpen(true)}
                       className="flex items-center text-red-500 hover:text-red-700 text-sm"
@@ -556,7 +607,7 @@ const TaskList = ({ id, onTasksUpdate }) => {
 
                 {showCompletedTasks && (
                   <div className="mt-2">
-                    {sortedCompletedTasks.map((task) => (
+                    {completedTasks.map((task) => (
                       <TaskItem
                         key={task.id}
                         task={task}
@@ -565,6 +616,15 @@ const TaskList = ({ id, onTasksUpdate }) => {
                         onToggleComplete={handleToggleComplete}
                       />
                     ))}
+                    {completedNextCursor && (
+                      <button
+                        onClick={() => handleLoadMore(true)}
+                        disabled={isLoadingMore}
+                        className="block w-full mt-2 py-2 text-sm text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+                      >
+                        {isLoadingMore ? "Carregando..." : "Carregar mais"}
+                      </button>
+                    )}
                   </div>
                 )}
               </div>
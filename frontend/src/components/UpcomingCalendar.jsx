@@ -0,0 +1,106 @@
+import { useState, useEffect, useCallback } from "react";
+import { FaRegCircle, FaRecycle } from "react-icons/fa";
+import { addDays, format, parseISO, startOfDay } from "date-fns";
+import { pt } from "date-fns/locale";
+import { getCalendar, updateOccurrence, updateTask } from "../services/api";
+
+// Quantos dias a agenda mostra a partir de hoje
+const CALENDAR_DAYS = 7;
+
+// Agrupa as ocorrências (já ordenadas pelo servidor) por dia de vencimento
+const groupByDay = (occurrences) => {
+  const days = [];
+  occurrences.forEach((item) => {
+    const day = format(parseISO(item.due_date), "yyyy-MM-dd");
+    if (days.length === 0 || days[days.length - 1].day !== day) {
+      days.push({ day, items: [] });
+    }
+    days[days.length - 1].items.push(item);
+  });
+  return days;
+};
+
+// Próximos dias pelo GET /api/tasks/calendar: inclui as ocorrências das séries que
+// ainda não têm linha no banco (virtual: true), expandidas pelo servidor só nesta janela
+const UpcomingCalendar = ({ tasks }) => {
+  const [occurrences, setOccurrences] = useState([]);
+  const [error, setError] = useState(null);
+
+  const loadCalendar = useCallback(async () => {
+    try {
+      const from = startOfDay(new Date());
+      const to = addDays(from, CALENDAR_DAYS);
+      const calendar = await getCalendar(from.toISOString(), to.toISOString());
+      setOccurrences(calendar.occurrences.filter((item) => !item.completed));
+      setError(null);
+    } catch (err) {
+      setError("Erro ao carregar a agenda.");
+      console.error(err);
+    }
+  }, []);
+
+  // Recarrega quando a lista do painel muda (criação, conclusão, sincronização)
+  useEffect(() => {
+    loadCalendar();
+  }, [loadCalendar, tasks]);
+
+  // Ocorrência virtual é gravada pelo servidor na primeira alteração
+  const handleComplete = async (item) => {
+    try {
+      if (item.virtual) {
+        await updateOccurrence(item.series_id, item.occurrence_date, { completed: true });
+      } else {
+        await updateTask(item.id, { completed: true });
+      }
+      await loadCalendar();
+    } catch (err) {
+      setError("Erro ao concluir a tarefa.");
+      console.error(err);
+    }
+  };
+
+  return (
+    <div className="mt-6 bg-white rounded-md shadow border">
+      <div className="p-3 border-b">
+        <h3 className="font-medium">Próximos {CALENDAR_DAYS} dias</h3>
+      </div>
+
+      {error && <div className="p-3 text-sm text-red-600">{error}</div>}
+
+      {occurrences.length === 0 ? (
+        <div className="p-4 text-center text-sm text-gray-500">
+          Nada agendado
+        </div>
+      ) : (
+        groupByDay(occurrences).map(({ day, items }) => (
+          <div key={day} className="border-b last:border-b-0">
+            <div className="px-3 pt-2 text-xs font-semibold text-gray-500 uppercase">
+              {format(parseISO(items[0].due_date), "EEE, dd/MM", { locale: pt })}
+            </div>
+            {items.map((item) => (
+              <div
+                key={item.id ?? `${item.series_id}-${item.occurrence_date}`}
+                className="flex items-center px-3 py-1.5 text-sm"
+              >
+                <button
+                  onClick={() => handleComplete(item)}
+                  className="mr-2 text-gray-400 hover:text-green-500"
+                  title="Concluir"
+                >
+                  <FaRegCircle />
+                </button>
+                <span className="flex-1 truncate">{item.title}</span>
+                {item.is_recurring && <FaRecycle className="ml-1 text-green-500" size={12} />}
+                <span className="ml-2 text-xs text-gray-500">
+                  {format(parseISO(item.due_date), "HH:mm")}
+                </span>
+              </div>
+            ))}
+          </div>
+        ))
+      )}
+    </div>
+  );
+};
+
+export default UpcomingCalendar;
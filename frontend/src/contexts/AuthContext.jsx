@@ -1,4 +1,5 @@
-import { createContext, useContext, useState, useEffect } from 'react';
+import { createContext, useContext, useState, useEffect, useCallback } from 'react';
+import { logout as logoutSession } from '../services/auth';
 
 const AuthContext = createContext();
 
@@ -42,10 +43,13 @@ export const AuthProvider = ({ children }) => {
     setIsLoading(false);
   }, []);
 
-  const login = (userData, accessToken) => {
+  const login = (userData, accessToken, refreshToken) => {
     try {
       if (userData && accessToken) {
         localStorage.setItem('token', accessToken);
+        if (refreshToken) {
+          localStorage.setItem('refresh_token', refreshToken);
+        }
         localStorage.setItem('user', JSON.stringify(userData));
         setToken(accessToken);
         setUser(userData);
@@ -55,11 +59,26 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const logout = () => {
+  const clearSession = useCallback(() => {
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     setToken(null);
     setUser(null);
+  }, []);
+
+  // Disparado pelo interceptor da API quando o refresh token não é mais aceito
+  useEffect(() => {
+    window.addEventListener('auth:expired', clearSession);
+    return () => window.removeEventListener('auth:expired', clearSession);
+  }, [clearSession]);
+
+  const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      logoutSession(refreshToken).catch((error) => console.error('Error revoking session:', error));
+    }
+    clearSession();
   };
 
   const value = {
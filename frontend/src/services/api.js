@@ -1,23 +1,158 @@
 import axios from "axios";
+import { refreshSession } from "./auth";
 
 const api = axios.create({
   baseURL: import.meta.env.VITE_API_URL + "/api",
 });
 
+// Momento da última escrita confirmada pelo servidor (X-DB-Written-At): enquanto
+// for recente, o backend lê do banco primário e não da réplica, que pode estar atrasada
+let lastWriteAt = null;
+
 // Interceptor para adicionar token nas requisições
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token');
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  if (lastWriteAt) {
+    config.headers['X-DB-Written-At'] = lastWriteAt;
+  }
   return config;
 });
 
+// Uma única renovação em andamento: requisições que recebem 401 ao mesmo tempo esperam a mesma
+let refreshing = null;
+
+// Esperas (ms) pelo par de tokens que outra aba gravou no localStorage
+const ROTATED_SESSION_WAITS_MS = [250, 500, 1000, 2000];
+
+const wait = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// 409: outra aba acabou de rotacionar o mesmo refresh token. O par novo aparece no
+// localStorage assim que a resposta dela for gravada; a sessão continua com ele
+const adoptRotatedSession = async (usedRefreshToken) => {
+  for (const ms of ROTATED_SESSION_WAITS_MS) {
+    await wait(ms);
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken && refreshToken !== usedRefreshToken) {
+      return localStorage.getItem('token');
+    }
+  }
+  throw new Error("Sessão renovada por outra aba não encontrada");
+};
+
+export const refreshAccessToken = () => {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshing = (refreshToken ? refreshSession(refreshToken) : Promise.reject(new Error("Sem refresh token")))
+      .then((data) => {
+        localStorage.setItem('token', data.access_token);
+        localStorage.setItem('refresh_token', data.refresh_token);
+        return data.access_token;
+      })
+      .catch((error) => {
+        if (error.response?.status === 409) {
+          return adoptRotatedSession(refreshToken);
+        }
+        throw error;
+      })
+      .catch((error) => {
+        // Sessão expirada ou revogada: o AuthContext limpa o estado e volta para o login
+        window.dispatchEvent(new Event("auth:expired"));
+        throw error;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
+// Access token expirado: renova com o refresh token e repete a requisição uma vez
+api.interceptors.response.use(
+  (response) => {
+    const writtenAt = response.headers['x-db-written-at'];
+    if (writtenAt && (!lastWriteAt || Number(writtenAt) > Number(lastWriteAt))) {
+      lastWriteAt = writtenAt;
+    }
+    return response;
+  },
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status !== 401 || !original || original._retried) {
+      throw error;
+    }
+    original._retried = true;
+    const token = await refreshAccessToken();
+    original.headers.Authorization = `Bearer ${token}`;
+    return api(original);
+  }
+);
+
 export const getTasks = async () => {
   const response = await api.get("/tasks");
   return response.data;
 };
 
+// Listagem paginada no servidor: params aceita status, due, is_recurring, sort, limit e cursor.
+// Retorna { tasks, next_cursor, sync_cursor }; sync_cursor serve de ponto de partida para getTaskChanges
+export const getTasksPage = async (params = {}) => {
+  const response = await api.get("/tasks", { params });
+  return response.data;
+};
+
+// Sincronização incremental: retorna { cursor, reset, tasks, deleted, etag } desde o cursor
+// informado, ou null quando o servidor responde 304 (nada mudou desde o etag anterior)
+export const getTaskChanges = async (since, etag) => {
+  const params = since !== undefined && since !== null ? { since } : {};
+  const response = await api.get("/tasks/changes", {
+    params,
+    headers: etag ? { "If-None-Match": etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+  if (response.status === 304) {
+    return null;
+  }
+  return { ...response.data, etag: response.headers.etag };
+};
+
+// Stream SSE de tarefas vencidas. EventSource não envia cabeçalhos, e o access token na URL
+// ficaria nos logs do servidor: a URL leva um ticket curto que só abre o stream. Quando o
+// servidor recusa a reconexão (ticket expirado), pede outro ticket e reabre o stream.
+export const openNotificationStream = (onDueTask) => {
+  let source = null;
+  let closed = false;
+
+  const open = async () => {
+    const { data } = await api.post("/notifications/ticket");
+    if (closed) return;
+    const url = `${import.meta.env.VITE_API_URL}/api/notifications/stream?ticket=${encodeURIComponent(data.ticket)}`;
+    source = new EventSource(url);
+    source.addEventListener("due", (event) => onDueTask(JSON.parse(event.data)));
+    source.onerror = () => {
+      if (closed || source.readyState !== EventSource.CLOSED) {
+        return;
+      }
+      open().catch(() => {});
+    };
+  };
+
+  open().catch(() => {});
+  return {
+    close: () => {
+      closed = true;
+      if (source) source.close();
+    }
+  };
+};
+
+// Contadores por filtro ({ all, today, tomorrow, future, "no-date", overdue, recurring, completed })
+export const getTaskSummary = async () => {
+  const response = await api.get("/tasks/summary");
+  return response.data;
+};
+
 export const getTask = async (id) => {
   const response = await api.get(`/tasks/${id}`);
   return response.data;
@@ -38,6 +173,27 @@ export const deleteTask = async (id) => {
   return true;
 };
 
+// Tarefas e ocorrências de séries entre from e to (ISO); ocorrências não alteradas vêm com virtual: true
+export const getCalendar = async (from, to) => {
+  const response = await api.get("/tasks/calendar", { params: { from, to } });
+  return response.data;
+};
+
+// Série recorrente ({ title, description, recurrence_type, starts_at, until }) sem tarefas pré-criadas
+export const createTaskSeries = async (seriesData) => {
+  const response = await api.post("/tasks/series", seriesData);
+  return response.data;
+};
+
+// Altera/conclui uma ocorrência da série; occurrenceDate é o vencimento original da ocorrência
+export const updateOccurrence = async (seriesId, occurrenceDate, changes) => {
+  const response = await api.put(`/tasks/series/${seriesId}/occurrences`, {
+    ...changes,
+    occurrence_date: occurrenceDate
+  });
+  return response.data;
+};
+
 export const deleteAllCompletedTasks = async () => {
   const response = await api.delete("/tasks/completed");
   return response.data;
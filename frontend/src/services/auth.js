@@ -23,6 +23,25 @@ export const getCurrentUser = async (token) => {
   return response.data;
 };
 
+// Troca o refresh token por um novo par de tokens (o refresh token é rotacionado a cada uso)
+export const refreshSession = async (refreshToken) => {
+  const response = await authApi.post("/refresh", null, {
+    headers: {
+      Authorization: `Bearer ${refreshToken}`
+    }
+  });
+  return response.data;
+};
+
+// Revoga a sessão no servidor (toda a família do refresh token)
+export const logout = async (refreshToken) => {
+  await authApi.post("/logout", null, {
+    headers: {
+      Authorization: `Bearer ${refreshToken}`
+    }
+  });
+};
+
 export const verifyEmail = async (email, code) => {
   const response = await authApi.post("/verify-email", { email, code });
   return response.data;